@@ -0,0 +1,98 @@
+"""Análisis fuera del equipo de los historiales recolectados de toda la flota.
+
+Uso: python analisis_flota.py <directorio con los historiales> [--horas 24]
+
+Requiere numpy. Los archivos .hist de cada equipo se copian bajo un mismo
+directorio (en cualquier subdirectorio); el nombre del archivo identifica el
+host y el destino.
+"""
+import argparse
+import json
+import sys
+import time
+
+from monitoreo.flota import (FRACCION_PATRON, INTERVALO, MIN_DESTINOS_AISLADO, MIN_HOSTS_COMUN, PERCENTILES,
+                             cargar_flota, patrones, resumen)
+
+TOP = 20  # Filas por tabla
+
+
+def argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Análisis de pérdida y RTT de la flota completa")
+    parser.add_argument("directorio", help="directorio con los historiales .hist de todos los equipos")
+    parser.add_argument("--horas", type=float, default=24, help="ventana analizada hacia atrás (0 = todo)")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO, help="segundos por ciclo")
+    parser.add_argument("--umbral-perdida", type=float, default=0.0,
+                        help="fracción de pérdida a partir de la cual una muestra cuenta como fallida")
+    parser.add_argument("--fraccion", type=float, default=FRACCION_PATRON,
+                        help="fracción de hosts o destinos fallando a la vez para marcar un patrón")
+    parser.add_argument("--min-hosts", type=int, default=MIN_HOSTS_COMUN)
+    parser.add_argument("--min-destinos", type=int, default=MIN_DESTINOS_AISLADO)
+    parser.add_argument("--top", type=int, default=TOP, help="filas por tabla")
+    parser.add_argument("--json", action="store_true", help="salida en JSON en lugar de tablas")
+    return parser.parse_args(argv)
+
+
+def _fila(campos, fila):
+    # JSON no admite NaN: los percentiles sin respuestas salen como null
+    return {c: None if isinstance(v, float) and v != v else v for c, v in zip(campos, fila)}
+
+
+def _fecha(instante):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(instante))
+
+
+def tabla(titulo, encabezados, filas):
+    anchos = [max(len(str(e)), *(len(str(f[i])) for f in filas)) if filas else len(str(e))
+              for i, e in enumerate(encabezados)]
+    lineas = [titulo, "  ".join(str(e).ljust(a) for e, a in zip(encabezados, anchos)),
+              "-" * (sum(anchos) + 2 * (len(anchos) - 1))]
+    lineas += ["  ".join(str(c).ljust(a) for c, a in zip(f, anchos)) for f in filas] or ["(sin datos)"]
+    return "\n".join(lineas)
+
+
+def main(argv=None):
+    args = argumentos(argv)
+    desde = time.time() - args.horas * 3600 if args.horas else None
+    try:
+        flota = cargar_flota(args.directorio, desde)
+    except ImportError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    por_host = resumen(flota, "host")
+    por_destino = resumen(flota, "destino")
+    destinos, hosts = patrones(flota, args.intervalo, args.umbral_perdida, args.fraccion,
+                               args.min_hosts, args.min_destinos)
+
+    if args.json:
+        campos = ["nombre", "muestras", "enviados", "recibidos", "perdida_pct"] + [f"rtt_p{p}" for p in PERCENTILES]
+        eventos = ["nombre", "ciclos", "maximo_simultaneo", "ultimo"]
+        print(json.dumps({
+            "muestras": len(flota), "hosts": len(flota.hosts), "destinos": len(flota.destinos),
+            "por_host": [_fila(campos, f) for f in por_host],
+            "por_destino": [_fila(campos, f) for f in por_destino],
+            "destinos_comunes": [_fila(eventos, f) for f in destinos],
+            "hosts_aislados": [_fila(eventos, f) for f in hosts],
+        }, indent=2))
+        return 0
+
+    encabezados = ["", "muestras", "enviados", "recibidos", "perdida_%"] + [f"p{p}_ms" for p in PERCENTILES]
+
+    def formato(filas):
+        return [(f[0], f[1], f[2], f[3], f"{f[4]:.2f}", *(f"{v:.1f}" for v in f[5:])) for f in filas[:args.top]]
+
+    print(f"{len(flota)} muestras de {len(flota.hosts)} hosts y {len(flota.destinos)} destinos\n")
+    print(tabla("Por host (mayor pérdida primero)", encabezados, formato(por_host)) + "\n")
+    print(tabla("Por destino (mayor pérdida primero)", encabezados, formato(por_destino)) + "\n")
+    print(tabla("Destinos comunes: muchos hosts fallando hacia la misma IP",
+                ["destino", "ciclos", "max_hosts", "ultimo"],
+                [(n, c, m, _fecha(u)) for n, c, m, u in destinos[:args.top]]) + "\n")
+    print(tabla("Hosts aislados: un host fallando hacia la mayoría de sus destinos",
+                ["host", "ciclos", "max_destinos", "ultimo"],
+                [(n, c, m, _fecha(u)) for n, c, m, u in hosts[:args.top]]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
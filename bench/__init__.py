@@ -0,0 +1 @@
+"""Herramientas de benchmark fuera del equipo para el monitoreo Telcel."""
@@ -0,0 +1,194 @@
+"""Benchmark fuera del equipo de los ciclos completos de main().
+
+Ejecuta el monitor con cada motor (secuencial, hilos, async) contra el equipo
+simulado de `dispositivo_simulado` con inventarios de distinto tamaño y reporta
+la latencia del ciclo, la memoria pico (tracemalloc) y el máximo de hilos vivos.
+
+Uso:
+    python bench/bench_monitoreo.py
+    python bench/bench_monitoreo.py --destinos 5 50 --variantes secuencial hilos \
+        --latencia 0.005 --perdida 0.01 --error 0.001 --salida bench_output.txt
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dispositivo_simulado import PerfilSimulado, instalar_modulos_simulados  # noqa: E402
+from monitoreo.motores import MOTORES  # noqa: E402
+
+TAMANOS = (5, 50, 500, 5000)
+
+# Script cuyo Monitor se mide; el motor se fuerza en cada variante
+SCRIPT = "monitoreo_telcel"
+
+
+class MuestreadorHilos:
+    """Registra el máximo de hilos vivos mientras corre el ciclo."""
+
+    def __init__(self, periodo=0.002):
+        self.periodo = periodo
+        self.maximo = 0
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._fin.is_set():
+            # No contar el propio hilo muestreador
+            self.maximo = max(self.maximo, threading.active_count() - 1)
+            self._fin.wait(self.periodo)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._fin.set()
+        self._hilo.join()
+        return False
+
+
+def escribir_inventario(ruta, hostnames, cantidad):
+    """Genera un inventario YAML con `cantidad` destinos para cada hostname."""
+    destinos = [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(1, cantidad + 1)]
+    with open(ruta, "w") as f:
+        for hostname in hostnames:
+            f.write(f"{hostname}:\n  destinos:\n")
+            f.writelines(f"    - {ip}\n" for ip in destinos)
+
+
+def preparar(monitor, motor, directorio, perfil, cantidad, escalonar=0):
+    """Apunta las rutas del monitor a un directorio temporal con su inventario."""
+    monitor.motor_forzado = motor
+    monitor.escalonar = escalonar
+    monitor.ttl_cache = 0  # Cada ciclo medido debe ejecutar sus pings
+    monitor.confirmaciones = 0  # Sin reintentos: el tiempo medido es el del ciclo normal
+    monitor.yaml_file = os.path.join(directorio, "inventario.yml")
+    monitor.state_file = os.path.join(directorio, "estado.json")
+    monitor.history_dir = os.path.join(directorio, "historial")
+    # Las métricas del script no deben escribirse en el directorio de trabajo
+    monitor.metrics_file = os.path.join(directorio, "metricas.jsonl")
+    monitor.openmetrics_file = os.path.join(directorio, "metricas.prom")
+    escribir_inventario(monitor.yaml_file, {perfil.hostname, socket.gethostname()}, cantidad)
+
+
+def ciclo(monitor):
+    """Ejecuta un main() completo y devuelve (segundos, máximo de hilos)."""
+    with contextlib.redirect_stdout(io.StringIO()), MuestreadorHilos() as muestreador:
+        inicio = time.perf_counter()
+        monitor.main()
+        duracion = time.perf_counter() - inicio
+    return duracion, muestreador.maximo
+
+
+def medir_variante(variante, cantidad, perfil, ciclos, escalonar=0):
+    """Mide `ciclos` ejecuciones de main() más una con tracemalloc activo."""
+    monitor = importlib.import_module(SCRIPT).monitor
+    directorio = tempfile.mkdtemp(prefix=f"bench_{variante}_")
+    try:
+        preparar(monitor, variante, directorio, perfil, cantidad, escalonar)
+        antes = dict(perfil.contadores)
+
+        # El primer ciclo compila el índice del inventario; se reporta aparte
+        duraciones, hilos = [], 0
+        for _ in range(ciclos + 1):
+            duracion, maximo = ciclo(monitor)
+            duraciones.append(duracion)
+            hilos = max(hilos, maximo)
+
+        # Memoria pico en un ciclo adicional, para no sesgar la latencia
+        tracemalloc.start()
+        try:
+            ciclo(monitor)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        ejecuciones = ciclos + 2
+        return {
+            "variante": variante,
+            "destinos": cantidad,
+            "primero": duraciones[0],
+            "mediana": statistics.median(duraciones[1:]),
+            "maximo": max(duraciones[1:]),
+            "pico_mb": pico / (1024 * 1024),
+            "hilos": hilos,
+            "aperturas": (perfil.contadores["aperturas"] - antes["aperturas"]) / ejecuciones,
+            "pings": (perfil.contadores["pings"] - antes["pings"]) / ejecuciones,
+        }
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def formatear(resultados):
+    """Tabla de texto con una fila por variante y tamaño."""
+    encabezado = (f"{'variante':<13}{'destinos':>9}{'primero_s':>11}{'mediana_s':>11}{'max_s':>9}"
+                  f"{'pico_mb':>9}{'hilos':>7}{'sesiones':>10}{'pings':>8}")
+    filas = [encabezado, "-" * len(encabezado)]
+    for r in resultados:
+        filas.append(f"{r['variante']:<13}{r['destinos']:>9}{r['primero']:>11.3f}{r['mediana']:>11.3f}"
+                     f"{r['maximo']:>9.3f}{r['pico_mb']:>9.2f}{r['hilos']:>7}{r['aperturas']:>10.1f}"
+                     f"{r['pings']:>8.1f}")
+    return "\n".join(filas)
+
+
+def argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de los monitores con un equipo Junos simulado")
+    parser.add_argument("--destinos", type=int, nargs="+", default=list(TAMANOS))
+    parser.add_argument("--variantes", nargs="+", choices=sorted(MOTORES), default=list(MOTORES),
+                        help="motores de ejecución a comparar")
+    parser.add_argument("--ciclos", type=int, default=3, help="ciclos medidos después del primero")
+    parser.add_argument("--latencia", type=float, default=0.002, help="segundos fijos por RPC")
+    parser.add_argument("--segundos-por-sonda", type=float, default=0.0)
+    parser.add_argument("--apertura", type=float, default=0.05, help="segundos de Device.open()")
+    parser.add_argument("--perdida", type=float, default=0.0, help="probabilidad de perder cada sonda")
+    parser.add_argument("--rtt", type=float, default=8.0, help="RTT medio en ms")
+    parser.add_argument("--error", type=float, default=0.0, help="probabilidad de error por RPC")
+    parser.add_argument("--caida", type=float, default=0.0, help="probabilidad de que un error cierre la sesión")
+    parser.add_argument("--campos-legados", action="store_true",
+                        help="incluir probes-received en el resumen del ping")
+    parser.add_argument("--escalonar", type=float, default=0.0,
+                        help="segundos en los que se reparten los pings del ciclo (0 los lanza juntos)")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", help="archivo donde guardar la tabla de resultados")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = argumentos(argv)
+    perfil = PerfilSimulado(latencia=args.latencia, segundos_por_sonda=args.segundos_por_sonda,
+                            apertura=args.apertura, perdida=args.perdida, rtt_ms=args.rtt,
+                            error=args.error, caida=args.caida, campos_legados=args.campos_legados,
+                            semilla=args.semilla)
+    syslog = instalar_modulos_simulados(perfil)
+
+    resultados = []
+    for cantidad in args.destinos:
+        for variante in args.variantes:
+            resultado = medir_variante(variante, cantidad, perfil, args.ciclos, args.escalonar)
+            resultados.append(resultado)
+            print(f"{variante} con {cantidad} destinos: mediana {resultado['mediana']:.3f}s", file=sys.stderr)
+
+    tabla = formatear(resultados)
+    print(tabla)
+    print(f"\nmensajes de syslog: {len(syslog)}")
+    if args.salida:
+        with open(args.salida, "w") as f:
+            f.write(tabla + "\n")
+
+
+if __name__ == "__main__":
+    main()
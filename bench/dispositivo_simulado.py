@@ -0,0 +1,197 @@
+"""Equipo Junos simulado para ejecutar los monitores fuera del equipo.
+
+Sustituye a `jcs`, `jnpr.junos.Device` y `junos.Junos_Context` registrando
+módulos equivalentes en sys.modules. Las respuestas de `rpc.ping` y
+`rpc.get_software_information` imitan el XML de Junos, con latencia, pérdida
+y errores configurables.
+"""
+import random
+import sys
+import threading
+import time
+import types
+
+try:
+    from lxml import etree
+except ImportError:
+    import xml.etree.ElementTree as etree
+
+
+class ErrorRpcSimulado(Exception):
+    """Error inyectado en un RPC, equivalente a un RpcError de PyEZ."""
+
+
+class ConexionCerradaSimulada(ErrorRpcSimulado):
+    """La sesión se cayó durante el RPC."""
+
+
+class PerfilSimulado:
+    """Parámetros del equipo simulado.
+
+    - latencia: segundos fijos de cada RPC (NETCONF + procesamiento en el RE).
+    - segundos_por_sonda: segundos que agrega cada sonda del ping (escalado).
+    - apertura: segundos que tarda Device.open().
+    - perdida: probabilidad de perder cada sonda.
+    - rtt_ms / rtt_jitter_ms: RTT medio y variación uniforme de cada respuesta.
+    - error: probabilidad de que el RPC falle; caida: probabilidad de que además
+      cierre la sesión.
+    - campos_legados: incluir también `probes-received` en el resumen.
+    """
+
+    def __init__(self, hostname="opint-bench-1", latencia=0.002, segundos_por_sonda=0.0,
+                 apertura=0.05, perdida=0.0, rtt_ms=8.0, rtt_jitter_ms=2.0, error=0.0,
+                 caida=0.0, campos_legados=False, semilla=None):
+        self.hostname = hostname
+        self.latencia = latencia
+        self.segundos_por_sonda = segundos_por_sonda
+        self.apertura = apertura
+        self.perdida = perdida
+        self.rtt_ms = rtt_ms
+        self.rtt_jitter_ms = rtt_jitter_ms
+        self.error = error
+        self.caida = caida
+        self.campos_legados = campos_legados
+        self.random = random.Random(semilla)
+        self._lock = threading.Lock()
+        self.contadores = {"aperturas": 0, "pings": 0, "sondas": 0, "errores": 0}
+
+    def contar(self, clave, cantidad=1):
+        with self._lock:
+            self.contadores[clave] += cantidad
+
+    def sortear(self, probabilidad):
+        with self._lock:
+            return self.random.random() < probabilidad
+
+    def rtt_us(self):
+        with self._lock:
+            variacion = self.random.uniform(-self.rtt_jitter_ms, self.rtt_jitter_ms)
+        return max(1, int((self.rtt_ms + variacion) * 1000))
+
+
+def _sub(padre, tag, texto=None):
+    elem = etree.SubElement(padre, tag)
+    if texto is not None:
+        elem.text = str(texto)
+    return elem
+
+
+def respuesta_ping(perfil, host, count, size=56):
+    """Construye un <ping-results> como el que devuelve Junos."""
+    raiz = etree.Element("ping-results")
+    _sub(raiz, "target-host", host)
+    _sub(raiz, "target-ip", host)
+    _sub(raiz, "packet-size", size)
+
+    rtts = []
+    ahora = int(time.time())
+    for indice in range(1, count + 1):
+        if perfil.sortear(perfil.perdida):
+            continue  # Junos no reporta probe-result de las sondas sin respuesta
+        rtt = perfil.rtt_us()
+        rtts.append(rtt)
+        probe = _sub(raiz, "probe-result")
+        probe.set("date-determined", str(ahora))
+        _sub(probe, "probe-index", indice)
+        _sub(probe, "probe-success")
+        _sub(probe, "sequence-number", indice - 1)
+        _sub(probe, "ip-address", host)
+        _sub(probe, "time-to-live", 57)
+        _sub(probe, "response-size", size + 8)
+        _sub(probe, "rtt", rtt)
+
+    resumen = _sub(raiz, "probe-results-summary")
+    _sub(resumen, "probes-sent", count)
+    _sub(resumen, "responses-received", len(rtts))
+    if perfil.campos_legados:
+        _sub(resumen, "probes-received", len(rtts))
+    _sub(resumen, "packet-loss", (count - len(rtts)) * 100 // max(1, count))
+    if rtts:
+        media = sum(rtts) // len(rtts)
+        desviacion = int((sum((r - media) ** 2 for r in rtts) / len(rtts)) ** 0.5)
+        _sub(resumen, "rtt-minimum", min(rtts))
+        _sub(resumen, "rtt-maximum", max(rtts))
+        _sub(resumen, "rtt-average", media)
+        _sub(resumen, "rtt-stddev", desviacion)
+        _sub(raiz, "ping-success")
+    return raiz
+
+
+class _RpcSimulado:
+    def __init__(self, dev):
+        self._dev = dev
+
+    def _llamada(self):
+        perfil = self._dev.perfil
+        if not self._dev.connected:
+            raise ConexionCerradaSimulada("La sesión NETCONF está cerrada")
+        if perfil.sortear(perfil.error):
+            perfil.contar("errores")
+            if perfil.sortear(perfil.caida):
+                self._dev.connected = False
+                raise ConexionCerradaSimulada("La sesión NETCONF se cerró durante el RPC")
+            raise ErrorRpcSimulado("error: el RPC falló en el equipo simulado")
+
+    def get_software_information(self):
+        self._llamada()
+        time.sleep(self._dev.perfil.latencia)
+        raiz = etree.Element("software-information")
+        _sub(raiz, "host-name", self._dev.perfil.hostname)
+        _sub(raiz, "product-model", "mx960")
+        _sub(raiz, "junos-version", "21.4R3-S5")
+        return raiz
+
+    def ping(self, host, count="5", size=56, **opciones):
+        perfil = self._dev.perfil
+        self._llamada()
+        count = int(count)
+        perfil.contar("pings")
+        perfil.contar("sondas", count)
+        time.sleep(perfil.latencia + count * perfil.segundos_por_sonda)
+        return respuesta_ping(perfil, host, count, int(size))
+
+
+class DispositivoSimulado:
+    """Sustituto de jnpr.junos.Device con el perfil compartido del módulo."""
+
+    perfil = PerfilSimulado()
+
+    def __init__(self, *args, **kwargs):
+        self.host = kwargs.get("host")
+        self.connected = False
+        self.rpc = _RpcSimulado(self)
+
+    def open(self):
+        self.perfil.contar("aperturas")
+        time.sleep(self.perfil.apertura)
+        self.connected = True
+        return self
+
+    def close(self):
+        self.connected = False
+
+
+def instalar_modulos_simulados(perfil, registro_syslog=None):
+    """Registra `jcs`, `jnpr.junos` y `junos` simulados en sys.modules."""
+    DispositivoSimulado.perfil = perfil
+    registro = registro_syslog if registro_syslog is not None else []
+
+    jcs = types.ModuleType("jcs")
+    jcs.syslog = lambda severidad, mensaje: registro.append((severidad, mensaje))
+
+    jnpr = types.ModuleType("jnpr")
+    jnpr.__path__ = []
+    junos_pyez = types.ModuleType("jnpr.junos")
+    junos_pyez.Device = DispositivoSimulado
+    jnpr.junos = junos_pyez
+
+    junos = types.ModuleType("junos")
+    junos.Junos_Context = {"hostname": f"{perfil.hostname}.re0"}
+
+    sys.modules.update({"jcs": jcs, "jnpr": jnpr, "jnpr.junos": junos_pyez, "junos": junos})
+    if "lxml" not in sys.modules and etree.__name__ == "xml.etree.ElementTree":
+        # exito_1.py importa lxml.etree solo para depuración
+        lxml = types.ModuleType("lxml")
+        lxml.etree = etree
+        sys.modules.update({"lxml": lxml, "lxml.etree": etree})
+    return registro
@@ -0,0 +1,52 @@
+"""Controlador fuera del equipo para toda la flota del inventario.
+
+Uso: python controlador_flota.py [-demonio] [-intervalo 300] [-motor async] [-puerto-metricas 9101]
+
+Requiere jnpr.junos (PyEZ). Las credenciales salen del agente y la
+configuración de SSH del usuario; OPINT_USUARIO indica otro usuario remoto.
+"""
+import os
+
+from jnpr.junos import Device
+from monitoreo.controlador import ControladorFlota, syslog_local
+from monitoreo.motores import ASYNC
+
+# Configuración general
+YAML_FILE = "destinos_telcel.yml"
+DIRECTORIO = "flota"  # Estado por host e historiales de todos los equipos
+METRICS_FILE = "flota/metricas_flota.jsonl"
+OPENMETRICS_FILE = "flota/metricas_flota.prom"
+USUARIO = os.environ.get("OPINT_USUARIO")
+MAX_EQUIPOS = 64  # Equipos con un ciclo en curso a la vez
+SESIONES_POR_EQUIPO = 4  # Sesiones NETCONF (y pings en vuelo) por equipo
+MAX_PINGS = 256  # Sesiones en uso a la vez en toda la flota
+ESCALONAR = 120  # s en los que se reparten los inicios de los equipos de cada ronda
+COUNT = 50  # Cantidad de paquetes a enviar en la ráfaga completa
+RTT_THRESHOLD = 100  # ms
+MAX_EVENTOS = 3
+MIN_EXITOS_LIMPIEZA = 2
+MAX_PAQUETES_PERDIDOS = 0
+
+# Severidad de logs
+CRITICAL_SEVERITY = "external.critical"
+WARNING_SEVERITY = "external.warning"
+INFO_SEVERITY = "external.info"
+
+
+def sesion(host):
+    """Sesión NETCONF con un equipo; sin recolectar facts, que el monitor no usa."""
+    return Device(host=host, user=USUARIO, gather_facts=False)
+
+
+os.makedirs(DIRECTORIO, exist_ok=True)
+controlador = ControladorFlota(sesion, syslog_local, YAML_FILE, DIRECTORIO, COUNT, max_equipos=MAX_EQUIPOS,
+                               sesiones_por_equipo=SESIONES_POR_EQUIPO, max_pings=MAX_PINGS,
+                               metrics_file=METRICS_FILE, openmetrics_file=OPENMETRICS_FILE, motor=ASYNC,
+                               rtt_umbral=RTT_THRESHOLD, max_perdidos=MAX_PAQUETES_PERDIDOS,
+                               max_eventos=MAX_EVENTOS, min_exitos=MIN_EXITOS_LIMPIEZA,
+                               severidad_critica=CRITICAL_SEVERITY, severidad_aviso=WARNING_SEVERITY,
+                               severidad_info=INFO_SEVERITY, escalonar=ESCALONAR)
+
+
+if __name__ == "__main__":
+    controlador.ejecutar()
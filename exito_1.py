@@ -1,157 +1,47 @@
-import socket
-import yaml
 import jcs
 from jnpr.junos import Device
 from junos import Junos_Context
-from lxml import etree
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
+from monitoreo.motores import ASYNC
+from monitoreo.nucleo import Monitor
 
 # Configuración general
 YAML_FILE = "/tmp/resource/trayectorias_telcel.yml"
-COUNT = 20  # Cantidad de paquetes a enviar
+STATE_FILE = "/tmp/resource/estado_trayectorias.json"
+HISTORY_DIR = "/tmp/resource/historial_trayectorias"
+METRICS_FILE = "/tmp/resource/metricas_trayectorias.jsonl"
+OPENMETRICS_FILE = "/tmp/resource/metricas_trayectorias.prom"
+ESCALONAR = 120  # s
+CACHE_TTL = None  # s; None: 80% del intervalo del ciclo
+COUNT = 20  # Cantidad de paquetes a enviar en la ráfaga completa
 RTT_THRESHOLD = 100  # ms
 MAX_EVENTOS = 3
+MIN_EXITOS_LIMPIEZA = 2
 MAX_PAQUETES_PERDIDOS = 0
 
-# Claves YAML
-KEY_DESTINOS = "destinos"
-KEY_EVENTOS = "eventos"
-
 # Severidad de logs
 CRITICAL_SEVERITY = "external.crit"
 WARNING_SEVERITY = "external.warn"
+INFO_SEVERITY = "external.info"
 
 
-def log_crit(msg):
-    jcs.syslog(CRITICAL_SEVERITY, msg)
-
-
-def log_warn(msg):
-    jcs.syslog(WARNING_SEVERITY, msg)
-
-
-def cargar_yaml():
-    """Carga el archivo YAML como diccionario."""
-    try:
-        with open(YAML_FILE, "r") as file:
-            return yaml.safe_load(file)
-    except yaml.YAMLError as e:
-        log_crit(f"Error al leer el YAML: {e}")
-    except Exception as e:
-        log_crit(f"Error inesperado al leer el YAML: {e}")
-    return {}
-
-
-def guardar_yaml(data):
-    """Guarda la información actualizada en el archivo YAML."""
-    try:
-        with open(YAML_FILE, "w") as file:
-            yaml.safe_dump(data, file)
-    except Exception as e:
-        log_crit(f"Error al escribir el YAML: {e}")
-
-
-def enviar_alarma(hostname, ip):
-    """Envía una alarma después de 3 fallos consecutivos."""
-    mensaje = f"ALARMA: {hostname} con destino {ip} ha fallado durante 15 minutos seguidos"
-    log_crit(mensaje)
-
-
-def hacer_ping(hostname, ip):
-    """Ejecuta un ping y determina si hubo degradación."""
-    dev = None
-    try:
-        # Crear una conexión para cada destino
-        dev = Device()
-        dev.open()
-
-        result = dev.rpc.ping(host=ip, count=str(COUNT))
-        #print(etree.tostring(result, pretty_print=True).decode())
+def obtener_hostname():
+    """Obtiene el hostname corto del equipo desde el contexto de Junos."""
+    return Junos_Context.get("hostname", "default").split(".")[0]
 
-        enviados = result.findtext("probe-results-summary/probes-sent")
-        recibidos = result.findtext("probe-results-summary/responses-received")
-        rtt = result.findtext("probe-results-summary/rtt-average")
 
-        print(f"Paquetes enviados : {enviados}")
-        print(f"Paquetes recibidos : {recibidos}")
-        print(f"Paquetes rtt-average : {rtt}")
-
-        if not (enviados and recibidos and rtt):
-            log_crit(f"Ping incompleto en {hostname} -> {ip}")
-            return False
-
-        enviados = int(enviados.strip())
-        recibidos = int(recibidos.strip())
-        perdida = enviados - recibidos
-
-        #Convertir rtt de microsegundos a milisegundos
-        avg_rtt = float(rtt.strip()) / 1000
-
-        if perdida > MAX_PAQUETES_PERDIDOS or avg_rtt > RTT_THRESHOLD:
-            log_warn(f"Degradación en {hostname} -> {ip}: Perdidos={perdida}, RTT={avg_rtt}ms")
-            return False
-    
-        return True
-
-    except Exception as e:
-        log_crit(f"Fallo en ping a {hostname} -> {ip} - Error: {str(e)}")
-        return False
-
-    finally:
-        if dev:
-            dev.close()
+# Pings concurrentes con asyncio, con plazo por destino y por ciclo
+monitor = Monitor(Device, jcs.syslog, YAML_FILE, STATE_FILE, HISTORY_DIR, COUNT, motor=ASYNC,
+                  rtt_umbral=RTT_THRESHOLD, max_perdidos=MAX_PAQUETES_PERDIDOS, max_eventos=MAX_EVENTOS,
+                  min_exitos=MIN_EXITOS_LIMPIEZA, severidad_critica=CRITICAL_SEVERITY,
+                  severidad_aviso=WARNING_SEVERITY, severidad_info=INFO_SEVERITY,
+                  metrics_file=METRICS_FILE, escalonar=ESCALONAR,
+                  openmetrics_file=OPENMETRICS_FILE, ttl_cache=CACHE_TTL, obtener_hostname=obtener_hostname)
 
 
 def main():
     """Proceso principal de monitoreo."""
-    log_crit("Proceso principal de monitoreo.")
-    start_time = time.time()  # Registrar el tiempo de inicio
-
-    # Cargar el archivo YAML
-    data = cargar_yaml()
-    if not data:
-        return
-    
-    # Obtener el hostname del equipo
-    hostname = Junos_Context.get("hostname", "default").split(".")[0]
-    print(f"Hostname : {hostname}")
-
-    # Buscar el hostname en el YAML
-    destinos = data[hostname].get(KEY_DESTINOS, [])
-    print(f"Destinos : {destinos}")
-
-    # Obtener los eventos
-    eventos_count = data.get(hostname, {}).get(KEY_EVENTOS, 0)
-
-    # Usar ThreadPoolExecutor para ejecutar el ping a cada destino en paralelo
-    with ThreadPoolExecutor(max_workers=len(destinos)) as executor:
-        futuros = {executor.submit(hacer_ping, hostname, ip): ip for ip in destinos}
-        fallos = []
-        for futuro in as_completed(futuros):
-            ip = futuros[futuro]
-            if not futuro.result():
-                fallos.append(ip)
-
-    # Si hay fallos, incrementar eventos y verificar alarma
-    if fallos:
-        eventos_count += 1
-        if eventos_count >= MAX_EVENTOS:
-            enviar_alarma(hostname, fallos[0])
-            eventos_count = 0
-    else:
-        eventos_count = 0
-
-    # Actualizar el archivo YAML con el nuevo contador de eventos
-    if hostname in data:
-        data[hostname][KEY_EVENTOS] = eventos_count
+    monitor.main()
 
-    # Guardar archvio actualizado
-    guardar_yaml(data)
-    
-    end_time = time.time()  # Registrar el tiempo de finalización
-    elapsed_time = end_time - start_time  # Calcular el tiempo transcurrido
-    log_warn(f"Finalizó el monitoreo de trayectorias en {elapsed_time:.2f} segundos.") # Mostrar el mensaje con el tiempo transcurrido
 
 if __name__ == "__main__":
-    main()
+    monitor.ejecutar()
@@ -0,0 +1 @@
+"""Componentes compartidos del monitoreo Telcel On-Box-Junos."""
@@ -0,0 +1,28 @@
+"""Sondeo adaptativo: ping corto primero y ráfaga completa solo ante sospecha."""
+
+COUNT_CORTO = 5  # Paquetes del sondeo corto (enviados en modo rapid)
+MARGEN_SOSPECHA = 0.8  # Fracción del umbral de RTT a partir de la cual se confirma con la ráfaga
+
+
+def sondeo_sospechoso(medicion, rtt_umbral, max_perdidos, margen=MARGEN_SOSPECHA):
+    """Indica si el sondeo corto amerita confirmar con la ráfaga completa."""
+    if medicion is None or medicion.perdida is None:
+        return True
+    return (medicion.perdida > max_perdidos or medicion.rtt is None
+            or medicion.rtt > rtt_umbral * margen)
+
+
+def sondeo_adaptativo(medir, degradado, count_corto, count_completo, rtt_umbral, max_perdidos):
+    """Devuelve la Medicion decisiva de un destino.
+
+    `medir(count, rapido)` ejecuta el ping y devuelve una Medicion. Si el destino
+    no está degradado se envía primero un sondeo corto y rápido; la ráfaga de
+    `count_completo` paquetes solo se envía si el sondeo corto muestra pérdida o
+    un RTT cercano al umbral. Un destino degradado siempre recibe la ráfaga
+    completa, de modo que los criterios de aceptación se evalúan sobre ella.
+    """
+    if not degradado and 0 < count_corto < count_completo:
+        corta = medir(count_corto, True)
+        if not sondeo_sospechoso(corta, rtt_umbral, max_perdidos):
+            return corta
+    return medir(count_completo, False)
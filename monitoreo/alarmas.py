@@ -0,0 +1,91 @@
+"""Estado de fallas por destino con histéresis para alarmas y limpiezas."""
+from monitoreo.estado import DESTINO_HOST
+
+UMBRAL_ALARMA = 3  # Ciclos fallidos consecutivos para levantar la alarma
+UMBRAL_LIMPIEZA = 2  # Ciclos exitosos consecutivos para limpiar la alarma
+
+# Claves del registro de cada destino en el almacén de estado
+KEY_FALLOS = "fallos"
+KEY_EXITOS = "exitos"
+KEY_ALARMA = "alarma"
+
+ALARMA = "alarma"
+LIMPIEZA = "limpieza"
+
+
+def evaluar_destino(registro, fallido, umbral_alarma=UMBRAL_ALARMA, umbral_limpieza=UMBRAL_LIMPIEZA):
+    """Actualiza el registro de un destino con el resultado del ciclo.
+
+    Devuelve (registro_nuevo, evento) donde evento es ALARMA, LIMPIEZA o None.
+    Una alarma activa no se repite: solo se limpia tras `umbral_limpieza`
+    ciclos exitosos seguidos.
+    """
+    registro = dict(registro or {})
+    fallos = registro.get(KEY_FALLOS, 0)
+    exitos = registro.get(KEY_EXITOS, 0)
+    en_alarma = registro.get(KEY_ALARMA, False)
+    evento = None
+
+    if fallido:
+        fallos, exitos = fallos + 1, 0
+        if not en_alarma and fallos >= umbral_alarma:
+            en_alarma, evento = True, ALARMA
+    else:
+        fallos, exitos = 0, exitos + 1
+        if en_alarma and exitos >= umbral_limpieza:
+            en_alarma, evento = False, LIMPIEZA
+
+    registro.update({KEY_FALLOS: fallos, KEY_EXITOS: exitos, KEY_ALARMA: en_alarma})
+    return registro, evento
+
+
+def destino_degradado(registro):
+    """Indica si el destino viene fallando o tiene una alarma activa."""
+    registro = registro or {}
+    return registro.get(KEY_FALLOS, 0) > 0 or registro.get(KEY_ALARMA, False)
+
+
+def requiere_confirmacion(registro, umbral_alarma):
+    """Indica si un destino que acaba de fallar aún tardaría ciclos en alarmar.
+
+    Solo a esos destinos les sirve confirmar la falla con reintentos rápidos.
+    """
+    registro = registro or {}
+    return not registro.get(KEY_ALARMA, False) and registro.get(KEY_FALLOS, 0) + 1 < umbral_alarma
+
+
+def texto_rtt(rtt):
+    """RTT en ms para los mensajes; N/D si no hubo respuestas."""
+    return "N/D" if rtt is None else f"{rtt}ms"
+
+
+def formatear_medicion(medicion):
+    """Texto con la pérdida y el RTT medidos, para alarmas y limpiezas."""
+    if medicion is None or medicion.perdida is None:
+        return "Perdidos=N/D, RTT=N/D"
+    return f"Perdidos={medicion.perdida}, RTT={texto_rtt(medicion.rtt)}"
+
+
+def procesar_mediciones(hostname, mediciones, estado, al_alarmar, al_limpiar,
+                        umbral_alarma=UMBRAL_ALARMA, umbral_limpieza=UMBRAL_LIMPIEZA,
+                        reservados=(DESTINO_HOST,), umbrales=None):
+    """Aplica las mediciones del ciclo al estado por destino y dispara eventos.
+
+    `mediciones` es {ip: Medicion}. Se llama al_alarmar(hostname, ip, medicion)
+    o al_limpiar(hostname, ip, medicion) cuando corresponde. `umbrales` puede
+    dar (umbral_alarma, umbral_limpieza) propios por ip. Los destinos que ya
+    no están en el ciclo (ni en `reservados`) se eliminan del estado.
+    """
+    umbrales = umbrales or {}
+    for ip, medicion in mediciones.items():
+        alarma, limpieza = umbrales.get(ip, (umbral_alarma, umbral_limpieza))
+        registro, evento = evaluar_destino(estado.obtener(hostname, ip), not medicion.ok, alarma, limpieza)
+        estado.actualizar(hostname, ip, registro)
+        if evento == ALARMA:
+            al_alarmar(hostname, ip, medicion)
+        elif evento == LIMPIEZA:
+            al_limpiar(hostname, ip, medicion)
+
+    for ip in estado.destinos(hostname):
+        if ip not in mediciones and ip not in reservados:
+            estado.eliminar(hostname, ip)
@@ -0,0 +1,110 @@
+"""Agregador de syslog: un resumen por ciclo y avisos con deduplicación y límite de tasa.
+
+Las alarmas y limpiezas nunca se limitan: el estado de histéresis ya registró
+la transición y no volverá a enviarla. La deduplicación vive en memoria, así
+que solo abarca varios ciclos dentro de un mismo proceso (modo demonio).
+"""
+import threading
+import time
+
+VENTANA_DEDUP = 300  # Segundos en los que un mensaje idéntico no se repite
+RAFAGA = 20  # Mensajes individuales que pueden enviarse de golpe
+TASA = 0.2  # Mensajes individuales por segundo que se reponen
+MAX_DETALLE = 10  # Destinos detallados en el resumen del ciclo
+
+
+class Bitacora:
+    """Acumula los eventos de un ciclo y los envía como un solo registro.
+
+    Las degradaciones y errores de cada destino se registran con registrar()
+    y salen en el resumen de cerrar_ciclo(). Los avisos individuales salen de
+    inmediato con emitir(), descartando repeticiones idénticas dentro de la
+    ventana y respetando un cubo de fichas (RAFAGA, TASA); con limitar=False
+    (alarmas y limpiezas) se envían siempre.
+    """
+
+    def __init__(self, enviar, severidad_info, severidad_aviso, ventana=VENTANA_DEDUP,
+                 rafaga=RAFAGA, tasa=TASA, reloj=time.monotonic):
+        self.enviar = enviar
+        self.severidad_info = severidad_info
+        self.severidad_aviso = severidad_aviso
+        self.ventana = ventana
+        self.rafaga = rafaga
+        self.tasa = tasa
+        self.reloj = reloj
+        self._lock = threading.Lock()
+        self._eventos = {}  # destino -> texto del evento del ciclo
+        self._enviados = {}  # mensaje -> instante del último envío
+        self._fichas = float(rafaga)
+        self._ultimo = reloj()
+        self._suprimidos = 0
+
+    def registrar(self, destino, texto):
+        """Anota el evento de un destino para el resumen del ciclo."""
+        with self._lock:
+            self._eventos[destino] = texto
+
+    def agregar(self, destino, texto):
+        """Agrega una nota al evento del destino sin reemplazar el que ya tenía."""
+        with self._lock:
+            previo = self._eventos.get(destino)
+            self._eventos[destino] = f"{previo}; {texto}" if previo else texto
+
+    def _permitir(self, mensaje, ahora):
+        # Deduplicación de mensajes idénticos dentro de la ventana
+        previo = self._enviados.get(mensaje)
+        if previo is not None and ahora - previo < self.ventana:
+            return False
+        # Cubo de fichas
+        self._fichas = min(self.rafaga, self._fichas + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+        if self._fichas < 1:
+            return False
+        self._fichas -= 1
+        self._enviados[mensaje] = ahora
+        return True
+
+    def emitir(self, severidad, mensaje, limitar=True):
+        """Envía un registro individual si no es repetido y hay cupo, o siempre si no se limita."""
+        if not limitar:
+            self.enviar(severidad, mensaje)
+            return True
+        with self._lock:
+            ahora = self.reloj()
+            for viejo in [m for m, t in self._enviados.items() if ahora - t >= self.ventana]:
+                del self._enviados[viejo]
+            permitido = self._permitir(mensaje, ahora)
+            if not permitido:
+                self._suprimidos += 1
+        if permitido:
+            self.enviar(severidad, mensaje)
+        return permitido
+
+    def cerrar_ciclo(self, hostname, mediciones, duracion=None, omitidos=0):
+        """Envía el resumen estructurado del ciclo y reinicia los eventos.
+
+        `omitidos` cuenta los destinos que el plazo del ciclo dejó sin medir.
+        """
+        with self._lock:
+            eventos, self._eventos = self._eventos, {}
+            suprimidos, self._suprimidos = self._suprimidos, 0
+
+        degradados = [ip for ip, m in mediciones.items() if not m.ok]
+        campos = [f"host={hostname}", f"destinos={len(mediciones)}",
+                  f"ok={len(mediciones) - len(degradados)}", f"degradados={len(degradados)}"]
+        if omitidos:
+            campos.append(f"omitidos={omitidos}")
+        if duracion is not None:
+            campos.append(f"duracion={duracion:.2f}s")
+        if suprimidos:
+            campos.append(f"suprimidos={suprimidos}")
+        detalle = [f"{ip}: {eventos[ip]}" for ip in degradados if ip in eventos]
+        if len(detalle) > MAX_DETALLE:
+            detalle = detalle[:MAX_DETALLE] + [f"+{len(detalle) - MAX_DETALLE} más"]
+        mensaje = "RESUMEN " + " ".join(campos)
+        if detalle:
+            mensaje += " | " + "; ".join(detalle)
+
+        severidad = self.severidad_aviso if degradados else self.severidad_info
+        self.enviar(severidad, mensaje)
+        return mensaje
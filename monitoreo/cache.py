@@ -0,0 +1,124 @@
+"""Caché de mediciones recientes con vencimiento, para corridas a demanda.
+
+Los operadores suelen ejecutar el script a mano (`op script`) durante un
+incidente. Dentro del TTL, esas corridas reutilizan la última medición de cada
+destino en lugar de repetir la ráfaga completa. Por omisión el TTL es una
+fracción del intervalo del ciclo: cubre casi todo el tiempo entre dos ciclos
+programados, pero vence antes del siguiente, que siempre mide. La caché vive junto al archivo
+de estado, se lee y escribe con el bloqueo del ciclo tomado y se reemplaza de
+forma atómica. Solo se guardan mediciones que llegaron a ejecutarse: un error
+del RPC siempre se reintenta.
+"""
+import json
+import os
+import time
+from array import array
+
+from monitoreo.estadisticas import EstadisticasPing, Medicion
+from monitoreo.estado import SEPARADOR, escribir_atomico
+
+SUFIJO_CACHE = ".cache"
+FRACCION_TTL = 0.8  # Vida de una medición como fracción del intervalo del ciclo
+
+# Claves de cada entrada
+KEY_INSTANTE = "t"
+KEY_PERDIDA = "perdida"
+KEY_RTT = "rtt"
+KEY_ENVIADOS = "enviados"
+KEY_RTTS = "rtts"
+KEY_RAFAGA = "rafaga"
+
+
+def ttl_ciclo(intervalo):
+    """TTL por omisión para un ciclo de `intervalo` segundos."""
+    return intervalo * FRACCION_TTL
+
+
+def perfil_sonda(sonda):
+    """Ráfaga de la sonda; el camino y el paquete ya van en `destino` y los umbrales se aplican al leer."""
+    return f"count={sonda.count}"
+
+
+def _a_dict(medicion, instante):
+    entrada = {KEY_INSTANTE: round(instante, 3), KEY_PERDIDA: medicion.perdida, KEY_RTT: medicion.rtt}
+    stats = medicion.stats
+    if stats is not None:
+        entrada.update({KEY_ENVIADOS: stats.enviados, KEY_RTTS: list(stats.rtts), KEY_RAFAGA: stats.rafaga_max})
+    return entrada
+
+
+def _de_dict(entrada):
+    stats = None
+    if KEY_RTTS in entrada:
+        stats = EstadisticasPing()
+        stats.enviados = entrada[KEY_ENVIADOS]
+        stats.rtts = array("d", entrada[KEY_RTTS])
+        stats.rafaga_max = entrada[KEY_RAFAGA]
+    return Medicion(None, entrada[KEY_PERDIDA], entrada[KEY_RTT], stats)
+
+
+class CacheResultados:
+    """Mediciones por (hostname, destino, perfil de la sonda) con su instante."""
+
+    def __init__(self, ruta, ttl):
+        self.ruta = ruta
+        self.ttl = ttl
+        self._entradas = {}
+        self._cambios = False
+
+    @staticmethod
+    def _clave(hostname, sonda):
+        return SEPARADOR.join((hostname, sonda.destino, perfil_sonda(sonda)))
+
+    def cargar(self):
+        """Lee la caché; si no existe o está dañada queda vacía."""
+        self._cambios = False
+        try:
+            with open(self.ruta) as archivo:
+                self._entradas = json.load(archivo)
+        except (OSError, ValueError):
+            self._entradas = {}
+        return self
+
+    def obtener(self, hostname, sonda, ahora=None):
+        """Devuelve (Medicion sin evaluar, edad en segundos) si hay una vigente; si no, None."""
+        entrada = self._entradas.get(self._clave(hostname, sonda))
+        if not entrada:
+            return None
+        edad = (time.time() if ahora is None else ahora) - entrada[KEY_INSTANTE]
+        if not 0 <= edad < self.ttl:
+            return None
+        return _de_dict(entrada), edad
+
+    def agregar(self, hostname, sonda, medicion, instante=None):
+        if medicion.perdida is None:
+            return  # El ping no se ejecutó: no hay nada que reutilizar
+        instante = time.time() if instante is None else instante
+        self._entradas[self._clave(hostname, sonda)] = _a_dict(medicion, instante)
+        self._cambios = True
+
+    def invalidar(self, hostname=None, destino=None):
+        """Descarta las entradas del host y/o destino indicados; sin argumentos, todas."""
+        for clave in list(self._entradas):
+            host, ip, _ = clave.split(SEPARADOR, 2)
+            if (hostname is None or host == hostname) and (destino is None or ip == destino):
+                del self._entradas[clave]
+                self._cambios = True
+
+    def guardar(self, ahora=None):
+        """Escribe la caché sin las entradas vencidas, solo si cambió."""
+        if not self._cambios:
+            return
+        ahora = time.time() if ahora is None else ahora
+        vigentes = {k: e for k, e in self._entradas.items() if ahora - e[KEY_INSTANTE] < self.ttl}
+        escribir_atomico(self.ruta, json.dumps(vigentes, separators=(",", ":")).encode())
+        self._entradas = vigentes
+        self._cambios = False
+
+
+def borrar_cache(ruta):
+    """Invalida toda la caché borrando su archivo."""
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
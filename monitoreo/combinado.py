@@ -0,0 +1,270 @@
+"""Plan combinado de todos los perfiles de monitoreo de un equipo.
+
+Cuando en un mismo equipo corren varios perfiles (por ejemplo destinos y
+trayectorias), cada sonda única se ejecuta una sola vez por ciclo y su
+resultado se reparte a todos los perfiles que la piden. Cada perfil conserva
+su inventario, estado, historial, umbrales, alarmas y resumen de syslog.
+
+La sonda compartida usa la ráfaga más larga y los umbrales más estrictos de
+sus consumidores para decidir si confirma con la ráfaga completa; luego cada
+perfil evalúa la medición con sus propios umbrales.
+"""
+import time
+from collections import defaultdict
+
+from monitoreo.alarmas import destino_degradado, requiere_confirmacion
+from monitoreo.demonio import argumentos, ejecutar_periodicamente
+from monitoreo.inventario import ObservadorInventario
+from monitoreo.metricas import Cronometro
+from monitoreo.nucleo import detalle_medicion, evaluar_medicion
+from monitoreo.planificador import GRACIA_PLAZO, Vigilante, registrar_omision
+
+
+def clave_sonda(sonda):
+    """Identidad de una sonda en el plan combinado: misma IP, mismo camino y mismo paquete."""
+    return sonda.destino
+
+
+def fusionar(sondas):
+    """Sonda compartida: la ráfaga más larga y los umbrales más estrictos de sus consumidores."""
+    return sondas[0]._replace(count=max(s.count for s in sondas),
+                              rtt_umbral=min(s.rtt_umbral for s in sondas),
+                              max_perdidos=min(s.max_perdidos for s in sondas))
+
+
+class Perfil:
+    """Un perfil de monitoreo dentro del ciclo combinado."""
+
+    __slots__ = ("monitor", "hostname", "config", "estado", "sondas", "en_espera", "cacheadas", "mediciones",
+                 "confirmados", "omitidas")
+
+    def __init__(self, monitor, hostname, config, estado):
+        self.monitor = monitor
+        self.hostname = hostname
+        self.config = config
+        self.estado = estado
+        self.sondas = {}
+        self.en_espera = []
+        self.cacheadas = {}
+        self.mediciones = {}
+        self.confirmados = {}
+        self.omitidas = []
+
+
+class MonitorCombinado:
+    """Ejecuta los Monitor de varios perfiles con un solo plan de sondas y un solo pool.
+
+    El primer monitor aporta el motor, el pool de sesiones y los plazos.
+    """
+
+    def __init__(self, monitores):
+        if not monitores:
+            raise ValueError("Se requiere al menos un perfil de monitoreo")
+        self.monitores = list(monitores)
+        self.principal = self.monitores[0]
+
+    def _con_crono(self):
+        # Un solo cronómetro: las fases compartidas se miden una vez
+        crono = Cronometro()
+        for monitor in self.monitores:
+            monitor.crono = crono
+
+    def adquirir_bloqueos(self):
+        """Toma el bloqueo de cada perfil (en orden fijo); si falta uno, libera los demás."""
+        bloqueos = []
+        for monitor in sorted(self.monitores, key=lambda m: m.ruta_bloqueo):
+            bloqueo = monitor.adquirir_bloqueo()
+            if bloqueo is None:
+                for tomado in bloqueos:
+                    tomado.liberar()
+                # Los perfiles ya bloqueados también pierden este ciclo
+                for otro in self.monitores:
+                    if otro is not monitor:
+                        registrar_omision(otro.ruta_bloqueo)
+                return None
+            bloqueos.append(bloqueo)
+        return bloqueos
+
+    def cargar_perfiles(self, pool, monitores=None):
+        """Hostname, configuración y estado de cada perfil (de `monitores`) con inventario para este host."""
+        perfiles = []
+        for monitor in self.monitores if monitores is None else monitores:
+            hostname = monitor.obtener_hostname(pool)
+            config = monitor.cargar_config(hostname) if hostname else {}
+            if config:
+                perfiles.append(Perfil(monitor, hostname, config, monitor.cargar_estado()))
+        return perfiles
+
+    def ejecutar_ciclo(self, pool, perfiles):
+        """Ejecuta el plan combinado y cierra el ciclo de cada perfil. Devuelve la duración."""
+        inicio = time.time()
+        nombre, motor = self.principal.motor_de(perfiles[0].config)
+
+        consumidores = defaultdict(list)  # clave -> [(perfil, sonda)]
+        for perfil in perfiles:
+            perfil.sondas, perfil.en_espera = perfil.monitor.preparar_sondas(
+                perfil.hostname, perfil.config, perfil.estado, inicio)
+            # Lo vigente en la caché de cada perfil no se vuelve a medir
+            perfil.cacheadas = perfil.monitor.desde_cache(perfil.hostname, perfil.sondas, inicio)
+            perfil.mediciones = dict(perfil.cacheadas)
+            perfil.confirmados = {}
+            perfil.omitidas = []
+            for sonda in perfil.sondas.values():
+                if sonda.destino not in perfil.cacheadas:
+                    consumidores[clave_sonda(sonda)].append((perfil, sonda))
+
+        notas = defaultdict(list)
+        notas_confirmacion = defaultdict(list)
+        fusionadas = {clave: fusionar([s for _, s in lista]) for clave, lista in consumidores.items()}
+        # Reintentos de confirmación de las sondas compartidas que fallan para algún
+        # perfil; arrancan en cuanto la sonda falla
+        confirmaciones = self.principal.confirmaciones_ciclo(
+            pool, fusionadas, perfiles[0].config, inicio,
+            registrar=lambda clave, texto: notas_confirmacion[clave].append(texto))
+
+        def confirmar_si_falla(clave, compartida):
+            if any(not evaluar_medicion(compartida, s).ok
+                   and requiere_confirmacion(p.estado.obtener(p.hostname, s.destino), s.max_eventos)
+                   for p, s in consumidores[clave]):
+                confirmaciones.lanzar(clave)
+
+        def medir(clave):
+            lista = consumidores[clave]
+            degradado = any(destino_degradado(p.estado.obtener(p.hostname, s.destino)) for p, s in lista)
+            medicion = self.principal.hacer_ping(pool, fusionadas[clave], degradado,
+                                                 registrar=lambda ip, texto: notas[clave].append(texto))
+            confirmar_si_falla(clave, medicion)
+            return medicion
+
+        claves = list(consumidores)
+        plazo = self.principal.plazo_destino(fusionadas.values())
+        compartidas = self.principal.ejecutar_motor(
+            motor, nombre, pool, claves, medir,
+            registrar=lambda clave, texto: notas[clave].append(texto),
+            retrasos=self.principal.retrasos(perfiles[0].hostname, perfiles[0].config, claves, plazo),
+            plazo_destino=plazo)
+        for clave, compartida in compartidas.items():
+            confirmar_si_falla(clave, compartida)
+
+        # Repartir cada medición a sus perfiles, evaluada con los umbrales de cada uno;
+        # la sonda que el plazo del ciclo dejó sin medir queda omitida en todos
+        for clave, lista in consumidores.items():
+            for perfil, sonda in lista:
+                if clave not in compartidas:
+                    perfil.omitidas.append(sonda.destino)
+                    continue
+                medicion = evaluar_medicion(compartidas[clave], sonda)
+                perfil.mediciones[sonda.destino] = medicion
+                if not medicion.ok:
+                    texto = "; ".join(notas[clave]) if notas[clave] else detalle_medicion(medicion)
+                    perfil.monitor.bitacora.registrar(sonda.destino, texto)
+
+        # La sonda confirmada alarma en los perfiles para los que falló; las notas de
+        # los reintentos se agregan a su detalle
+        confirmadas = confirmaciones.resultados()
+        for clave, textos in notas_confirmacion.items():
+            for perfil, sonda in consumidores[clave]:
+                if clave in compartidas and not perfil.mediciones[sonda.destino].ok:
+                    perfil.monitor.bitacora.agregar(sonda.destino, "; ".join(textos))
+                    if clave in confirmadas:
+                        perfil.confirmados[sonda.destino] = confirmadas[clave]
+
+        pedidas = sum(len(p.sondas) for p in perfiles)
+        for perfil in perfiles:
+            duracion = perfil.monitor.cerrar_mediciones(perfil.hostname, perfil.estado, perfil.sondas,
+                                                        perfil.en_espera, perfil.mediciones, inicio,
+                                                        perfil.cacheadas, perfil.confirmados, perfil.omitidas)
+            perfil.monitor.registrar_metricas(perfil.hostname, nombre, perfil.mediciones, duracion,
+                                              sondas_combinadas=len(consumidores), sondas_pedidas=pedidas)
+        return time.time() - inicio
+
+    def main(self):
+        """Una corrida combinada. Devuelve su duración o None si no se ejecutó."""
+        bloqueos = self.adquirir_bloqueos()
+        if bloqueos is None:
+            return None
+        self._con_crono()
+        try:
+            with Vigilante(self.principal.plazo_ciclo + GRACIA_PLAZO, self.principal._plazo_vencido), \
+                    self.principal.nuevo_pool() as pool:
+                perfiles = self.cargar_perfiles(pool)
+                if not perfiles:
+                    return None
+                return self.ejecutar_ciclo(pool, perfiles)
+        finally:
+            for bloqueo in bloqueos:
+                bloqueo.liberar()
+
+    def ciclo_demonio(self, pool, cache):
+        """Un ciclo del modo residente con los perfiles de `cache`.
+
+        Los perfiles que no se pudieron cargar se reintentan en cada ciclo, y el
+        estado de cada uno se vuelve a leer bajo los bloqueos: las corridas de
+        los scripts que comparten sus archivos pudieron escribirlo.
+        """
+        self._con_crono()
+        perfiles = cache.setdefault("perfiles", [])
+        cargados = {perfil.monitor for perfil in perfiles}
+        faltantes = [monitor for monitor in self.monitores if monitor not in cargados]
+        if faltantes:
+            perfiles.extend(self.cargar_perfiles(pool, faltantes))
+            # El orden de los monitores decide el perfil principal del plan
+            perfiles.sort(key=lambda perfil: self.monitores.index(perfil.monitor))
+        if not perfiles:
+            return None  # Se reintenta en el siguiente ciclo
+        bloqueos = self.adquirir_bloqueos()
+        if bloqueos is None:
+            return None
+        try:
+            for perfil in perfiles:
+                perfil.estado = perfil.monitor.cargar_estado()
+                # Cada perfil recarga solo si cambió su inventario
+                perfil.config = perfil.monitor.config_vigente(perfil.hostname, perfil.config, perfil.estado)
+            return self.ejecutar_ciclo(pool, perfiles)
+        finally:
+            for bloqueo in bloqueos:
+                bloqueo.liberar()
+
+    def demonio(self, intervalo):
+        """Modo residente: pool abierto y perfiles cacheados entre ciclos."""
+        pool = self.principal.nuevo_pool()
+        cache = {}
+        for monitor in self.monitores:
+            monitor.observador = ObservadorInventario(monitor.yaml_file)
+
+        def ciclo():
+            self.ciclo_demonio(pool, cache)
+
+        def al_omitir(n):
+            for monitor in self.monitores:
+                registrar_omision(monitor.ruta_bloqueo, n)
+
+        try:
+            # Un solo endpoint con los registros de todos los perfiles
+            with self.principal.servidor_metricas([m.registro for m in self.monitores]):
+                ejecutar_periodicamente(
+                    ciclo, intervalo,
+                    al_error=lambda e: self.principal.log_crit(f"Error en el ciclo combinado: {str(e)}"),
+                    politica=self.principal.politica, al_omitir=al_omitir)
+        finally:
+            pool.cerrar()
+
+    def ejecutar(self, argv=None):
+        """Punto de entrada: una corrida o modo demonio según los argumentos."""
+        args = argumentos(argv)
+        for monitor in self.monitores:
+            monitor.motor_forzado = args.motor
+            monitor.puerto_metricas = args.puerto_metricas
+            monitor.fresco = args.fresco
+            if args.invalidar:
+                monitor.invalidar_cache()
+            if args.politica:
+                monitor.politica = args.politica
+            if args.demonio:
+                monitor.intervalo = args.intervalo
+        if args.invalidar:
+            return None
+        if args.demonio:
+            self.demonio(args.intervalo)
+            return None
+        return self.main()
@@ -0,0 +1,86 @@
+"""Confirmación rápida de las fallas dentro del ciclo.
+
+La confirmación de un destino arranca en cuanto falla, en un hilo propio, sin
+esperar a que termine la ráfaga escalonada del resto: cada ronda espera el
+intervalo y repite un sondeo corto. Los hilos solo duermen o esperan una
+sesión del pool, así que no ocupan lugar en el motor del ciclo.
+
+Las confirmaciones simultáneas de un ciclo tienen tope: ante una caída
+masiva, las fallas que exceden el tope no se confirman y siguen el camino
+normal de varios ciclos, sin acaparar las sesiones que necesita la ráfaga.
+"""
+import threading
+import time
+
+MAX_CONFIRMACIONES = 8  # Confirmaciones simultáneas como máximo, con cualquier pool
+
+
+class Confirmaciones:
+    """Reintentos de confirmación de las claves que fallan durante un ciclo.
+
+    `medir(clave)` ejecuta el sondeo corto y devuelve su Medicion;
+    `registrar(clave, texto)` agrega notas al resumen del ciclo. Ninguna ronda
+    arranca si no alcanza a terminar (`plazo_ronda`) antes de `limite`. A lo
+    sumo `maximo` confirmaciones corren a la vez.
+    """
+
+    def __init__(self, rondas, intervalo, medir, limite, plazo_ronda, registrar, maximo=MAX_CONFIRMACIONES):
+        self.rondas = rondas
+        self.intervalo = intervalo
+        self.medir = medir
+        self.limite = limite  # Instante (time.time) en que vence el plazo del ciclo
+        self.plazo_ronda = plazo_ronda
+        self.registrar = registrar
+        self.maximo = maximo
+        self._hilos = {}  # clave -> hilo de su confirmación
+        self._confirmadas = {}  # clave -> reintentos fallidos
+        self._lock = threading.Lock()
+        self._cerrado = threading.Event()
+
+    def lanzar(self, clave):
+        """Arranca la confirmación de `clave` si no está en curso; sin rondas no hace nada.
+
+        Devuelve False si la clave quedó fuera por el tope de confirmaciones.
+        """
+        if self.rondas <= 0:
+            return False
+        with self._lock:
+            if clave in self._hilos or self._cerrado.is_set():
+                return True
+            if sum(1 for hilo in self._hilos.values() if hilo.is_alive()) >= self.maximo:
+                return False
+            hilo = threading.Thread(target=self._confirmar, args=(clave,), daemon=True)
+            self._hilos[clave] = hilo
+            hilo.start()
+        return True
+
+    def _anotar(self, clave, texto, confirmada=False):
+        # Nada de lo que llegue después del cierre se mezcla con el ciclo siguiente
+        with self._lock:
+            if self._cerrado.is_set():
+                return
+            if confirmada:
+                self._confirmadas[clave] = self.rondas
+            self.registrar(clave, texto)
+
+    def _confirmar(self, clave):
+        for _ in range(self.rondas):
+            # Si la ronda no alcanza a terminar dentro del plazo, la falla queda sin confirmar
+            if time.time() + self.intervalo + self.plazo_ronda > self.limite:
+                return
+            if self._cerrado.wait(self.intervalo):
+                return
+            try:
+                if self.medir(clave).ok:
+                    return
+            except Exception as e:
+                self._anotar(clave, f"Error: {str(e)}")
+        self._anotar(clave, f"Falla confirmada con {self.rondas} reintentos", confirmada=True)
+
+    def resultados(self):
+        """Espera las confirmaciones en curso hasta el plazo del ciclo y devuelve {clave: reintentos}."""
+        for hilo in list(self._hilos.values()):
+            hilo.join(max(0, self.limite - time.time()))
+        with self._lock:
+            self._cerrado.set()
+            return dict(self._confirmadas)
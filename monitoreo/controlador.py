@@ -0,0 +1,293 @@
+"""Controlador fuera del equipo: monitorea muchos routers desde un solo proceso.
+
+Para equipos que no pueden ejecutar Python en la caja, o para pruebas
+centralizadas, el controlador lee el inventario completo y abre por cada host
+un pool de sesiones NETCONF (`Device(host=...)`) que se conserva entre rondas.
+Cada host se mide con su propio Monitor (mismo plan, estado, alarmas,
+historial y resumen que en la caja), y los ciclos de varios equipos se
+solapan para que una flota grande quepa en el intervalo.
+
+La concurrencia se acota en tres niveles:
+- equipos en curso a la vez (`max_equipos`);
+- sesiones, y por lo tanto pings en vuelo, por equipo (`sesiones_por_equipo`);
+- sesiones en uso en toda la flota (`max_pings`), lo que también acota las
+  aperturas NETCONF simultáneas.
+
+El escalonado es de la flota y no de cada equipo: los inicios de los ciclos de
+los equipos se reparten en la ventana `escalonar`, y cada equipo lanza sus
+pings juntos. Un escalonado por equipo retendría su lugar en `max_equipos`
+durante toda la ventana.
+"""
+import os
+import syslog
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from urllib.parse import quote
+
+from monitoreo.demonio import INTERVALO_CICLO, argumentos, ejecutar_periodicamente
+from monitoreo.exportador import ServidorMetricas, escribir_openmetrics
+from monitoreo.inventario import InventarioInvalido, ObservadorInventario, cargar_inventario, config_valida
+from monitoreo.metricas import APERTURA, Cronometro
+from monitoreo.motor_async import fuera_de_plazo
+from monitoreo.nucleo import Monitor
+from monitoreo.planificador import escalonar
+from monitoreo.sesiones import TAMANO_POOL, PoolSesiones, SesionNoDisponible
+
+KEY_DIRECCION = "direccion"  # Dirección de gestión del host; por omisión, el hostname
+
+MAX_EQUIPOS = 64  # Equipos con un ciclo en curso a la vez
+MAX_PINGS = 256  # Sesiones en uso a la vez en toda la flota
+
+# Severidad de Junos (facility.nivel) -> prioridad del syslog local
+PRIORIDADES = {"emerg": syslog.LOG_EMERG, "alert": syslog.LOG_ALERT, "crit": syslog.LOG_CRIT,
+               "critical": syslog.LOG_CRIT, "err": syslog.LOG_ERR, "error": syslog.LOG_ERR,
+               "warn": syslog.LOG_WARNING, "warning": syslog.LOG_WARNING, "notice": syslog.LOG_NOTICE,
+               "info": syslog.LOG_INFO, "debug": syslog.LOG_DEBUG}
+
+
+def syslog_local(severidad, mensaje):
+    """Equivalente a jcs.syslog fuera del equipo: envía al syslog de la máquina del controlador."""
+    nivel = severidad.rsplit(".", 1)[-1]
+    syslog.syslog(PRIORIDADES.get(nivel, syslog.LOG_INFO), mensaje)
+
+
+class PoolAcotado(PoolSesiones):
+    """Pool de un equipo que además toma un lugar del cupo global mientras usa o abre una sesión.
+
+    La sesión del equipo se obtiene antes que el lugar del cupo: un equipo
+    atascado hace esperar solo a sus propios pings, sin retener lugares que
+    necesita el resto de la flota.
+    """
+
+    def __init__(self, fabrica, tamano, cupo, **opciones):
+        super().__init__(fabrica, tamano, **opciones)
+        self.cupo = cupo
+
+    def _tomar_cupo(self, espera):
+        if not self.cupo.acquire(timeout=max(0, espera)):
+            raise SesionNoDisponible(f"Sin cupo global de sesiones tras {espera:g} segundos")
+
+    def _abrir(self):
+        # Las aperturas NETCONF también cuentan en el cupo mientras duran
+        self._tomar_cupo(self.espera)
+        try:
+            return super()._abrir()
+        finally:
+            self.cupo.release()
+
+    @contextmanager
+    def sesion(self, espera=None):
+        espera = self.espera if espera is None else espera
+        limite = time.monotonic() + espera
+        with super().sesion(espera) as dev:
+            with fuera_de_plazo():
+                self._tomar_cupo(limite - time.monotonic())
+            try:
+                yield dev
+            finally:
+                self.cupo.release()
+
+
+class Equipo:
+    """Un router de la flota: su Monitor, su pool de sesiones y su estado entre rondas."""
+
+    __slots__ = ("hostname", "direccion", "monitor", "pool", "config", "estado")
+
+    def __init__(self, hostname, direccion, monitor, pool):
+        self.hostname = hostname
+        self.direccion = direccion
+        self.monitor = monitor
+        self.pool = pool
+        self.config = None
+        self.estado = None
+
+
+class ControladorFlota:
+    """Ejecuta los ciclos de todos los hosts del inventario con sesiones remotas.
+
+    `fabrica(host=...)` crea la sesión con cada equipo (jnpr.junos.Device con
+    sus credenciales). Los archivos de estado van en `directorio`, uno por
+    host, y los historiales en su subdirectorio `historial`. `escalonar`
+    reparte los inicios de los equipos en esa ventana de segundos. `opciones`
+    se pasa a cada Monitor (motor, umbrales, confirmaciones...).
+    """
+
+    def __init__(self, fabrica, syslog, yaml_file, directorio, count, max_equipos=MAX_EQUIPOS,
+                 sesiones_por_equipo=TAMANO_POOL, max_pings=MAX_PINGS, metrics_file=None,
+                 openmetrics_file=None, escalonar=0, **opciones):
+        self.fabrica = fabrica
+        self.syslog = syslog
+        self.yaml_file = yaml_file
+        self.directorio = directorio
+        self.count = count
+        self.max_equipos = max_equipos
+        self.sesiones_por_equipo = sesiones_por_equipo
+        self.cupo = threading.BoundedSemaphore(max_pings)
+        self.metrics_file = metrics_file
+        self.openmetrics_file = openmetrics_file
+        self.escalonar = escalonar
+        self.opciones = opciones
+        self.motor_forzado = None
+        self.puerto_metricas = None
+        self.equipos = {}  # hostname -> Equipo
+        self.observador = None  # Se crea al leer bien el inventario; sin él, la ronda lo vuelve a leer
+
+    def log_crit(self, mensaje):
+        self.syslog(self.opciones.get("severidad_critica", "external.critical"), mensaje)
+
+    def nuevo_equipo(self, hostname, direccion):
+        """Monitor y pool de un host; el estado va en un archivo propio para no competir por el bloqueo."""
+        archivo = quote(hostname, safe="")
+        monitor = Monitor(lambda: self.fabrica(host=direccion), self.syslog, self.yaml_file,
+                          os.path.join(self.directorio, f"estado_{archivo}.json"),
+                          os.path.join(self.directorio, "historial"), self.count,
+                          obtener_hostname=lambda: hostname, tamano_pool=self.sesiones_por_equipo,
+                          metrics_file=self.metrics_file, ttl_cache=0, **self.opciones)
+        monitor.motor_forzado = self.motor_forzado
+        pool = PoolAcotado(monitor.fabrica, self.sesiones_por_equipo, self.cupo,
+                           al_abrir=lambda segundos: monitor.crono.sumar(APERTURA, segundos))
+        return Equipo(hostname, direccion, monitor, pool)
+
+    def cargar_equipos(self):
+        """Sincroniza los equipos con el inventario si cambió: conserva los pools de los que siguen.
+
+        Los equipos cuyo plan cambió aplican solo las diferencias a su estado.
+        Un host con una entrada inválida sigue con su plan vigente, o se omite
+        si es nuevo, sin afectar al resto de la flota.
+        """
+        if self.observador is not None and not self.observador.cambio():
+            return self.equipos
+        # La firma se toma antes de leer: un cambio durante la lectura se ve en la ronda siguiente
+        observador = ObservadorInventario(self.yaml_file)
+        try:
+            inventario = cargar_inventario(self.yaml_file)
+        except Exception as e:
+            self.log_crit(f"Error al leer el inventario {self.yaml_file}: {e}")
+            self.observador = None  # Se reintenta en la ronda siguiente
+            return self.equipos
+        self.observador = observador
+        equipos = {}
+        for hostname, config in inventario.items():
+            try:
+                config_valida(config)
+            except InventarioInvalido as e:
+                self.log_crit(f"Inventario inválido para {hostname}: {e}")
+                if hostname in self.equipos:
+                    equipos[hostname] = self.equipos.pop(hostname)
+                continue
+            direccion = config.get(KEY_DIRECCION) or hostname
+            equipo = self.equipos.pop(hostname, None)
+            if equipo is None or equipo.direccion != direccion:
+                if equipo is not None:
+                    equipo.pool.cerrar()
+                equipo = self.nuevo_equipo(hostname, direccion)
+            elif equipo.estado is not None:
+                equipo.monitor.aplicar_cambios(hostname, equipo.config, config, equipo.estado)
+            equipo.config = config
+            equipos[hostname] = equipo
+        # Hosts retirados del inventario
+        for equipo in self.equipos.values():
+            equipo.pool.cerrar()
+        self.equipos = equipos
+        return equipos
+
+    def ciclo_equipo(self, equipo):
+        """Un ciclo de un host; devuelve su duración o None si no se pudo ejecutar."""
+        monitor = equipo.monitor
+        monitor.crono = Cronometro()
+        if not equipo.config:
+            return None
+        # Un equipo inalcanzable no debe contar como falla de cada uno de sus destinos
+        try:
+            with equipo.pool.sesion():
+                pass
+        except Exception as e:
+            monitor.log_crit(f"Sin sesión con {equipo.hostname} ({equipo.direccion}): {e}")
+            return None
+        bloqueo = monitor.adquirir_bloqueo()
+        if bloqueo is None:
+            return None
+        try:
+            if equipo.estado is None:
+                equipo.estado = monitor.cargar_estado()
+            return monitor.ejecutar_ciclo(equipo.pool, equipo.hostname, equipo.config, equipo.estado)
+        finally:
+            bloqueo.liberar()
+
+    def ciclo(self):
+        """Una ronda sobre toda la flota con los ciclos de los equipos solapados."""
+        inicio = time.time()
+        equipos = list(self.cargar_equipos().values())
+
+        def ejecutar(equipo):
+            try:
+                return self.ciclo_equipo(equipo)
+            except Exception as e:
+                equipo.monitor.log_crit(f"Error en el ciclo de {equipo.hostname}: {e}")
+                return None
+
+        # Cada equipo entra a la cola en su turno; la espera no ocupa un lugar del ejecutor
+        turnos = escalonar([e.hostname for e in equipos], self.escalonar) if self.escalonar else {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_equipos, len(equipos)))) as ejecutor:
+            futuros = []
+            for equipo in sorted(equipos, key=lambda e: turnos.get(e.hostname, 0)):
+                espera = inicio + turnos.get(equipo.hostname, 0) - time.time()
+                if espera > 0:
+                    time.sleep(espera)
+                futuros.append(ejecutor.submit(ejecutar, equipo))
+            duraciones = [futuro.result() for futuro in futuros]
+
+        if self.openmetrics_file:
+            try:
+                escribir_openmetrics(self.openmetrics_file, self.registros())
+            except Exception as e:
+                self.log_crit(f"Error al escribir {self.openmetrics_file}: {e}")
+        completos = [d for d in duraciones if d is not None]
+        duracion = time.time() - inicio
+        self.syslog(self.opciones.get("severidad_info", "external.info"),
+                    f"RONDA equipos={len(equipos)} completos={len(completos)} "
+                    f"sin_ciclo={len(equipos) - len(completos)} duracion={duracion:.2f}s")
+        return duracion
+
+    def registros(self):
+        return [equipo.monitor.registro for equipo in self.equipos.values()]
+
+    def cerrar(self):
+        for equipo in self.equipos.values():
+            equipo.pool.cerrar()
+
+    def main(self):
+        """Una ronda sobre la flota y cierre de todas las sesiones."""
+        try:
+            return self.ciclo()
+        finally:
+            self.cerrar()
+
+    def demonio(self, intervalo=INTERVALO_CICLO, politica=None):
+        """Rondas con cadencia fija; las sesiones de cada equipo quedan abiertas entre rondas."""
+        opciones = {"politica": politica} if politica else {}
+        try:
+            # Los registros se leen en cada petición: incluyen los equipos agregados después
+            with self.servidor_metricas():
+                ejecutar_periodicamente(self.ciclo, intervalo,
+                                        al_error=lambda e: self.log_crit(f"Error en la ronda de la flota: {e}"),
+                                        **opciones)
+        finally:
+            self.cerrar()
+
+    def servidor_metricas(self):
+        """Endpoint HTTP con los registros de todos los equipos si se pidió un puerto."""
+        if not self.puerto_metricas:
+            return nullcontext()
+        return ServidorMetricas(self.puerto_metricas, self.registros)
+
+    def ejecutar(self, argv=None):
+        """Punto de entrada: una ronda o modo demonio según los argumentos comunes."""
+        args = argumentos(argv)
+        self.motor_forzado = args.motor
+        self.puerto_metricas = args.puerto_metricas
+        if args.demonio:
+            return self.demonio(args.intervalo, args.politica)
+        return self.main()
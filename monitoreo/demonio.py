@@ -0,0 +1,70 @@
+"""Modo demonio: sesión persistente con el equipo y ciclos con cadencia fija."""
+import argparse
+import time
+
+from monitoreo.motores import MOTORES
+from monitoreo.planificador import ENCOLAR, OMITIR, POLITICAS
+
+INTERVALO_CICLO = 300  # Segundos entre ciclos (5 minutos)
+
+
+def argumentos(argv=None):
+    """Interpreta los argumentos de línea de comandos comunes a los scripts."""
+    parser = argparse.ArgumentParser(description="Monitoreo Telcel On-Box-Junos")
+    # Junos entrega los argumentos de los scripts con un solo guion
+    parser.add_argument("--demonio", "-demonio", action="store_true",
+                        help="Ejecuta ciclos continuos en lugar de una sola corrida")
+    parser.add_argument("--intervalo", "-intervalo", type=float, default=INTERVALO_CICLO,
+                        help="Segundos entre ciclos en modo demonio")
+    parser.add_argument("--motor", "-motor", choices=sorted(MOTORES),
+                        help="Motor de ejecución; prevalece sobre el del inventario")
+    parser.add_argument("--politica", "-politica", choices=POLITICAS,
+                        help="Qué hacer si el ciclo anterior sigue en curso: omitir o encolar")
+    parser.add_argument("--fresco", "-fresco", action="store_true",
+                        help="Mide todos los destinos aunque haya resultados vigentes en la caché")
+    parser.add_argument("--invalidar", "-invalidar", action="store_true",
+                        help="Borra la caché de resultados y termina")
+    parser.add_argument("--puerto-metricas", "-puerto-metricas", type=int,
+                        help="En modo demonio, sirve las métricas OpenMetrics en http://127.0.0.1:<puerto>/metrics")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def ejecutar_periodicamente(ciclo, intervalo=INTERVALO_CICLO, max_ciclos=None,
+                            al_error=None, reloj=time.monotonic, dormir=time.sleep,
+                            politica=OMITIR, al_omitir=None):
+    """Ejecuta ciclo() cada `intervalo` segundos corrigiendo la deriva.
+
+    Los instantes de arranque se calculan desde el inicio (inicio + n * intervalo),
+    por lo que la duración de cada ciclo no se acumula. Si un ciclo se excede del
+    intervalo, las ranuras perdidas se omiten; con la política ENCOLAR la primera
+    de ellas se ejecuta de inmediato. Se llama al_omitir(n) con las ranuras
+    omitidas en cada desborde. Devuelve el número total de ranuras omitidas.
+    """
+    inicio = reloj()
+    ranura = 0
+    ejecutados = 0
+    omitidos = 0
+    while max_ciclos is None or ejecutados < max_ciclos:
+        espera = inicio + ranura * intervalo - reloj()
+        if espera > 0:
+            dormir(espera)
+
+        try:
+            ciclo()
+        except Exception as e:
+            if al_error is None:
+                raise
+            al_error(e)
+        ejecutados += 1
+
+        # Siguiente ranura alineada al instante de inicio
+        siguiente = int((reloj() - inicio) // intervalo) + 1
+        if politica == ENCOLAR and siguiente > ranura + 1:
+            siguiente -= 1  # La ranura ya vencida se ejecuta sin esperar
+        perdidas = max(0, siguiente - ranura - 1)
+        if perdidas and al_omitir is not None:
+            al_omitir(perdidas)
+        omitidos += perdidas
+        ranura = max(siguiente, ranura + 1)
+    return omitidos
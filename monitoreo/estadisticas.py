@@ -0,0 +1,185 @@
+"""Estadísticas por sonda a partir de la respuesta del RPC ping de Junos.
+
+Junos reporta el RTT de cada `probe-result` en microsegundos; aquí todos los
+tiempos se guardan y devuelven en milisegundos.
+
+Las búsquedas usan solo etiquetas simples sobre el elemento padre (el resumen
+se ubica una vez): lxml y ElementTree las resuelven por su camino rápido, sin
+interpretar una ruta en cada llamada.
+"""
+from array import array
+from collections import namedtuple
+
+TAG_PROBE = "probe-result"
+TAG_RESUMEN = "probe-results-summary"
+
+
+# Resultado de un ping a un destino: `ok` indica si cumplió los criterios,
+# `perdida` y `rtt` (ms) son None si el ping no pudo ejecutarse.
+Medicion = namedtuple("Medicion", "ok perdida rtt stats")
+MEDICION_FALLIDA = Medicion(False, None, None, None)
+
+
+def _percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una secuencia ya ordenada."""
+    if not ordenados:
+        return 0.0
+    rango = max(1, -(-len(ordenados) * p // 100))  # techo sin usar float
+    return ordenados[int(rango) - 1]
+
+
+class EstadisticasPing:
+    """Estadísticas compactas de un ping: RTT en un array de floats y contadores."""
+
+    __slots__ = ("enviados", "rtts", "rafaga_max", "_ordenados")
+
+    def __init__(self):
+        self.enviados = 0
+        self.rtts = array("d")  # RTT de cada respuesta recibida, en ms
+        self.rafaga_max = 0  # Mayor número de sondas perdidas consecutivas
+        self._ordenados = None
+
+    @property
+    def recibidos(self):
+        return len(self.rtts)
+
+    @property
+    def perdida(self):
+        return max(0, self.enviados - self.recibidos)
+
+    def _orden(self):
+        if self._ordenados is None:
+            self._ordenados = array("d", sorted(self.rtts))
+        return self._ordenados
+
+    @property
+    def minimo(self):
+        return self._orden()[0] if self.rtts else 0.0
+
+    @property
+    def maximo(self):
+        return self._orden()[-1] if self.rtts else 0.0
+
+    @property
+    def promedio(self):
+        return sum(self.rtts) / len(self.rtts) if self.rtts else 0.0
+
+    @property
+    def desviacion(self):
+        if len(self.rtts) < 2:
+            return 0.0
+        media = self.promedio
+        return (sum((r - media) ** 2 for r in self.rtts) / len(self.rtts)) ** 0.5
+
+    @property
+    def jitter(self):
+        """Promedio de la variación absoluta entre respuestas consecutivas."""
+        if len(self.rtts) < 2:
+            return 0.0
+        rtts = self.rtts
+        return sum(abs(rtts[i] - rtts[i - 1]) for i in range(1, len(rtts))) / (len(rtts) - 1)
+
+    def percentil(self, p):
+        return _percentil(self._orden(), p)
+
+    @property
+    def p50(self):
+        return self.percentil(50)
+
+    @property
+    def p95(self):
+        return self.percentil(95)
+
+    @property
+    def p99(self):
+        return self.percentil(99)
+
+    def resumen(self):
+        """Texto compacto para incluir en los mensajes de syslog; sin respuestas, los RTT son N/D."""
+        if not self.rtts:
+            return f"min=N/D max=N/D p50=N/D p95=N/D p99=N/D jitter=N/D rafaga={self.rafaga_max}"
+        return (f"min={self.minimo:.1f} max={self.maximo:.1f} p50={self.p50:.1f} "
+                f"p95={self.p95:.1f} p99={self.p99:.1f} jitter={self.jitter:.1f}ms "
+                f"rafaga={self.rafaga_max}")
+
+
+def _acumular(stats, probes):
+    """Recorre una sola vez los `probe-result` y acumula RTT y ráfagas de pérdida."""
+    esperado = 1  # Siguiente probe-index esperado
+    rafaga = 0
+    for probe in probes:
+        indice = probe.findtext("probe-index")
+        indice = int(indice) if indice else esperado
+        rtt = probe.findtext("rtt")
+
+        # Los huecos en probe-index son sondas sin respuesta
+        if indice > esperado:
+            rafaga += indice - esperado
+        if rtt and probe.find("probe-success") is not None:
+            stats.rtts.append(int(rtt) / 1000)
+            stats.rafaga_max = max(stats.rafaga_max, rafaga)
+            rafaga = 0
+        else:
+            rafaga += 1
+        esperado = indice + 1
+    return esperado - 1, rafaga
+
+
+def _cerrar(stats, ultimo_indice, rafaga, enviados):
+    """Completa los contadores con las sondas finales que no respondieron."""
+    stats.enviados = enviados if enviados else max(ultimo_indice, stats.recibidos)
+    rafaga += max(0, stats.enviados - ultimo_indice)
+    stats.rafaga_max = max(stats.rafaga_max, rafaga)
+    return stats
+
+
+def analizar_ping(result, enviados=None):
+    """Construye EstadisticasPing a partir del elemento devuelto por dev.rpc.ping.
+
+    `enviados` evita volver a leer el resumen si ya se extrajo.
+    """
+    stats = EstadisticasPing()
+    ultimo, rafaga = _acumular(stats, result.iterfind(TAG_PROBE))  # Hijos directos de ping-results
+    if enviados is None:
+        enviados = resumen_ping(result)[0]
+    return _cerrar(stats, ultimo, rafaga, enviados or 0)
+
+
+def _entero(texto):
+    return int(texto.strip()) if texto and texto.strip() else None
+
+
+def resumen_ping(result):
+    """Devuelve (enviados, recibidos, rtt promedio en ms) del probe-results-summary.
+
+    Junos reporta las respuestas en `responses-received`; algunas versiones
+    antiguas usaban `probes-received`, que se acepta como respaldo. El RTT
+    promedio viene en microsegundos y es None si no hubo respuestas.
+    """
+    resumen = result.find(TAG_RESUMEN)
+    if resumen is None:
+        return None, None, None
+    enviados = _entero(resumen.findtext("probes-sent"))
+    recibidos = _entero(resumen.findtext("responses-received"))
+    if recibidos is None:
+        recibidos = _entero(resumen.findtext("probes-received"))
+    rtt = resumen.findtext("rtt-average")
+    rtt = float(rtt.strip()) / 1000 if rtt and rtt.strip() else None
+    return enviados, recibidos, rtt
+
+
+def extraer_ping(result, detalle=True):
+    """(enviados, recibidos, rtt, EstadisticasPing o None) de una respuesta, que se libera al terminar.
+
+    Sin `detalle` solo se lee el resumen y no se recorren los `probe-result`.
+    """
+    try:
+        enviados, recibidos, rtt = resumen_ping(result)
+        stats = None
+        if detalle and enviados is not None and recibidos is not None:
+            stats = analizar_ping(result, enviados)
+        return enviados, recibidos, rtt, stats
+    finally:
+        # Vaciar el árbol ahora y no cuando se recolecte: con cientos de pings
+        # en vuelo baja el pico de memoria
+        result.clear()
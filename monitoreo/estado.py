@@ -0,0 +1,96 @@
+"""Almacén de estado del monitoreo, separado del inventario YAML.
+
+El estado se guarda por (hostname, destino) en un archivo JSON pequeño propio
+de cada equipo. Cada escritura va a un temporal en el mismo directorio, se
+sincroniza con fsync y se renombra sobre el original, de modo que una caída a
+mitad de la escritura nunca deja el archivo truncado.
+"""
+import json
+import os
+import tempfile
+
+DESTINO_HOST = "*"  # Destino reservado para el estado a nivel de host
+SEPARADOR = "|"
+
+
+def escribir_atomico(ruta, contenido):
+    """Escribe `contenido` (bytes) en `ruta` con temporal, fsync y rename."""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as archivo:
+            archivo.write(contenido)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        raise
+
+    # Sincronizar el directorio para que el rename sobreviva a un reinicio
+    try:
+        dfd = os.open(directorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dfd)
+    except OSError:
+        pass
+    finally:
+        os.close(dfd)
+
+
+class AlmacenEstado:
+    """Registros de estado indexados por (hostname, destino)."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._registros = {}
+        self._modificado = False
+
+    @staticmethod
+    def _clave(hostname, destino):
+        return f"{hostname}{SEPARADOR}{destino}"
+
+    def cargar(self):
+        """Lee el archivo de estado; si no existe, el almacén queda vacío."""
+        try:
+            with open(self.ruta, "rb") as archivo:
+                registros = json.loads(archivo.read() or b"{}")
+        except FileNotFoundError:
+            registros = {}
+        if not isinstance(registros, dict):
+            raise ValueError(f"Formato de estado inválido en {self.ruta}")
+        self._registros = registros
+        self._modificado = False
+        return self
+
+    def obtener(self, hostname, destino, defecto=None):
+        return self._registros.get(self._clave(hostname, destino), defecto)
+
+    def actualizar(self, hostname, destino, valor):
+        clave = self._clave(hostname, destino)
+        if self._registros.get(clave) != valor:
+            self._registros[clave] = valor
+            self._modificado = True
+
+    def eliminar(self, hostname, destino):
+        if self._registros.pop(self._clave(hostname, destino), None) is not None:
+            self._modificado = True
+
+    def destinos(self, hostname):
+        """Destinos con estado registrado para un host."""
+        prefijo = f"{hostname}{SEPARADOR}"
+        return [c[len(prefijo):] for c in self._registros if c.startswith(prefijo)]
+
+    def guardar(self):
+        """Escribe el estado de forma atómica, solo si cambió."""
+        if not self._modificado:
+            return False
+        contenido = json.dumps(self._registros, separators=(",", ":"), sort_keys=True)
+        escribir_atomico(self.ruta, contenido.encode())
+        self._modificado = False
+        return True
@@ -0,0 +1,197 @@
+"""Registro de métricas en memoria, exportado en formato de texto OpenMetrics.
+
+Al cerrar cada ciclo el monitor actualiza el registro con la pérdida, los
+cuantiles de RTT y el estado de alarma de cada destino y con la duración del
+ciclo. El registro se vuelca a un archivo que se reemplaza de forma atómica y,
+en modo demonio, puede servirse en un endpoint HTTP local para que los
+colectores lo lean sin interpretar los mensajes de syslog.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from monitoreo.alarmas import KEY_ALARMA, KEY_FALLOS
+from monitoreo.estado import DESTINO_HOST, escribir_atomico
+from monitoreo.planificador import KEY_OMITIDOS, KEY_TARDIOS
+
+PREFIJO = "opint"
+TIPO_CONTENIDO = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+RUTA_HTTP = "/metrics"
+DIRECCION_HTTP = "127.0.0.1"  # Solo local: el colector corre en el equipo o por túnel
+CUANTILES = (0.5, 0.95, 0.99)
+
+# familia -> (tipo, unidad, ayuda)
+FAMILIAS = {
+    "ping_enviados": ("gauge", "", "Paquetes enviados en la última medición"),
+    "ping_perdidos": ("gauge", "", "Paquetes perdidos en la última medición"),
+    "ping_perdida_ratio": ("gauge", "ratio", "Fracción de paquetes perdidos en la última medición"),
+    "ping_rtt_seconds": ("summary", "seconds", "RTT de las respuestas de la última medición"),
+    "ping_ok": ("gauge", "", "1 si la última medición cumplió los umbrales"),
+    "ping_alarma": ("gauge", "", "1 si el destino tiene una alarma activa"),
+    "ping_fallos_consecutivos": ("gauge", "", "Ciclos fallidos seguidos del destino"),
+    "ciclo_duracion_seconds": ("gauge", "seconds", "Duración del último ciclo"),
+    "ciclo_destinos": ("gauge", "", "Destinos medidos en el último ciclo"),
+    "ciclo_exitosos": ("gauge", "", "Destinos que cumplieron los umbrales en el último ciclo"),
+    "ciclo_timestamp_seconds": ("gauge", "seconds", "Instante de cierre del último ciclo"),
+    "ciclos_tardios": ("counter", "", "Ciclos que terminaron fuera de plazo"),
+    "ciclos_omitidos": ("counter", "", "Ciclos omitidos por desborde"),
+}
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _etiquetas(pares):
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}" if pares else ""
+
+
+def _valor(numero):
+    if isinstance(numero, float):
+        return "NaN" if numero != numero else repr(numero)
+    return str(numero)
+
+
+class RegistroMetricas:
+    """Últimos valores por host y destino de un perfil de monitoreo; seguro entre hilos.
+
+    `perfil` se agrega como etiqueta para distinguir los inventarios que
+    comparten un mismo endpoint.
+    """
+
+    def __init__(self, perfil):
+        self.perfil = perfil
+        self._destinos = {}  # hostname -> {ip: {familia: [(sufijo, etiquetas extra, valor)]}}
+        self._ciclos = {}  # hostname -> {familia: valor}
+        self._lock = threading.Lock()
+
+    def actualizar(self, hostname, mediciones, estado, en_espera, duracion, instante):
+        """Registra el cierre de un ciclo; los destinos que ya no están en el plan se descartan."""
+        anteriores = self._destinos.get(hostname, {})
+        # Los destinos en espera por su intervalo conservan su última medición
+        destinos = {ip: {**anteriores.get(ip, {}), **self._muestras_alarma(estado.obtener(hostname, ip))}
+                    for ip in en_espera}
+        for ip, medicion in mediciones.items():
+            destinos[ip] = self._muestras_destino(medicion, estado.obtener(hostname, ip))
+
+        host = estado.obtener(hostname, DESTINO_HOST, {})
+        ciclo = {
+            "ciclo_duracion_seconds": round(duracion, 3),
+            "ciclo_destinos": len(mediciones),
+            "ciclo_exitosos": sum(1 for m in mediciones.values() if m.ok),
+            "ciclo_timestamp_seconds": int(instante),
+            "ciclos_tardios": host.get(KEY_TARDIOS, 0),
+            "ciclos_omitidos": host.get(KEY_OMITIDOS, 0),
+        }
+        with self._lock:
+            self._destinos[hostname] = destinos
+            self._ciclos[hostname] = ciclo
+
+    @staticmethod
+    def _muestras_alarma(registro):
+        registro = registro or {}
+        return {"ping_alarma": [("", (), int(bool(registro.get(KEY_ALARMA))))],
+                "ping_fallos_consecutivos": [("", (), registro.get(KEY_FALLOS, 0))]}
+
+    def _muestras_destino(self, medicion, registro):
+        muestras = {"ping_ok": [("", (), int(bool(medicion.ok)))], **self._muestras_alarma(registro)}
+        stats = medicion.stats
+        if medicion.perdida is None or stats is None:
+            return muestras  # El ping no pudo ejecutarse: solo queda el estado
+        enviados = stats.enviados or medicion.perdida
+        muestras["ping_enviados"] = [("", (), enviados)]
+        muestras["ping_perdidos"] = [("", (), medicion.perdida)]
+        muestras["ping_perdida_ratio"] = [("", (), round(medicion.perdida / enviados, 6) if enviados else 0.0)]
+        # Sin respuestas los cuantiles no están definidos
+        rtt = [("", (("quantile", str(q)),), round(stats.percentil(q * 100) / 1000, 6) if stats.recibidos
+                else float("nan")) for q in CUANTILES]
+        rtt.append(("_sum", (), round(sum(stats.rtts) / 1000, 6)))
+        rtt.append(("_count", (), stats.recibidos))
+        muestras["ping_rtt_seconds"] = rtt
+        return muestras
+
+    def familias(self):
+        """{familia: [(sufijo, etiquetas, valor)]} con las etiquetas completas de cada muestra."""
+        salida = {}
+        with self._lock:
+            for hostname, destinos in self._destinos.items():
+                for ip, muestras in destinos.items():
+                    base = (("perfil", self.perfil), ("host", hostname), ("destino", ip))
+                    for familia, lista in muestras.items():
+                        salida.setdefault(familia, []).extend(
+                            (sufijo, base + extra, valor) for sufijo, extra, valor in lista)
+            for hostname, ciclo in self._ciclos.items():
+                base = (("perfil", self.perfil), ("host", hostname))
+                for familia, valor in ciclo.items():
+                    salida.setdefault(familia, []).append(("_total" if familia.startswith("ciclos_") else "",
+                                                           base, valor))
+        return salida
+
+
+def componer(registros):
+    """Texto OpenMetrics de varios registros, con cada familia una sola vez."""
+    muestras = {}
+    for registro in registros:
+        for familia, lista in registro.familias().items():
+            muestras.setdefault(familia, []).extend(lista)
+
+    lineas = []
+    for familia, (tipo, unidad, ayuda) in FAMILIAS.items():
+        if familia not in muestras:
+            continue
+        nombre = f"{PREFIJO}_{familia}"
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        if unidad:
+            lineas.append(f"# UNIT {nombre} {unidad}")
+        lineas.append(f"# HELP {nombre} {ayuda}")
+        lineas.extend(f"{nombre}{sufijo}{_etiquetas(etiquetas)} {_valor(valor)}"
+                      for sufijo, etiquetas, valor in muestras[familia])
+    lineas.append("# EOF")
+    return "\n".join(lineas) + "\n"
+
+
+def escribir_openmetrics(ruta, registros):
+    """Reemplaza `ruta` de forma atómica: un colector nunca lee un archivo a medias."""
+    escribir_atomico(ruta, componer(registros).encode())
+
+
+class ServidorMetricas:
+    """Endpoint HTTP local que sirve el texto OpenMetrics en /metrics desde un hilo daemon.
+
+    `registros` es una lista fija o una función que la devuelve en cada petición.
+    """
+
+    def __init__(self, puerto, registros, direccion=DIRECCION_HTTP):
+        if not callable(registros):
+            registros = (lambda lista: lambda: lista)(list(registros))
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != RUTA_HTTP:
+                    self.send_error(404)
+                    return
+                cuerpo = componer(registros()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", TIPO_CONTENIDO)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass  # Sin ruido en la salida del script
+
+        self._servidor = ThreadingHTTPServer((direccion, puerto), Manejador)
+        self._servidor.daemon_threads = True
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+
+    @property
+    def puerto(self):
+        return self._servidor.server_address[1]
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+        return False
@@ -0,0 +1,185 @@
+"""Análisis de la flota completa sobre los historiales recolectados de cada equipo.
+
+Se corre fuera del equipo sobre una copia de los directorios de historial de
+todos los routers. Las muestras de cada archivo se cargan en bloque a columnas
+de numpy (host, destino, instante, enviados, recibidos, rtt), de modo que los
+agregados por host y por destino y la detección de patrones no recorren los
+registros uno a uno en Python.
+
+Patrones por ciclo:
+- destino común: muchos hosts fallan hacia la misma IP a la vez; el problema
+  está en el destino o en su camino, no en los equipos.
+- host aislado: un host falla hacia la mayoría de sus destinos a la vez; el
+  problema está en el equipo o en su salida.
+"""
+import os
+
+try:
+    import numpy as np
+except ImportError:  # numpy no existe en Junos; solo se usa fuera del equipo
+    np = None
+
+from monitoreo.historial import CAMPOS_MUESTRA, EXTENSION, FORMATO_MUESTRA, host_y_destino, muestras_crudas
+
+PERCENTILES = (50, 95, 99)
+INTERVALO = 300  # Segundos por ciclo al agrupar muestras de distintos hosts
+FRACCION_PATRON = 0.5  # Fracción de hosts (o destinos) fallando para marcar un patrón
+MIN_HOSTS_COMUN = 3  # Hosts mínimos hacia un destino para hablar de destino común
+MIN_DESTINOS_AISLADO = 2  # Destinos mínimos de un host para hablar de host aislado
+
+
+def _numpy():
+    if np is None:
+        raise ImportError("El análisis de flota requiere numpy (pip install numpy)")
+    return np
+
+
+def _tipo_muestra():
+    """dtype estructurado equivalente a FORMATO_MUESTRA ('<dIIffff', sin relleno)."""
+    tipos = {"d": "<f8", "I": "<u4", "f": "<f4"}
+    return np.dtype(list(zip(CAMPOS_MUESTRA, (tipos[c] for c in FORMATO_MUESTRA.lstrip("<")))))
+
+
+class Flota:
+    """Muestras de todos los hosts en columnas paralelas.
+
+    `host` y `destino` son índices en las listas `hosts` y `destinos`; `rtt`
+    es el promedio del ciclo en ms y NaN si no hubo respuestas.
+    """
+
+    def __init__(self, hosts, destinos, host, destino, instante, enviados, recibidos, rtt):
+        self.hosts = hosts
+        self.destinos = destinos
+        self.host = host
+        self.destino = destino
+        self.instante = instante
+        self.enviados = enviados
+        self.recibidos = recibidos
+        self.rtt = rtt
+
+    def __len__(self):
+        return len(self.instante)
+
+    def fallidos(self, umbral_perdida=0.0):
+        """Máscara de las muestras fallidas: sin ping o con pérdida mayor al umbral (fracción)."""
+        enviados = self.enviados.astype(np.float64)
+        perdida = np.divide(enviados - self.recibidos, enviados, out=np.ones_like(enviados), where=enviados > 0)
+        return perdida > umbral_perdida
+
+
+def archivos_historial(raiz):
+    """Rutas de todos los archivos de historial bajo `raiz`, en cualquier subdirectorio."""
+    for directorio, _, nombres in os.walk(raiz):
+        for nombre in sorted(nombres):
+            if nombre.endswith(EXTENSION):
+                yield os.path.join(directorio, nombre)
+
+
+def cargar_flota(raiz, desde=None):
+    """Carga los historiales bajo `raiz` en una Flota; `desde` descarta las muestras anteriores."""
+    _numpy()
+    tipo = _tipo_muestra()
+    hosts, destinos = {}, {}
+    bloques, ids_host, ids_destino = [], [], []
+    for ruta in archivos_historial(raiz):
+        try:
+            muestras = np.frombuffer(muestras_crudas(ruta), dtype=tipo)
+        except (OSError, ValueError):
+            continue  # Archivo ajeno o copiado a medias
+        hostname, ip = host_y_destino(ruta)
+        bloques.append(muestras)
+        ids_host.append(hosts.setdefault(hostname, len(hosts)))
+        ids_destino.append(destinos.setdefault(ip, len(destinos)))
+
+    if bloques:
+        muestras = np.concatenate(bloques)
+        cantidades = [len(b) for b in bloques]
+        host = np.repeat(np.array(ids_host, dtype=np.int32), cantidades)
+        destino = np.repeat(np.array(ids_destino, dtype=np.int32), cantidades)
+    else:
+        muestras = np.empty(0, dtype=tipo)
+        host = destino = np.empty(0, dtype=np.int32)
+    if desde is not None:
+        vigentes = muestras["instante"] >= desde
+        muestras, host, destino = muestras[vigentes], host[vigentes], destino[vigentes]
+    return Flota(list(hosts), list(destinos), host, destino, muestras["instante"],
+                 muestras["enviados"].astype(np.int64), muestras["recibidos"].astype(np.int64),
+                 muestras["rtt"].astype(np.float64))
+
+
+def percentiles_por_grupo(grupos, valores, cantidad, percentiles=PERCENTILES):
+    """Percentiles por rango más cercano de `valores` por grupo; NaN se ignora.
+
+    Devuelve un arreglo (cantidad, len(percentiles)), NaN en los grupos sin valores.
+    """
+    validos = ~np.isnan(valores)
+    grupos, valores = grupos[validos], valores[validos]
+    orden = np.lexsort((valores, grupos))
+    grupos, valores = grupos[orden], valores[orden]
+    conteo = np.bincount(grupos, minlength=cantidad)
+    inicio = np.concatenate(([0], np.cumsum(conteo)[:-1]))
+    salida = np.full((cantidad, len(percentiles)), np.nan)
+    con_datos = conteo > 0
+    for j, p in enumerate(percentiles):
+        rango = np.maximum(1, np.ceil(conteo * p / 100).astype(np.int64))
+        salida[con_datos, j] = valores[(inicio + rango - 1)[con_datos]]
+    return salida
+
+
+def resumen(flota, eje, percentiles=PERCENTILES):
+    """Filas (nombre, muestras, enviados, recibidos, pérdida %, percentiles de RTT...) por host o destino."""
+    grupos, nombres = (flota.host, flota.hosts) if eje == "host" else (flota.destino, flota.destinos)
+    cantidad = len(nombres)
+    muestras = np.bincount(grupos, minlength=cantidad)
+    enviados = np.bincount(grupos, weights=flota.enviados, minlength=cantidad)
+    recibidos = np.bincount(grupos, weights=flota.recibidos, minlength=cantidad)
+    perdida = np.divide(enviados - recibidos, enviados, out=np.zeros(cantidad), where=enviados > 0) * 100
+    rtt = percentiles_por_grupo(grupos, flota.rtt, cantidad, percentiles)
+    return [(nombres[i], int(muestras[i]), int(enviados[i]), int(recibidos[i]), float(perdida[i]),
+             *(float(v) for v in rtt[i])) for i in np.argsort(-perdida, kind="stable")]
+
+
+def _eventos(ciclo, eje, otro, fallidos, fraccion, minimo, cantidad):
+    """Ciclos en que un elemento de `eje` falla con al menos `fraccion` de sus pares de `otro`.
+
+    Devuelve (ciclos con el patrón, máximo de pares fallando, último ciclo) por elemento.
+    """
+    # Un par (ciclo, eje, otro) cuenta una vez aunque tenga varias muestras
+    pares = int(otro.max()) + 1
+    combinado = (ciclo * cantidad + eje) * pares + otro
+    total = np.bincount(np.unique(combinado) // pares)
+    fallando = np.bincount(np.unique(combinado[fallidos]) // pares, minlength=len(total))
+    marcado = (total >= minimo) & (fallando >= np.maximum(1, fraccion * total))
+    indices = np.nonzero(marcado)[0]
+    elemento, ciclo_marcado = indices % cantidad, indices // cantidad
+    ciclos = np.bincount(elemento, minlength=cantidad)
+    maximo = np.zeros(cantidad, dtype=np.int64)
+    np.maximum.at(maximo, elemento, fallando[indices])
+    ultimo = np.full(cantidad, -1, dtype=np.int64)
+    np.maximum.at(ultimo, elemento, ciclo_marcado)
+    return ciclos, maximo, ultimo
+
+
+def patrones(flota, intervalo=INTERVALO, umbral_perdida=0.0, fraccion=FRACCION_PATRON,
+             min_hosts=MIN_HOSTS_COMUN, min_destinos=MIN_DESTINOS_AISLADO):
+    """Detecta destinos comunes y hosts aislados ciclo por ciclo.
+
+    Devuelve (destinos, hosts): listas de (nombre, ciclos con el patrón, máximo
+    de hosts o destinos fallando a la vez, instante del último) ordenadas por ciclos.
+    """
+    if not len(flota):
+        return [], []
+    ciclo = (flota.instante // intervalo).astype(np.int64)
+    base = ciclo.min()
+    ciclo -= base
+    fallidos = flota.fallidos(umbral_perdida)
+
+    def filas(nombres, ciclos, maximo, ultimo):
+        return [(nombres[i], int(ciclos[i]), int(maximo[i]), float((ultimo[i] + base) * intervalo))
+                for i in np.argsort(-ciclos, kind="stable") if ciclos[i]]
+
+    destinos = filas(flota.destinos, *_eventos(ciclo, flota.destino, flota.host, fallidos, fraccion,
+                                               min_hosts, len(flota.destinos)))
+    hosts = filas(flota.hosts, *_eventos(ciclo, flota.host, flota.destino, fallidos, fraccion,
+                                         min_destinos, len(flota.hosts)))
+    return destinos, hosts
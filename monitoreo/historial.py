@@ -0,0 +1,202 @@
+"""Historial local de pings por destino en un buffer circular mapeado a memoria.
+
+Cada destino tiene un archivo de tamaño fijo con tres regiones circulares:
+las muestras de cada ciclo y los acumulados por hora y por día. Los
+acumulados se actualizan de forma incremental al agregar cada muestra, así
+que consultar el último día nunca requiere recorrer los logs de syslog.
+"""
+import math
+import mmap
+import os
+import re
+import struct
+import time
+from urllib.parse import quote, unquote
+
+MAGIA = b"MTH1"
+EXTENSION = ".hist"
+CAPACIDAD = 288  # Muestras por destino: un día a un ciclo cada 5 minutos
+CAPACIDAD_HORAS = 48  # Acumulados por hora conservados
+CAPACIDAD_DIAS = 31  # Acumulados por día conservados
+
+HORA = 3600
+DIA = 86400
+
+# magia, capacidades (muestras, horas, días), siguientes posiciones, total de muestras
+_ENCABEZADO = struct.Struct("<4sIIIIIIQ")
+# instante, enviados, recibidos, rtt promedio, mínimo, máximo, desviación (ms)
+_MUESTRA = struct.Struct("<dIIffff")
+CAMPOS_MUESTRA = ("instante", "enviados", "recibidos", "rtt", "minimo", "maximo", "desviacion")
+FORMATO_MUESTRA = _MUESTRA.format
+_NOMBRE_HISTORIAL = re.compile(r"(.+?)_((?:\d{1,3}\.){3}\d{1,3}(?: .*)?|[0-9a-fA-F]*:[0-9a-fA-F:.]+(?: .*)?)$")
+# inicio, ciclos, enviados, recibidos, ciclos con rtt, suma rtt, suma rtt², mínimo, máximo
+_ACUMULADO = struct.Struct("<dIIIIddff")
+
+
+class Historial:
+    """Buffer circular de muestras y acumulados de un destino."""
+
+    def __init__(self, ruta, capacidad=CAPACIDAD, horas=CAPACIDAD_HORAS, dias=CAPACIDAD_DIAS):
+        self.ruta = ruta
+        nuevo = not os.path.exists(ruta)
+        if not nuevo:
+            with open(ruta, "rb") as archivo:
+                encabezado = archivo.read(_ENCABEZADO.size)
+            if len(encabezado) == _ENCABEZADO.size and encabezado[:4] == MAGIA:
+                # Un archivo existente conserva sus propias capacidades
+                _, capacidad, horas, dias = _ENCABEZADO.unpack(encabezado)[:4]
+            else:
+                nuevo = True
+
+        self.capacidad, self.horas, self.dias = capacidad, horas, dias
+        self._off_muestras = _ENCABEZADO.size
+        self._off_horas = self._off_muestras + capacidad * _MUESTRA.size
+        self._off_dias = self._off_horas + horas * _ACUMULADO.size
+        tamano = self._off_dias + dias * _ACUMULADO.size
+
+        self._archivo = open(ruta, "w+b" if nuevo else "r+b")
+        if nuevo:
+            self._archivo.truncate(tamano)
+        self._mm = mmap.mmap(self._archivo.fileno(), tamano)
+        if nuevo:
+            self._escribir_encabezado(0, 0, 0, 0)
+
+    def _encabezado(self):
+        return _ENCABEZADO.unpack_from(self._mm, 0)
+
+    def _escribir_encabezado(self, siguiente, hora, dia, total):
+        _ENCABEZADO.pack_into(self._mm, 0, MAGIA, self.capacidad, self.horas, self.dias,
+                              siguiente, hora, dia, total)
+
+    def _acumular(self, base, capacidad, posicion, total, periodo, instante, muestra):
+        """Suma la muestra al acumulado de su periodo; abre uno nuevo si cambió."""
+        inicio = instante - instante % periodo
+        offset = base + posicion * _ACUMULADO.size
+        actual = _ACUMULADO.unpack_from(self._mm, offset)
+        if total == 0 or actual[0] != inicio:
+            if total:
+                posicion = (posicion + 1) % capacidad
+                offset = base + posicion * _ACUMULADO.size
+            actual = (inicio, 0, 0, 0, 0, 0.0, 0.0, math.inf, -math.inf)
+
+        _, ciclos, enviados, recibidos, con_rtt, suma, suma2, minimo, maximo = actual
+        _, m_enviados, m_recibidos, promedio, m_minimo, m_maximo, _ = muestra
+        if not math.isnan(promedio):
+            con_rtt += 1
+            suma += promedio
+            suma2 += promedio * promedio
+            minimo = min(minimo, m_minimo)
+            maximo = max(maximo, m_maximo)
+        _ACUMULADO.pack_into(self._mm, offset, inicio, ciclos + 1, enviados + m_enviados,
+                             recibidos + m_recibidos, con_rtt, suma, suma2, minimo, maximo)
+        return posicion
+
+    def agregar(self, instante, enviados, recibidos, promedio, minimo, maximo, desviacion):
+        """Agrega la muestra de un ciclo. Los RTT en NaN indican que no hubo respuesta."""
+        siguiente, hora, dia, total = self._encabezado()[4:]
+        muestra = (instante, enviados, recibidos, promedio, minimo, maximo, desviacion)
+        _MUESTRA.pack_into(self._mm, self._off_muestras + siguiente * _MUESTRA.size, *muestra)
+        hora = self._acumular(self._off_horas, self.horas, hora, total, HORA, instante, muestra)
+        dia = self._acumular(self._off_dias, self.dias, dia, total, DIA, instante, muestra)
+        self._escribir_encabezado((siguiente + 1) % self.capacidad, hora, dia, total + 1)
+
+    def muestras(self):
+        """Muestras conservadas en orden cronológico."""
+        siguiente, _, _, total = self._encabezado()[4:]
+        cantidad = min(total, self.capacidad)
+        inicio = (siguiente - cantidad) % self.capacidad
+        return [_MUESTRA.unpack_from(self._mm, self._off_muestras + ((inicio + i) % self.capacidad) * _MUESTRA.size)
+                for i in range(cantidad)]
+
+    def acumulados(self, periodo=HORA):
+        """Acumulados por hora o por día en orden cronológico.
+
+        Cada elemento es (inicio, ciclos, enviados, recibidos, rtt_promedio,
+        rtt_desviacion, rtt_minimo, rtt_maximo); los RTT son NaN si no hubo respuestas.
+        """
+        _, _, _, _, _, hora, dia, total = self._encabezado()
+        base, capacidad, posicion = ((self._off_horas, self.horas, hora) if periodo == HORA
+                                     else (self._off_dias, self.dias, dia))
+        resultado = []
+        for i in range(capacidad):
+            offset = base + ((posicion + 1 + i) % capacidad) * _ACUMULADO.size
+            inicio, ciclos, enviados, recibidos, con_rtt, suma, suma2, minimo, maximo = \
+                _ACUMULADO.unpack_from(self._mm, offset)
+            if ciclos == 0:
+                continue
+            if con_rtt:
+                media = suma / con_rtt
+                desviacion = math.sqrt(max(0.0, suma2 / con_rtt - media * media))
+            else:
+                media = desviacion = minimo = maximo = math.nan
+            resultado.append((inicio, ciclos, enviados, recibidos, media, desviacion, minimo, maximo))
+        return resultado if total else []
+
+    def cerrar(self):
+        self._mm.flush()
+        self._mm.close()
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def ruta_historial(directorio, hostname, ip):
+    return os.path.join(directorio, quote(f"{hostname}_{ip}", safe="") + EXTENSION)
+
+
+def host_y_destino(ruta):
+    """Inverso de ruta_historial: (hostname, destino) a partir del nombre del archivo."""
+    nombre = unquote(os.path.basename(ruta)[:-len(EXTENSION)])
+    # El destino empieza con la IP y puede seguir con calificadores que también tengan '_'
+    coincidencia = _NOMBRE_HISTORIAL.match(nombre)
+    if coincidencia:
+        return coincidencia.group(1), coincidencia.group(2)
+    hostname, _, destino = nombre.rpartition("_")
+    return hostname, destino
+
+
+def muestras_crudas(ruta):
+    """Bytes de las muestras conservadas, en orden cronológico y sin desempacar.
+
+    Cada muestra ocupa FORMATO_MUESTRA; sirve para cargar muchos archivos en
+    bloque fuera del equipo sin pasar por struct muestra a muestra.
+    """
+    with open(ruta, "rb") as archivo:
+        datos = archivo.read()
+    if len(datos) < _ENCABEZADO.size or datos[:4] != MAGIA:
+        raise ValueError(f"{ruta} no es un archivo de historial")
+    _, capacidad, _, _, siguiente, _, _, total = _ENCABEZADO.unpack_from(datos, 0)
+    cantidad = min(total, capacidad)
+    region = datos[_ENCABEZADO.size:_ENCABEZADO.size + capacidad * _MUESTRA.size]
+    corte = (siguiente - cantidad) % capacidad * _MUESTRA.size
+    return (region[corte:] + region[:corte])[:cantidad * _MUESTRA.size]
+
+
+def registrar_mediciones(directorio, hostname, mediciones, instante=None):
+    """Agrega al historial de cada destino la Medicion obtenida en el ciclo.
+
+    Un destino cuyo historial no se pudo escribir no impide los demás;
+    devuelve {ip: excepción} de los que fallaron.
+    """
+    instante = time.time() if instante is None else instante
+    os.makedirs(directorio, exist_ok=True)
+    errores = {}
+    for ip, medicion in mediciones.items():
+        stats = medicion.stats
+        if stats is None:
+            muestra = (0, 0, math.nan, math.nan, math.nan, math.nan)
+        else:
+            # Sin respuestas el RTT es None: se guarda como NaN
+            muestra = (stats.enviados, stats.recibidos, math.nan if medicion.rtt is None else medicion.rtt,
+                       stats.minimo if stats.recibidos else math.nan,
+                       stats.maximo if stats.recibidos else math.nan, stats.desviacion)
+        try:
+            with Historial(ruta_historial(directorio, hostname, ip)) as historial:
+                historial.agregar(instante, *muestra)
+        except Exception as e:
+            errores[ip] = e
+    return errores
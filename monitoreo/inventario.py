@@ -0,0 +1,433 @@
+"""Índice compilado del inventario YAML, resuelto por hostname.
+
+El inventario completo de la flota se parsea solo cuando cambia. En ese
+momento se resuelven los grupos y la herencia de parámetros y se escribe, dentro
+de `<inventario>.idx/`, el archivo JSON del host local con su plan plano de
+sondas y un manifiesto con el mtime, tamaño y hash SHA-1 del YAML de origen; el
+controlador de la flota escribe en cambio el índice completo. Las corridas
+siguientes validan el manifiesto con un stat() (y el hash solo si cambió el
+mtime) y leen únicamente el archivo de su host.
+
+El inventario puede ser plano (un diccionario por hostname) o jerárquico, con
+las secciones `defaults`, `grupos` y `hosts`. Los parámetros de cada sonda se
+resuelven de lo general a lo particular: defaults < host < grupos (del padre
+al hijo) < destino. Lo que quede sin definir lo completa el script.
+
+Una misma IP puede sondearse por varios caminos (origen, interfaz,
+routing-instance) o con distinto paquete (DSCP, tamaño); cada combinación es
+una sonda propia, identificada por la IP seguida de esos calificadores.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+from urllib.parse import quote, unquote
+
+import yaml
+
+from monitoreo.estado import escribir_atomico
+
+try:
+    CargadorYAML = yaml.CSafeLoader  # Cargador acelerado en C (libyaml)
+except AttributeError:
+    CargadorYAML = yaml.SafeLoader
+
+MANIFIESTO = "manifiesto.json"
+SUFIJO_INDICE = ".idx"
+VERSION_INDICE = 3  # Cambia con el formato del plan: un índice de otra versión se recompila
+KEY_ORIGEN = "origen"  # Hash del YAML del que salió una entrada del índice
+KEY_CONFIG = "config"  # Configuración resuelta del host; null si el host no está en el inventario
+KEY_COMPLETO = "completo"  # El manifiesto cubre un índice con todos los hosts
+KEY_ERROR = "error"  # Error de validación de un host: solo ese host queda sin plan
+
+# Secciones y claves del inventario jerárquico
+SECCION_DEFAULTS = "defaults"
+SECCION_GRUPOS = "grupos"
+SECCION_HOSTS = "hosts"
+KEY_DESTINOS = "destinos"
+KEY_GRUPOS = "grupos"  # Grupos que incluye un host
+KEY_HEREDA = "hereda"  # Grupos padre de un grupo
+KEY_GRUPO = "grupo"  # Grupo cuyos parámetros toma un destino suelto
+KEY_IP = "ip"
+KEY_PLAN = "plan"  # Plan resuelto en el índice: una fila por sonda
+
+# Parámetros que se pueden ajustar por defaults, host, grupo o destino
+PARAMETROS = ("count", "intervalo", "rtt_umbral", "max_perdidos", "max_eventos", "min_exitos", "size",
+              "origen", "interfaz", "instancia", "dscp")
+_POSITIVOS = {"count", "intervalo", "max_eventos", "min_exitos", "size"}
+_TEXTOS = {"origen", "interfaz", "instancia"}  # IP de origen, interfaz de salida y routing-instance
+MAX_DSCP = 63
+# Parámetros que distinguen dos sondas hacia la misma IP
+IDENTIDAD = ("instancia", "origen", "interfaz", "dscp", "size")
+
+
+class Sonda(namedtuple("Sonda", ("destino",) + PARAMETROS)):
+    """Una sonda del plan; los parámetros None los completa el script.
+
+    `destino` identifica la sonda en el estado, el historial y el syslog: la IP
+    sola o seguida de sus calificadores de IDENTIDAD.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ip(self):
+        return self.destino.split(" ", 1)[0]
+
+
+def clave_destino(ip, parametros):
+    """Identidad de la sonda: la IP y los calificadores definidos, p. ej. '10.0.0.1 instancia=VRF dscp=46'."""
+    return " ".join([ip] + [f"{k}={parametros[k]}" for k in IDENTIDAD if parametros.get(k)])
+
+
+class HostNoEncontrado(Exception):
+    """El hostname no tiene entrada en el inventario."""
+
+    def __init__(self, hostname, ruta):
+        super().__init__(f"El hostname '{hostname}' no está definido en el inventario {ruta}")
+        self.hostname = hostname
+        self.ruta = ruta
+
+
+class InventarioInvalido(ValueError):
+    """El inventario tiene grupos inexistentes, ciclos de herencia o parámetros inválidos."""
+
+
+def _parametros(nodo, donde):
+    """Extrae y valida los parámetros de sonda definidos en un nodo del inventario."""
+    parametros = {}
+    for clave in PARAMETROS:
+        if clave not in nodo:
+            continue
+        valor = nodo[clave]
+        if clave in _TEXTOS:
+            if not isinstance(valor, str) or not valor or " " in valor:
+                raise InventarioInvalido(f"{donde}: '{clave}' debe ser un nombre sin espacios, no {valor!r}")
+            parametros[clave] = valor
+            continue
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            raise InventarioInvalido(f"{donde}: '{clave}' debe ser numérico, no {valor!r}")
+        if valor < 0 or (clave in _POSITIVOS and valor == 0) or (clave == "dscp" and valor > MAX_DSCP):
+            raise InventarioInvalido(f"{donde}: '{clave}' fuera de rango ({valor})")
+        parametros[clave] = valor
+    return parametros
+
+
+def _destino(entrada, donde):
+    """Devuelve (ip, parámetros propios, grupo) de una entrada de `destinos`."""
+    if isinstance(entrada, dict):
+        if KEY_IP not in entrada:
+            raise InventarioInvalido(f"{donde}: destino sin '{KEY_IP}': {entrada!r}")
+        ip = str(entrada[KEY_IP])
+        return ip, _parametros(entrada, f"{donde} {ip}"), entrada.get(KEY_GRUPO)
+    return str(entrada), {}, None
+
+
+class _Resolutor:
+    """Resuelve grupos con herencia una sola vez por compilación del inventario."""
+
+    def __init__(self, grupos):
+        self.grupos = grupos or {}
+        self._parametros = {}  # grupo -> parámetros efectivos (padres primero)
+        self._destinos = {}  # grupo -> [(ip, parámetros del grupo, propios)]
+
+    def _grupo(self, nombre, donde):
+        nodo = self.grupos.get(nombre)
+        if not isinstance(nodo, dict):
+            raise InventarioInvalido(f"{donde}: el grupo '{nombre}' no existe")
+        return nodo
+
+    def parametros(self, nombre, donde, camino=()):
+        if nombre in self._parametros:
+            return self._parametros[nombre]
+        if nombre in camino:
+            raise InventarioInvalido(f"Herencia circular de grupos: {' -> '.join(camino + (nombre,))}")
+        nodo = self._grupo(nombre, donde)
+        efectivos = {}
+        for padre in nodo.get(KEY_HEREDA) or ():
+            efectivos.update(self.parametros(padre, f"grupo {nombre}", camino + (nombre,)))
+        efectivos.update(_parametros(nodo, f"grupo {nombre}"))
+        self._parametros[nombre] = efectivos
+        return efectivos
+
+    def destinos(self, nombre, donde, camino=()):
+        if nombre in self._destinos:
+            return self._destinos[nombre]
+        if nombre in camino:
+            raise InventarioInvalido(f"Herencia circular de grupos: {' -> '.join(camino + (nombre,))}")
+        nodo = self._grupo(nombre, donde)
+        propios_grupo = self.parametros(nombre, donde)
+        resultado = []
+        # Los destinos heredados toman además los parámetros del grupo hijo
+        for padre in nodo.get(KEY_HEREDA) or ():
+            for ip, params, propios in self.destinos(padre, f"grupo {nombre}", camino + (nombre,)):
+                resultado.append((ip, {**params, **propios_grupo}, propios))
+        for entrada in nodo.get(KEY_DESTINOS) or ():
+            ip, propios, grupo = _destino(entrada, f"grupo {nombre}")
+            params = dict(propios_grupo)
+            if grupo:
+                params.update(self.parametros(grupo, f"grupo {nombre} {ip}"))
+            resultado.append((ip, params, propios))
+        self._destinos[nombre] = resultado
+        return resultado
+
+
+def resolver_host(hostname, nodo, defaults=None, resolutor=None):
+    """Resuelve la configuración de un host a su plan plano de sondas.
+
+    Devuelve el nodo sin las claves de la jerarquía, con `destinos` (lista de
+    sondas, sin repetir) y `plan` (filas [destino, *PARAMETROS]). Si una sonda
+    aparece en varios grupos gana el último; si además se lista en el host,
+    sus parámetros propios se aplican sobre los del grupo. Una IP del host
+    sin calificadores propios ajusta la última sonda de grupo hacia esa IP.
+    """
+    nodo = nodo or {}
+    if not isinstance(nodo, dict):
+        raise InventarioInvalido(f"host {hostname}: la entrada debe ser un diccionario")
+    resolutor = resolutor or _Resolutor({})
+    base = {**(defaults or {}), **_parametros(nodo, f"host {hostname}")}
+
+    sondas = {}  # destino -> (ip, parámetros)
+    for grupo in nodo.get(KEY_GRUPOS) or ():
+        for ip, params, propios in resolutor.destinos(grupo, f"host {hostname}"):
+            params = {**base, **params, **propios}
+            clave = clave_destino(ip, params)
+            sondas.pop(clave, None)
+            sondas[clave] = (ip, params)
+    for entrada in nodo.get(KEY_DESTINOS) or ():
+        ip, propios, grupo = _destino(entrada, f"host {hostname}")
+        propios = {**(resolutor.parametros(grupo, f"host {hostname} {ip}") if grupo else {}), **propios}
+        clave = clave_destino(ip, {**base, **propios})
+        if clave not in sondas and not any(k in propios for k in IDENTIDAD):
+            # Un destino que ya vino de un grupo conserva sus parámetros y se ajusta encima
+            clave = next((c for c, (i, _) in reversed(sondas.items()) if i == ip), clave)
+        _, previos = sondas.pop(clave, (ip, base))
+        sondas[clave] = (ip, {**previos, **propios})
+
+    resuelto = {k: v for k, v in nodo.items() if k not in (KEY_DESTINOS, KEY_GRUPOS) and k not in PARAMETROS}
+    resuelto[KEY_DESTINOS] = list(sondas)
+    resuelto[KEY_PLAN] = [[clave] + [p.get(k) for k in PARAMETROS] for clave, (_, p) in sondas.items()]
+    return resuelto
+
+
+def resolver_inventario(data):
+    """Devuelve {hostname: configuración resuelta} de un inventario plano o jerárquico.
+
+    Un host mal definido (grupo inexistente, herencia circular, parámetro
+    inválido) queda como {KEY_ERROR: mensaje} sin invalidar al resto.
+    """
+    if isinstance(data.get(SECCION_HOSTS), dict):
+        defaults = _parametros(data.get(SECCION_DEFAULTS) or {}, SECCION_DEFAULTS)
+        resolutor = _Resolutor(data.get(SECCION_GRUPOS))
+        hosts = data[SECCION_HOSTS]
+    else:
+        defaults, resolutor, hosts = {}, _Resolutor({}), data
+    resueltos = {}
+    for hostname, nodo in hosts.items():
+        try:
+            resueltos[str(hostname)] = resolver_host(hostname, nodo, defaults, resolutor)
+        except InventarioInvalido as e:
+            resueltos[str(hostname)] = {KEY_ERROR: str(e)}
+    return resueltos
+
+
+def config_valida(config):
+    """Devuelve la configuración de un host; InventarioInvalido si el host quedó con error."""
+    if KEY_ERROR in config:
+        raise InventarioInvalido(config[KEY_ERROR])
+    return config
+
+
+def plan_host(config, base):
+    """Sondas del host con los parámetros sin definir tomados de `base` (dict por parámetro)."""
+    plan = config.get(KEY_PLAN)
+    if plan is None:
+        # Configuración sin resolver: solo una lista de IPs
+        plan = [[ip] + [None] * len(PARAMETROS) for ip in config.get(KEY_DESTINOS) or ()]
+    return [Sonda(fila[0], *(base.get(k) if v is None else v for k, v in zip(PARAMETROS, fila[1:])))
+            for fila in plan]
+
+
+def comparar_planes(anterior, nuevo):
+    """(agregados, retirados, modificados): destinos de las sondas que difieren entre dos planes."""
+    antes = {sonda.destino: sonda for sonda in anterior}
+    despues = {sonda.destino: sonda for sonda in nuevo}
+    agregados = [d for d in despues if d not in antes]
+    retirados = [d for d in antes if d not in despues]
+    modificados = [d for d, sonda in despues.items() if d in antes and antes[d] != sonda]
+    return agregados, retirados, modificados
+
+
+class ObservadorInventario:
+    """Detecta cambios del inventario con un stat() por consulta: mtime, tamaño e inodo.
+
+    El inodo cubre el reemplazo atómico del archivo por uno con el mismo mtime.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._firma = self._leer()
+
+    def _leer(self):
+        try:
+            info = os.stat(self.ruta)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size, info.st_ino
+
+    def cambio(self):
+        """Indica si el archivo cambió desde la consulta anterior (o desde que se creó el observador)."""
+        firma = self._leer()
+        if firma == self._firma:
+            return False
+        self._firma = firma
+        return True
+
+
+def _firma(ruta):
+    info = os.stat(ruta)
+    return {"mtime_ns": info.st_mtime_ns, "tamano": info.st_size, "version": VERSION_INDICE}
+
+
+def _archivo_host(directorio, hostname):
+    return os.path.join(directorio, quote(hostname, safe="") + ".json")
+
+
+def parsear_inventario(ruta):
+    """Parsea el YAML completo con el cargador más rápido disponible."""
+    with open(ruta, "rb") as archivo:
+        contenido = archivo.read()
+    data = yaml.load(contenido, Loader=CargadorYAML) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"El inventario {ruta} debe ser un diccionario por hostname")
+    return data, hashlib.sha1(contenido).hexdigest()
+
+
+def _escribir_entrada(directorio, hostname, config, digest):
+    # Cada entrada lleva el hash del YAML del que salió: una entrada de otra
+    # versión del inventario no se usa aunque siga en el directorio
+    entrada = {KEY_ORIGEN: digest, KEY_CONFIG: config}
+    escribir_atomico(_archivo_host(directorio, hostname), json.dumps(entrada, separators=(",", ":")).encode())
+
+
+def _leer_entrada(directorio, hostname):
+    try:
+        with open(_archivo_host(directorio, hostname), "rb") as archivo:
+            return json.loads(archivo.read())
+    except (OSError, ValueError):
+        return None
+
+
+def compilar_indice(ruta, directorio=None, hosts=None):
+    """Reconstruye el índice y devuelve el inventario resuelto.
+
+    Con `hosts` solo se escriben las entradas de esos hosts (la de un host
+    ausente queda marcada como tal): cada router escribe la suya y no una por
+    host de la flota. Sin `hosts` se escribe el índice completo.
+    """
+    directorio = directorio or ruta + SUFIJO_INDICE
+    firma = _firma(ruta)
+    data, digest = parsear_inventario(ruta)
+    data = resolver_inventario(data)
+
+    os.makedirs(directorio, exist_ok=True)
+    if hosts is None:
+        vigentes = {MANIFIESTO}
+        for hostname, config in data.items():
+            _escribir_entrada(directorio, hostname, config, digest)
+            vigentes.add(os.path.basename(_archivo_host(directorio, hostname)))
+
+        # Eliminar hosts que ya no están en el inventario
+        for nombre in os.listdir(directorio):
+            if nombre.endswith(".json") and nombre not in vigentes:
+                try:
+                    os.unlink(os.path.join(directorio, nombre))
+                except OSError:
+                    pass
+    else:
+        for hostname in hosts:
+            _escribir_entrada(directorio, hostname, data.get(hostname), digest)
+
+    # El manifiesto se escribe al final: si falta o no coincide, se recompila
+    firma["sha1"] = digest
+    firma[KEY_COMPLETO] = hosts is None
+    escribir_atomico(os.path.join(directorio, MANIFIESTO), json.dumps(firma).encode())
+    return data
+
+
+def _manifiesto_vigente(ruta, directorio):
+    """El manifiesto si el índice corresponde al YAML actual; si no, None."""
+    try:
+        with open(os.path.join(directorio, MANIFIESTO), "rb") as archivo:
+            manifiesto = json.loads(archivo.read())
+    except (OSError, ValueError):
+        return None
+    firma = _firma(ruta)
+    if manifiesto.get("version") != VERSION_INDICE or manifiesto.get("tamano") != firma["tamano"]:
+        return None
+    if manifiesto.get("mtime_ns") == firma["mtime_ns"]:
+        return manifiesto
+
+    # Cambió solo el mtime (p. ej. el archivo se volvió a copiar): comparar el hash
+    # antes de pagar el parseo completo
+    with open(ruta, "rb") as archivo:
+        digest = hashlib.sha1(archivo.read()).hexdigest()
+    if manifiesto.get("sha1") != digest:
+        return None
+    manifiesto.update(firma, sha1=digest)
+    try:
+        escribir_atomico(os.path.join(directorio, MANIFIESTO), json.dumps(manifiesto).encode())
+    except OSError:
+        pass
+    return manifiesto
+
+
+def cargar_host(ruta, hostname, directorio=None):
+    """Devuelve la configuración de `hostname` sin parsear al resto de la flota.
+
+    Lanza HostNoEncontrado si el inventario no tiene entrada para el host e
+    InventarioInvalido si la entrada del host no es válida.
+    """
+    directorio = directorio or ruta + SUFIJO_INDICE
+    manifiesto = _manifiesto_vigente(ruta, directorio)
+    if manifiesto is not None:
+        entrada = _leer_entrada(directorio, hostname)
+        if entrada is not None and entrada.get(KEY_ORIGEN) == manifiesto.get("sha1"):
+            if entrada.get(KEY_CONFIG) is None:
+                raise HostNoEncontrado(hostname, ruta)
+            return config_valida(entrada[KEY_CONFIG])
+        if entrada is None and manifiesto.get(KEY_COMPLETO):
+            raise HostNoEncontrado(hostname, ruta)
+
+    try:
+        data = compilar_indice(ruta, directorio, hosts=[hostname])
+    except OSError:
+        # Sin permisos para escribir el índice: resolver el inventario en memoria
+        data = resolver_inventario(parsear_inventario(ruta)[0])
+    if hostname not in data:
+        raise HostNoEncontrado(hostname, ruta)
+    return config_valida(data[hostname])
+
+
+def cargar_inventario(ruta, directorio=None):
+    """Devuelve {hostname: configuración resuelta} de toda la flota, desde el índice si está vigente.
+
+    Los hosts inválidos se incluyen con KEY_ERROR; ver config_valida().
+    """
+    directorio = directorio or ruta + SUFIJO_INDICE
+    manifiesto = _manifiesto_vigente(ruta, directorio)
+    if manifiesto is not None and manifiesto.get(KEY_COMPLETO):
+        data = {}
+        for nombre in sorted(os.listdir(directorio)):
+            if nombre.endswith(".json") and nombre != MANIFIESTO:
+                hostname = unquote(nombre[:-len(".json")])
+                entrada = _leer_entrada(directorio, hostname)
+                if entrada is None or entrada.get(KEY_ORIGEN) != manifiesto.get("sha1"):
+                    break  # Índice modificado a mitad de la lectura: se recompila
+                data[hostname] = entrada[KEY_CONFIG]
+        else:
+            return data
+    try:
+        return compilar_indice(ruta, directorio)
+    except OSError:
+        return resolver_inventario(parsear_inventario(ruta)[0])
@@ -0,0 +1,151 @@
+"""Tiempos por fase de cada ciclo, perfilado opcional y registro de métricas JSONL.
+
+Cada ciclo acumula en un Cronometro el número de veces, el tiempo total y el
+máximo de cada fase (carga del YAML, hostname, apertura de sesión, RPC de
+ping, análisis del XML, estado, historial, syslog y exportación OpenMetrics). Al cerrar el ciclo se
+agrega una línea JSON compacta al archivo de métricas, que rota al superar
+TAMANO_MAXIMO.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Nombres de las fases medidas
+CONFIG = "config"
+HOSTNAME = "hostname"
+APERTURA = "apertura"
+RPC_PING = "rpc_ping"
+XML = "xml"
+ESTADO = "estado"
+HISTORIAL = "historial"
+SYSLOG = "syslog"
+EXPORTACION = "exportacion"
+
+# Modos de perfilado de un ciclo
+CPROFILE = "cprofile"
+TRACEMALLOC = "tracemalloc"
+MODOS_PERFIL = (CPROFILE, TRACEMALLOC)
+
+TAMANO_MAXIMO = 1024 * 1024  # Bytes del archivo de métricas antes de rotarlo
+TOP_PERFIL = 20  # Funciones o líneas listadas en el reporte de perfilado
+
+# Serializa la rotación y la escritura de un archivo de métricas compartido por
+# varios monitores del mismo proceso (p. ej. los equipos del controlador)
+_LOCK_METRICAS = threading.Lock()
+
+
+class Cronometro:
+    """Acumula los tiempos por fase de un ciclo; seguro entre hilos."""
+
+    def __init__(self, reloj=time.perf_counter):
+        self.reloj = reloj
+        self.inicio = reloj()
+        self._fases = {}  # fase -> [veces, total, máximo] en segundos
+        self._lock = threading.Lock()
+
+    def sumar(self, fase, segundos):
+        with self._lock:
+            acumulado = self._fases.get(fase)
+            if acumulado is None:
+                self._fases[fase] = [1, segundos, segundos]
+            else:
+                acumulado[0] += 1
+                acumulado[1] += segundos
+                acumulado[2] = max(acumulado[2], segundos)
+
+    @contextmanager
+    def fase(self, nombre):
+        """Mide el bloque como una ocurrencia de la fase `nombre`."""
+        inicio = self.reloj()
+        try:
+            yield
+        finally:
+            self.sumar(nombre, self.reloj() - inicio)
+
+    def transcurrido(self):
+        return self.reloj() - self.inicio
+
+    def fases(self):
+        """{fase: [veces, total_ms, max_ms]} redondeado para el registro."""
+        with self._lock:
+            return {f: [n, round(total * 1000, 2), round(maximo * 1000, 2)]
+                    for f, (n, total, maximo) in sorted(self._fases.items())}
+
+
+def modos_perfil(valor):
+    """Interpreta la clave `perfilar` del inventario: 'cprofile', 'tracemalloc' o ambos separados por coma."""
+    if not valor:
+        return ()
+    modos = tuple(m.strip() for m in str(valor).split(",") if m.strip())
+    invalidos = [m for m in modos if m not in MODOS_PERFIL]
+    if invalidos:
+        raise ValueError(f"Modo de perfilado desconocido {', '.join(invalidos)}; "
+                         f"opciones: {', '.join(MODOS_PERFIL)}")
+    return modos
+
+
+class Perfilador:
+    """Perfila un bloque con cProfile y/o tracemalloc y guarda el reporte en texto.
+
+    El reporte queda en `ruta` + '.txt' y, con cProfile, los datos crudos en
+    `ruta` + '.prof' para abrirlos con pstats o snakeviz. cProfile solo ve el
+    hilo que entra al bloque. Si tracemalloc ya estaba activo (p. ej. con
+    PYTHONTRACEMALLOC), se deja corriendo al salir.
+    """
+
+    def __init__(self, ruta, modos):
+        self.ruta = ruta
+        self.modos = modos
+        self.pico_memoria = None
+        self._perfil = None
+        self._detener_tracemalloc = False
+
+    def __enter__(self):
+        if TRACEMALLOC in self.modos:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()  # El pico se mide desde el inicio del bloque
+            else:
+                tracemalloc.start()
+                self._detener_tracemalloc = True
+        if CPROFILE in self.modos:
+            self._perfil = cProfile.Profile()
+            self._perfil.enable()
+        return self
+
+    def __exit__(self, *exc):
+        reporte = []
+        if self._perfil is not None:
+            self._perfil.disable()
+            self._perfil.dump_stats(self.ruta + ".prof")
+            salida = io.StringIO()
+            pstats.Stats(self._perfil, stream=salida).sort_stats("cumulative").print_stats(TOP_PERFIL)
+            reporte.append(salida.getvalue())
+        if TRACEMALLOC in self.modos:
+            foto = tracemalloc.take_snapshot()
+            self.pico_memoria = tracemalloc.get_traced_memory()[1]
+            if self._detener_tracemalloc:
+                tracemalloc.stop()
+            reporte.append(f"Memoria pico: {self.pico_memoria} bytes")
+            reporte.extend(str(e) for e in foto.statistics("lineno")[:TOP_PERFIL])
+        with open(self.ruta + ".txt", "w") as archivo:
+            archivo.write("\n".join(reporte) + "\n")
+        return False
+
+
+def escribir_metricas(ruta, registro, tamano_maximo=TAMANO_MAXIMO):
+    """Agrega `registro` como una línea JSON; rota a `ruta`.1 al superar el tamaño."""
+    linea = json.dumps(registro, separators=(",", ":"), sort_keys=True) + "\n"
+    with _LOCK_METRICAS:
+        try:
+            if os.path.getsize(ruta) >= tamano_maximo:
+                os.replace(ruta, ruta + ".1")
+        except OSError:
+            pass  # Aún no existe
+        with open(ruta, "a") as archivo:
+            archivo.write(linea)
@@ -0,0 +1,152 @@
+"""Motor de pings basado en asyncio con límites de concurrencia y plazos.
+
+El RPC de PyEZ es bloqueante, así que cada ping corre en un pool de hilos
+del tamaño del límite de concurrencia (no uno por destino). Un destino que
+supera su plazo se da por fallido; su hilo termina cuando el RPC regresa y
+no retrasa el cierre del ciclo. Los destinos que no alcanzan a terminar
+dentro del plazo del ciclo no se dan por fallidos: se reportan como omitidos.
+
+El plazo de un destino corre desde que su hilo arranca, y se detiene mientras
+el hilo espera dentro de `fuera_de_plazo()` (el pool de sesiones lo usa al
+esperar o abrir una sesión): solo cuenta el tiempo con la sesión en la mano.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+MAX_EN_VUELO = 4  # RPCs de ping simultáneos como máximo
+TIMEOUT_DESTINO = 60  # Segundos máximos por destino
+TIMEOUT_CICLO = 240  # Segundos máximos por ciclo (dentro de la ventana de 5 minutos)
+
+
+class PlazoExcedido(Exception):
+    """El ping a un destino no terminó dentro de su plazo."""
+
+
+class DestinoOmitido(PlazoExcedido):
+    """El destino no se ejecutó, o se canceló, al vencer el plazo del ciclo: no cuenta como falla."""
+
+
+class _Plazo:
+    """Reloj del plazo de un destino, que su hilo detiene mientras espera una sesión."""
+
+    def __init__(self):
+        self.inicio = None  # time.monotonic() al arrancar el hilo
+        self.detenido = 0.0  # Segundos ya descontados
+        self.desde = None  # Inicio de la espera en curso
+        self._lock = threading.Lock()
+
+    def transcurrido(self, ahora):
+        with self._lock:
+            if self.inicio is None:
+                return 0.0
+            espera = ahora - self.desde if self.desde is not None else 0.0
+            return ahora - self.inicio - self.detenido - espera
+
+    def detener(self):
+        with self._lock:
+            self.desde = time.monotonic()
+
+    def reanudar(self):
+        with self._lock:
+            self.detenido += time.monotonic() - self.desde
+            self.desde = None
+
+
+_hilo = threading.local()  # Plazo del destino que corre en cada hilo del motor
+
+
+@contextmanager
+def fuera_de_plazo():
+    """El tiempo dentro del bloque no cuenta para el plazo del destino del hilo en curso.
+
+    Fuera de un hilo del motor asyncio no hace nada.
+    """
+    plazo = getattr(_hilo, "plazo", None)
+    if plazo is None or plazo.desde is not None:
+        yield
+        return
+    plazo.detener()
+    try:
+        yield
+    finally:
+        plazo.reanudar()
+
+
+def _con_plazo(plazo, funcion, destino):
+    plazo.inicio = time.monotonic()
+    _hilo.plazo = plazo
+    try:
+        return funcion(destino)
+    finally:
+        _hilo.plazo = None
+
+
+async def _ping_con_plazo(loop, executor, semaforo, funcion, destino, timeout_destino, inicio=None):
+    if inicio is not None:
+        # La espera hasta el turno del destino no ocupa lugar ni cuenta para su plazo
+        await asyncio.sleep(max(0, inicio - loop.time()))
+    async with semaforo:
+        plazo = _Plazo()
+        futuro = loop.run_in_executor(executor, _con_plazo, plazo, funcion, destino)
+        try:
+            while True:
+                # Se recalcula al despertar: las esperas del hilo por una sesión alargan el plazo
+                restante = timeout_destino - plazo.transcurrido(time.monotonic())
+                if restante <= 0:
+                    raise PlazoExcedido(f"{destino} excedió {timeout_destino} segundos")
+                hechos, _ = await asyncio.wait({futuro}, timeout=restante)
+                if hechos:
+                    return futuro.result()
+        finally:
+            # Un destino que aún no arrancó no llega a ejecutarse
+            futuro.cancel()
+
+
+async def ejecutar_pings_async(destinos, funcion, max_en_vuelo=MAX_EN_VUELO,
+                               timeout_destino=TIMEOUT_DESTINO, timeout_ciclo=TIMEOUT_CICLO, retrasos=None):
+    """Ejecuta funcion(destino) para cada destino y devuelve {destino: resultado}.
+
+    Si funcion lanza una excepción o se excede un plazo, el resultado de ese
+    destino es la excepción. Los destinos pendientes al vencer el plazo del
+    ciclo se cancelan y reciben DestinoOmitido. `retrasos` ({destino: segundos
+    desde el inicio}) escalona el arranque de cada destino.
+    """
+    resultados = {}
+    if not destinos:
+        return resultados
+
+    loop = asyncio.get_running_loop()
+    semaforo = asyncio.Semaphore(max_en_vuelo)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_en_vuelo, len(destinos))))
+    retrasos = retrasos or {}
+    origen = loop.time()
+    tareas = {
+        asyncio.ensure_future(_ping_con_plazo(loop, executor, semaforo, funcion, d, timeout_destino,
+                                              origen + retrasos[d] if d in retrasos else None)): d
+        for d in destinos
+    }
+    try:
+        hechas, pendientes = await asyncio.wait(tareas, timeout=timeout_ciclo)
+        for tarea in pendientes:
+            tarea.cancel()
+            resultados[tareas[tarea]] = DestinoOmitido(
+                f"{tareas[tarea]} cancelado al vencer el ciclo de {timeout_ciclo} segundos")
+        for tarea in hechas:
+            try:
+                resultados[tareas[tarea]] = tarea.result()
+            except Exception as e:
+                resultados[tareas[tarea]] = e
+        if pendientes:
+            await asyncio.wait(pendientes)
+    finally:
+        # No esperar a los hilos rezagados: terminan solos cuando su RPC regresa
+        executor.shutdown(wait=False)
+    return resultados
+
+
+def ejecutar_pings(destinos, funcion, **limites):
+    """Punto de entrada síncrono para ejecutar_pings_async."""
+    return asyncio.run(ejecutar_pings_async(destinos, funcion, **limites))
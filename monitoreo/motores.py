@@ -0,0 +1,106 @@
+"""Motores de ejecución intercambiables para los pings de un ciclo.
+
+Todos tienen la misma firma que ejecutar_pings del motor asyncio:
+motor(destinos, funcion, max_en_vuelo, timeout_destino, timeout_ciclo, retrasos)
+y devuelven {destino: resultado}, donde el resultado es la excepción si
+funcion(destino) falló o no terminó a tiempo (DestinoOmitido si no alcanzó
+a terminar dentro del plazo del ciclo). `retrasos` ({destino: segundos
+desde el inicio del motor}) indica cuándo arranca cada destino; sin él,
+arrancan tan pronto haya lugar. El motor se elige por despliegue con la clave
+`motor` del host en el inventario.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from monitoreo.motor_async import MAX_EN_VUELO, TIMEOUT_CICLO, TIMEOUT_DESTINO, DestinoOmitido, ejecutar_pings
+
+SECUENCIAL = "secuencial"
+HILOS = "hilos"
+ASYNC = "async"
+
+
+def _en_orden(destinos, retrasos):
+    """Destinos ordenados por su turno de arranque."""
+    return sorted(destinos, key=lambda d: retrasos.get(d, 0)) if retrasos else list(destinos)
+
+
+def _esperar_turno(origen, retraso):
+    espera = origen + retraso - time.monotonic()
+    if espera > 0:
+        time.sleep(espera)
+
+
+def ejecutar_secuencial(destinos, funcion, max_en_vuelo=1, timeout_destino=TIMEOUT_DESTINO,
+                        timeout_ciclo=TIMEOUT_CICLO, retrasos=None):
+    """Un destino a la vez sobre una sola sesión.
+
+    El plazo por destino no puede interrumpir un RPC en curso; al vencer el
+    plazo del ciclo los destinos restantes quedan omitidos sin ejecutarse.
+    """
+    resultados = {}
+    origen = time.monotonic()
+    limite = origen + timeout_ciclo if timeout_ciclo else None
+    for destino in _en_orden(destinos, retrasos):
+        if retrasos and destino in retrasos:
+            _esperar_turno(origen, retrasos[destino])
+        if limite is not None and time.monotonic() >= limite:
+            resultados[destino] = DestinoOmitido(
+                f"{destino} omitido al vencer el ciclo de {timeout_ciclo} segundos")
+            continue
+        try:
+            resultados[destino] = funcion(destino)
+        except Exception as e:
+            resultados[destino] = e
+    return resultados
+
+
+def ejecutar_hilos(destinos, funcion, max_en_vuelo=MAX_EN_VUELO, timeout_destino=TIMEOUT_DESTINO,
+                   timeout_ciclo=TIMEOUT_CICLO, retrasos=None):
+    """Pool de hilos del tamaño del límite de concurrencia.
+
+    Los destinos pendientes al vencer el plazo del ciclo se cancelan y reciben
+    DestinoOmitido; los hilos en curso terminan solos cuando su RPC regresa.
+    Con `retrasos`, cada hilo espera el turno de su destino antes del ping.
+    """
+    resultados = {}
+    if not destinos:
+        return resultados
+
+    origen = time.monotonic()
+
+    def con_turno(destino):
+        _esperar_turno(origen, retrasos[destino])
+        return funcion(destino)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_en_vuelo, len(destinos))))
+    futuros = {executor.submit(con_turno if retrasos and d in retrasos else funcion, d): d
+               for d in _en_orden(destinos, retrasos)}
+    try:
+        hechos, pendientes = wait(futuros, timeout=timeout_ciclo)
+        for futuro in pendientes:
+            futuro.cancel()
+            resultados[futuros[futuro]] = DestinoOmitido(
+                f"{futuros[futuro]} cancelado al vencer el ciclo de {timeout_ciclo} segundos")
+        for futuro in hechos:
+            try:
+                resultados[futuros[futuro]] = futuro.result()
+            except Exception as e:
+                resultados[futuros[futuro]] = e
+    finally:
+        executor.shutdown(wait=False)
+    return resultados
+
+
+MOTORES = {
+    SECUENCIAL: ejecutar_secuencial,
+    HILOS: ejecutar_hilos,
+    ASYNC: ejecutar_pings,
+}
+
+
+def obtener_motor(nombre):
+    """Devuelve la función del motor `nombre`; ValueError si no existe."""
+    try:
+        return MOTORES[nombre]
+    except KeyError:
+        raise ValueError(f"Motor desconocido '{nombre}'; opciones: {', '.join(sorted(MOTORES))}")
@@ -0,0 +1,722 @@
+"""Núcleo común de los scripts de monitoreo.
+
+Cada script define sus rutas, umbrales y severidades y construye un Monitor;
+la medición, el estado, las alarmas y la ejecución del ciclo viven aquí una
+sola vez. La concurrencia la decide el motor (ver monitoreo.motores).
+"""
+import os
+import time
+from contextlib import nullcontext
+
+import yaml
+
+from monitoreo.adaptativo import COUNT_CORTO, sondeo_adaptativo
+from monitoreo.alarmas import (KEY_EXITOS, KEY_FALLOS, destino_degradado, formatear_medicion, procesar_mediciones,
+                               requiere_confirmacion, texto_rtt)
+from monitoreo.bitacora import Bitacora
+from monitoreo.cache import SUFIJO_CACHE, CacheResultados, borrar_cache, ttl_ciclo
+from monitoreo.confirmacion import MAX_CONFIRMACIONES, Confirmaciones
+from monitoreo.demonio import INTERVALO_CICLO, argumentos, ejecutar_periodicamente
+from monitoreo.estadisticas import MEDICION_FALLIDA, Medicion, extraer_ping
+from monitoreo.estado import DESTINO_HOST, AlmacenEstado
+from monitoreo.exportador import RegistroMetricas, ServidorMetricas, escribir_openmetrics
+from monitoreo.historial import registrar_mediciones
+from monitoreo.inventario import (HostNoEncontrado, InventarioInvalido, ObservadorInventario, cargar_host,
+                                  comparar_planes, plan_host)
+from monitoreo.metricas import (APERTURA, CONFIG, CPROFILE, ESTADO, EXPORTACION, HISTORIAL, HOSTNAME, RPC_PING,
+                                SYSLOG, XML, Cronometro, Perfilador, escribir_metricas, modos_perfil)
+from monitoreo.motor_async import MAX_EN_VUELO, TIMEOUT_CICLO, TIMEOUT_DESTINO, DestinoOmitido
+from monitoreo.motores import SECUENCIAL, obtener_motor
+from monitoreo.planificador import (GRACIA_PLAZO, OMITIR, SUFIJO_BLOQUEO, BloqueoCiclo, Vigilante, escalonar,
+                                    fase_host, recoger_omisiones, registrar_omision, registrar_puntualidad)
+from monitoreo.sesiones import TAMANO_POOL, PoolSesiones, SesionNoDisponible
+
+# Claves del archivo YAML
+KEY_MOTOR = "motor"  # Motor de ejecución del host (secuencial, hilos o async)
+KEY_PERFILAR = "perfilar"  # Perfila un ciclo con cprofile y/o tracemalloc
+KEY_ESCALONAR = "escalonar"  # Segundos en los que se reparten los pings del ciclo; 0 los lanza juntos
+KEY_CONFIRMACIONES = "confirmaciones"  # Reintentos rápidos que confirman una falla; 0 los desactiva
+KEY_INTERVALO_CONFIRMACION = "intervalo_confirmacion"  # Segundos entre reintentos de confirmación
+
+# Clave del estado del host con el último valor de `perfilar` ya aplicado
+KEY_PERFILADO = "perfilado"
+# Clave del estado de un destino con el instante de su último sondeo
+KEY_ULTIMO_SONDEO = "ultimo"
+
+RTT_THRESHOLD = 100  # Umbral de RTT en milisegundos
+MAX_EVENTOS = 3  # Ciclos fallidos consecutivos de un destino antes de enviar alarma
+MIN_EXITOS_LIMPIEZA = 2  # Ciclos exitosos consecutivos para limpiar la alarma de un destino
+MAX_PAQUETES_PERDIDOS = 0  # Paquetes perdidos tolerados por ping
+CONFIRMACIONES = 3  # Reintentos rápidos fallidos que levantan la alarma sin esperar más ciclos
+INTERVALO_CONFIRMACION = 15  # Segundos entre reintentos de confirmación
+SEGUNDOS_POR_PAQUETE = 1  # Junos envía un paquete por segundo fuera del modo rapid
+MARGEN_DESTINO = 10  # Segundos de holgura del plazo de un destino sobre su ráfaga
+
+CRITICAL_SEVERITY = "external.critical"
+WARNING_SEVERITY = "external.warning"
+INFO_SEVERITY = "external.info"
+
+
+def evaluar_medicion(medicion, sonda):
+    """Devuelve la Medicion con `ok` según los umbrales de la sonda.
+
+    Sin respuestas no hay RTT y el destino falla por pérdida; una medición
+    que no pudo ejecutarse sigue fallida.
+    """
+    if medicion.perdida is None:
+        return MEDICION_FALLIDA
+    ok = not (medicion.perdida > sonda.max_perdidos or medicion.rtt is None or medicion.rtt > sonda.rtt_umbral)
+    return medicion._replace(ok=ok)
+
+
+def opciones_ping(sonda):
+    """Argumentos del RPC ping para el camino y el paquete de la sonda.
+
+    El DSCP va en los 6 bits altos del byte TOS.
+    """
+    opciones = {}
+    if sonda.size:
+        opciones["size"] = str(sonda.size)
+    if sonda.origen:
+        opciones["source"] = sonda.origen
+    if sonda.interfaz:
+        opciones["interface"] = sonda.interfaz
+    if sonda.instancia:
+        opciones["routing_instance"] = sonda.instancia
+    if sonda.dscp:
+        opciones["tos"] = str(int(sonda.dscp) << 2)
+    return opciones
+
+
+def detalle_medicion(medicion):
+    """Texto del detalle de un destino degradado para el resumen del ciclo."""
+    texto = f"Perdidos={medicion.perdida}, RTT={texto_rtt(medicion.rtt)}"
+    return f"{texto}, {medicion.stats.resumen()}" if medicion.stats is not None else texto
+
+
+class Monitor:
+    """Monitoreo de los destinos de un host con un motor de ejecución intercambiable.
+
+    `fabrica` crea sesiones con el equipo (jnpr.junos.Device) y `syslog` envía
+    registros (jcs.syslog). Si se indica `obtener_hostname`, se llama sin
+    argumentos para identificar el host; si no, se pregunta al equipo por RPC.
+    """
+
+    def __init__(self, fabrica, syslog, yaml_file, state_file, history_dir, count,
+                 motor=SECUENCIAL, rtt_umbral=RTT_THRESHOLD, max_perdidos=MAX_PAQUETES_PERDIDOS,
+                 max_eventos=MAX_EVENTOS, min_exitos=MIN_EXITOS_LIMPIEZA,
+                 severidad_critica=CRITICAL_SEVERITY, severidad_aviso=WARNING_SEVERITY,
+                 severidad_info=INFO_SEVERITY, obtener_hostname=None, tamano_pool=TAMANO_POOL,
+                 politica=OMITIR, plazo_ciclo=TIMEOUT_CICLO, intervalo=INTERVALO_CICLO,
+                 metrics_file=None, escalonar=0, openmetrics_file=None, ttl_cache=None,
+                 confirmaciones=CONFIRMACIONES, intervalo_confirmacion=INTERVALO_CONFIRMACION):
+        self.fabrica = fabrica
+        self.syslog = syslog
+        self.yaml_file = yaml_file
+        self.state_file = state_file
+        self.history_dir = history_dir
+        self.count = count
+        self.motor = motor
+        self.motor_forzado = None  # Motor indicado en la línea de comandos
+        self.rtt_umbral = rtt_umbral
+        self.max_perdidos = max_perdidos
+        self.max_eventos = max_eventos
+        self.min_exitos = min_exitos
+        self.severidad_critica = severidad_critica
+        self.severidad_aviso = severidad_aviso
+        self.severidad_info = severidad_info
+        self.hostname_local = obtener_hostname
+        self.tamano_pool = tamano_pool
+        self.politica = politica  # Qué hacer si otro ciclo tiene el bloqueo: omitir o encolar
+        self.plazo_ciclo = plazo_ciclo  # Segundos máximos de pings por ciclo
+        self.intervalo = intervalo
+        self.metrics_file = metrics_file  # Registro JSONL por ciclo; None lo desactiva
+        self.escalonar = escalonar  # Ventana de escalonado por omisión si el inventario no la define
+        self.openmetrics_file = openmetrics_file  # Texto OpenMetrics reemplazado en cada ciclo; None lo desactiva
+        # Últimos valores por destino y por ciclo, para el archivo y el endpoint HTTP
+        self.registro = RegistroMetricas(os.path.splitext(os.path.basename(yaml_file))[0])
+        self.puerto_metricas = None  # Puerto local del endpoint HTTP en modo demonio
+        # Segundos que una medición sirve a otras corridas; None los deriva del intervalo y 0 desactiva la caché
+        self.ttl_cache = ttl_cache
+        # Ignora la caché al medir; la medición nueva se guarda en ella pero no cuenta para las alarmas
+        self.fresco = False
+        self.cache = None  # Caché del ciclo en curso
+        self.confirmaciones = confirmaciones
+        self.intervalo_confirmacion = intervalo_confirmacion
+        self.observador = None  # Cambios del inventario en modo demonio
+        self.crono = Cronometro()  # Tiempos por fase del ciclo en curso
+        # Agregador de syslog: un resumen por ciclo en lugar de una línea por destino
+        self.bitacora = Bitacora(syslog, severidad_info, severidad_aviso)
+
+    def log_crit(self, mensaje):
+        self.syslog(self.severidad_critica, mensaje)
+
+    @property
+    def ruta_bloqueo(self):
+        """Bloqueo junto al archivo de estado: lo comparten los scripts que escriben ese estado."""
+        return self.state_file + SUFIJO_BLOQUEO
+
+    @property
+    def ruta_cache(self):
+        return self.state_file + SUFIJO_CACHE
+
+    def cargar_config(self, hostname):
+        """Carga la configuración del host desde el índice compilado del inventario YAML."""
+        try:
+            with self.crono.fase(CONFIG):
+                return cargar_host(self.yaml_file, hostname)
+        except HostNoEncontrado as e:
+            self.log_crit(str(e))
+        except InventarioInvalido as e:
+            self.log_crit(f"Inventario inválido para {hostname}: {e}")
+        except yaml.YAMLError as e:
+            self.log_crit(f"Error al leer el YAML: {e}")
+        except Exception as e:
+            self.log_crit(f"Error inesperado al leer el YAML: {e}")
+        return {}
+
+    def config_vigente(self, hostname, config, estado):
+        """Configuración del host para este ciclo: la nueva si el inventario cambió, o la vigente.
+
+        Si el inventario nuevo no se puede leer o ya no trae al host, se sigue con el plan vigente.
+        """
+        if self.observador is None or not self.observador.cambio():
+            return config
+        nueva = self.cargar_config(hostname)
+        if not nueva:
+            return config
+        self.aplicar_cambios(hostname, config, nueva, estado)
+        return nueva
+
+    def aplicar_cambios(self, hostname, anterior, nueva, estado):
+        """Aplica al estado las diferencias entre dos configuraciones del host.
+
+        Los destinos sin cambios conservan su estado y su historial; los
+        modificados reinician la racha de fallos y éxitos (una alarma activa se
+        mantiene hasta limpiarse) y los retirados se descartan en el próximo ciclo.
+        """
+        agregados, retirados, modificados = comparar_planes(self.plan(anterior), self.plan(nueva))
+        for destino in modificados:
+            registro = estado.obtener(hostname, destino)
+            if registro:
+                estado.actualizar(hostname, destino, {**registro, KEY_FALLOS: 0, KEY_EXITOS: 0})
+        if agregados or retirados or modificados:
+            self.syslog(self.severidad_info,
+                        f"INVENTARIO: {hostname} recargado: agregados={len(agregados)} "
+                        f"retirados={len(retirados)} modificados={len(modificados)}")
+        return agregados, retirados, modificados
+
+    def cargar_estado(self):
+        """Carga el almacén de estado; si está dañado se inicia vacío."""
+        estado = AlmacenEstado(self.state_file)
+        try:
+            with self.crono.fase(ESTADO):
+                estado.cargar()
+        except Exception as e:
+            self.log_crit(f"Error al leer el estado: {e}")
+        return estado
+
+    def guardar_estado(self, estado):
+        """Guarda el estado de forma atómica, sin tocar el archivo YAML de configuración."""
+        try:
+            with self.crono.fase(ESTADO):
+                estado.guardar()
+        except Exception as e:
+            self.log_crit(f"Error al escribir el estado: {e}")
+
+    def cargar_cache(self):
+        """Lee la caché de mediciones del ciclo; sin TTL no se usa."""
+        ttl = ttl_ciclo(self.intervalo) if self.ttl_cache is None else self.ttl_cache
+        if not ttl:
+            self.cache = None
+            return
+        with self.crono.fase(ESTADO):
+            self.cache = CacheResultados(self.ruta_cache, ttl).cargar()
+
+    def guardar_cache(self, hostname, sondas, mediciones, instante):
+        """Agrega a la caché las mediciones nuevas del ciclo y la escribe."""
+        if self.cache is None:
+            return
+        for ip, medicion in mediciones.items():
+            self.cache.agregar(hostname, sondas[ip], medicion, instante)
+        try:
+            with self.crono.fase(ESTADO):
+                self.cache.guardar()
+        except Exception as e:
+            self.log_crit(f"Error al escribir la caché: {e}")
+
+    def desde_cache(self, hostname, sondas, ahora, registrar=None):
+        """{ip: Medicion} de las sondas con una medición vigente en la caché, evaluadas con sus umbrales."""
+        self.cargar_cache()
+        if self.cache is None or self.fresco:
+            return {}
+        registrar = registrar or self.bitacora.registrar
+        cacheadas = {}
+        for ip, sonda in sondas.items():
+            vigente = self.cache.obtener(hostname, sonda, ahora)
+            if vigente is None:
+                continue
+            medicion, edad = vigente
+            cacheadas[ip] = medicion = evaluar_medicion(medicion, sonda)
+            if not medicion.ok:
+                registrar(ip, f"{detalle_medicion(medicion)} (caché de {edad:.0f}s)")
+        return cacheadas
+
+    def invalidar_cache(self):
+        borrar_cache(self.ruta_cache)
+
+    def guardar_historial(self, hostname, mediciones):
+        """Agrega las mediciones del ciclo al historial local de cada destino."""
+        try:
+            with self.crono.fase(HISTORIAL):
+                errores = registrar_mediciones(self.history_dir, hostname, mediciones)
+        except Exception as e:
+            self.log_crit(f"Error al escribir el historial: {e}")
+            return
+        for ip, e in errores.items():
+            self.log_crit(f"Error al escribir el historial de {ip}: {e}")
+
+    def enviar_alarma(self, hostname, ip, medicion, reintentos=None, sonda=None):
+        """Envía una alarma al correlacionador tras los fallos consecutivos del destino.
+
+        Con `reintentos`, la falla se confirmó dentro del ciclo sin esperar los ciclos siguientes.
+        La duración de la falla sale de los `max_eventos` y el intervalo de la sonda.
+        """
+        if reintentos:
+            texto = f"ha fallado y {reintentos} reintentos de confirmación también fallaron"
+        else:
+            eventos = sonda.max_eventos if sonda else self.max_eventos
+            periodo = max(sonda.intervalo or 0, self.intervalo) if sonda else self.intervalo
+            texto = f"ha fallado durante {eventos * periodo / 60:g} minutos seguidos"
+        with self.crono.fase(SYSLOG):
+            self.bitacora.emitir(self.severidad_critica,
+                                 f"ALARMA: {hostname} con destino {ip} {texto}: {formatear_medicion(medicion)}",
+                                 limitar=False)
+
+    def enviar_limpieza(self, hostname, ip, medicion):
+        """Notifica al correlacionador que el destino se recuperó."""
+        with self.crono.fase(SYSLOG):
+            self.bitacora.emitir(self.severidad_critica,
+                                 f"LIMPIEZA: {hostname} con destino {ip} se ha recuperado: "
+                                 f"{formatear_medicion(medicion)}", limitar=False)
+
+    def obtener_hostname(self, pool):
+        """Obtiene el hostname del host local o, por defecto, del equipo vía RPC."""
+        if self.hostname_local is not None:
+            with self.crono.fase(HOSTNAME):
+                return self.hostname_local()
+        try:
+            with pool.sesion() as dev, self.crono.fase(HOSTNAME):
+                hostname = dev.rpc.get_software_information().findtext(".//host-name")
+            if hostname:
+                return hostname
+            self.log_crit("No se pudo obtener el hostname del dispositivo.")
+        except Exception as e:
+            self.log_crit(f"Error al obtener el hostname: {str(e)}")
+        return None
+
+    def medir_ping(self, pool, sonda, count, rapido=False, registrar=None, detalle=True):
+        """Ejecuta un ping de `count` paquetes a la sonda con una sesión del pool y devuelve su Medicion.
+
+        `registrar(ip, texto)` recibe el detalle de los fallos; por defecto, la bitácora del monitor.
+        Sin `detalle` solo se lee el resumen de la respuesta y la Medicion queda sin estadísticas.
+        """
+        registrar = registrar or self.bitacora.registrar
+        ip = sonda.destino
+        opciones = opciones_ping(sonda)
+        if rapido:
+            opciones["rapid"] = True
+        with pool.sesion() as dev, self.crono.fase(RPC_PING):
+            result = dev.rpc.ping(host=sonda.ip, count=str(count), **opciones)
+
+        with self.crono.fase(XML):
+            # Percentiles, jitter y ráfagas de pérdida a partir de cada probe-result
+            enviados, recibidos, rtt, stats = extraer_ping(result, detalle)
+            del result
+            if enviados is None or recibidos is None:
+                registrar(ip, "Ping incompleto")
+                return MEDICION_FALLIDA
+        return evaluar_medicion(Medicion(None, enviados - recibidos, rtt, stats), sonda)
+
+    def hacer_ping(self, pool, sonda, degradado=False, registrar=None):
+        """Ejecuta un ping adaptativo a la sonda y devuelve la Medicion del resultado."""
+        registrar = registrar or self.bitacora.registrar
+        ip = sonda.destino
+        try:
+            # Sondeo corto primero; la ráfaga completa solo ante sospecha
+            # o si el destino ya venía degradado
+            medicion = sondeo_adaptativo(
+                lambda count, rapido: self.medir_ping(pool, sonda, count, rapido, registrar),
+                degradado, COUNT_CORTO, sonda.count, sonda.rtt_umbral, sonda.max_perdidos)
+
+            if not medicion.ok and medicion.stats is not None:
+                registrar(ip, detalle_medicion(medicion))
+            return medicion
+        except SesionNoDisponible:
+            raise  # Sin sesión el destino no llegó a medirse: el motor lo deja omitido
+        except Exception as e:
+            registrar(ip, f"Error: {str(e)}")
+        return MEDICION_FALLIDA
+
+    def motor_de(self, config, forzado=None):
+        """Nombre y función del motor: `forzado`, línea de comandos, inventario del host o el del script."""
+        nombre = forzado or self.motor_forzado or config.get(KEY_MOTOR) or self.motor
+        try:
+            return nombre, obtener_motor(nombre)
+        except ValueError as e:
+            self.log_crit(f"{e}. Se usa el motor '{self.motor}'")
+            return self.motor, obtener_motor(self.motor)
+
+    def nuevo_pool(self):
+        """Pool de sesiones cuyas aperturas se miden en la fase de apertura."""
+        return PoolSesiones(self.fabrica, self.tamano_pool,
+                            al_abrir=lambda segundos: self.crono.sumar(APERTURA, segundos))
+
+    def perfil_pendiente(self, hostname, config, estado):
+        """Modos de perfilado para este ciclo según `perfilar` del inventario.
+
+        Cada valor de `perfilar` se aplica a un solo ciclo; para volver a
+        perfilar se quita la clave durante un ciclo o se cambia su valor.
+        """
+        valor = config.get(KEY_PERFILAR)
+        registro = estado.obtener(hostname, DESTINO_HOST, {})
+        if registro.get(KEY_PERFILADO) == valor:
+            return ()
+        registro = dict(registro)
+        if valor:
+            registro[KEY_PERFILADO] = valor
+        else:
+            registro.pop(KEY_PERFILADO, None)
+        estado.actualizar(hostname, DESTINO_HOST, registro)
+        try:
+            return modos_perfil(valor)
+        except ValueError as e:
+            self.log_crit(str(e))
+            return ()
+
+    def ejecutar_ciclo(self, pool, hostname, config, estado):
+        """Ejecuta un ciclo de pings, perfilado si el inventario lo pide, y registra sus métricas.
+
+        cProfile solo perfila el hilo que lo activa, así que el ciclo perfilado
+        con cprofile corre con el motor secuencial: todos los pings pasan por
+        este hilo. Ese ciclo tarda más y el plazo del ciclo puede dejar destinos
+        omitidos; los reintentos de confirmación quedan fuera del perfil.
+        """
+        modos = self.perfil_pendiente(hostname, config, estado)
+        base = os.path.splitext(self.metrics_file or self.state_file)[0]
+        ruta_perfil = f"{base}.perfil-{int(time.time())}" if modos else None
+        perfilador = Perfilador(ruta_perfil, modos) if modos else nullcontext()
+        motor = SECUENCIAL if CPROFILE in modos else None
+        with perfilador:
+            nombre, mediciones, duracion = self._ciclo(pool, hostname, config, estado, motor)
+
+        extra = {}
+        if modos:
+            extra["perfil"] = ruta_perfil
+            if perfilador.pico_memoria is not None:
+                extra["memoria_pico"] = perfilador.pico_memoria
+        self.registrar_metricas(hostname, nombre, mediciones, duracion, **extra)
+        return duracion
+
+    def registrar_metricas(self, hostname, motor, mediciones, duracion, **extra):
+        """Agrega el registro compacto del ciclo al archivo de métricas, si está configurado."""
+        registro = {"ts": int(time.time()), "host": hostname, "motor": motor,
+                    "destinos": len(mediciones), "ok": sum(1 for m in mediciones.values() if m.ok),
+                    "duracion": round(duracion, 3), "total": round(self.crono.transcurrido(), 3),
+                    "fases": self.crono.fases(), **extra}
+        if self.metrics_file:
+            try:
+                escribir_metricas(self.metrics_file, registro)
+            except Exception as e:
+                self.log_crit(f"Error al escribir las métricas: {e}")
+
+    def plan(self, config):
+        """Sondas del host, con los parámetros que el inventario no define tomados del script."""
+        return plan_host(config, {"count": self.count, "rtt_umbral": self.rtt_umbral,
+                                  "max_perdidos": self.max_perdidos, "max_eventos": self.max_eventos,
+                                  "min_exitos": self.min_exitos})
+
+    def toca_sondear(self, sonda, registro, ahora):
+        """Una sonda con `intervalo` mayor al del ciclo solo se ejecuta cuando le corresponde."""
+        if not sonda.intervalo or sonda.intervalo <= self.intervalo:
+            return True
+        ultimo = (registro or {}).get(KEY_ULTIMO_SONDEO)
+        # Medio ciclo de tolerancia para no saltar un ciclo por unos segundos de deriva
+        return ultimo is None or ahora - ultimo >= sonda.intervalo - self.intervalo / 2
+
+    def preparar_sondas(self, hostname, config, estado, ahora):
+        """Devuelve ({ip: Sonda} que tocan en este ciclo, [ip en espera por su intervalo])."""
+        sondas = {}
+        en_espera = []
+        for sonda in self.plan(config):
+            if self.toca_sondear(sonda, estado.obtener(hostname, sonda.destino), ahora):
+                sondas[sonda.destino] = sonda
+            else:
+                en_espera.append(sonda.destino)
+        return sondas, en_espera
+
+    def plazo_destino(self, sondas):
+        """Plazo de cada destino del ciclo: TIMEOUT_DESTINO, o más si la ráfaga más larga no cabe en él."""
+        rafaga = max((sonda.count for sonda in sondas), default=0)
+        plazo = max(TIMEOUT_DESTINO, rafaga * SEGUNDOS_POR_PAQUETE + MARGEN_DESTINO)
+        if plazo > self.plazo_ciclo:
+            self.log_crit(f"Una ráfaga de {rafaga} paquetes no cabe en el plazo del ciclo de {self.plazo_ciclo}s")
+        return plazo
+
+    def retrasos(self, hostname, config, claves, plazo_destino=TIMEOUT_DESTINO):
+        """Arranque escalonado de cada clave, o None si el host no escalona.
+
+        La ventana se recorta para que el último ping aún tenga su plazo completo
+        dentro del plazo del ciclo.
+        """
+        ventana = min(float(config.get(KEY_ESCALONAR, self.escalonar) or 0), self.plazo_ciclo - plazo_destino)
+        if ventana <= 0 or not claves:
+            return None
+        return escalonar(claves, ventana, fase_host(hostname))
+
+    def ejecutar_motor(self, motor, nombre, pool, claves, funcion, registrar=None, retrasos=None,
+                       plazo_destino=TIMEOUT_DESTINO):
+        """Ejecuta funcion(clave) con el motor y devuelve {clave: Medicion}; los errores quedan fallidos.
+
+        Las claves que no alcanzaron a medirse dentro del plazo del ciclo, o
+        que no obtuvieron una sesión del pool, no aparecen en el resultado:
+        quedan omitidas, no fallidas.
+        """
+        registrar = registrar or self.bitacora.registrar
+        # El motor secuencial usa una sola sesión; los concurrentes, una por ping en vuelo
+        max_en_vuelo = 1 if nombre == SECUENCIAL else min(MAX_EN_VUELO, pool.tamano)
+        resultados = motor(claves, funcion, max_en_vuelo=max_en_vuelo, timeout_destino=plazo_destino,
+                           timeout_ciclo=self.plazo_ciclo, retrasos=retrasos)
+        mediciones = {}
+        for clave in claves:
+            resultado = resultados[clave]
+            if isinstance(resultado, (DestinoOmitido, SesionNoDisponible)):
+                continue
+            if isinstance(resultado, Exception):
+                registrar(clave, f"Error: {str(resultado)}")
+                resultado = MEDICION_FALLIDA
+            mediciones[clave] = resultado
+        return mediciones
+
+    def _ciclo(self, pool, hostname, config, estado, motor=None):
+        inicio = time.time()
+        nombre, motor = self.motor_de(config, motor)
+        sondas, en_espera = self.preparar_sondas(hostname, config, estado, inicio)
+        cacheadas = self.desde_cache(hostname, sondas, inicio)
+        pendientes = [ip for ip in sondas if ip not in cacheadas]
+        plazo = self.plazo_destino([sondas[ip] for ip in pendientes])
+        confirmaciones = self.confirmaciones_ciclo(pool, sondas, config, inicio)
+
+        def confirmar_si_falla(ip, medicion):
+            if not medicion.ok and requiere_confirmacion(estado.obtener(hostname, ip), sondas[ip].max_eventos):
+                confirmaciones.lanzar(ip)
+
+        def medir(ip):
+            medicion = self.hacer_ping(pool, sondas[ip], destino_degradado(estado.obtener(hostname, ip)))
+            # La confirmación arranca ya, sin esperar al resto de la ráfaga escalonada
+            confirmar_si_falla(ip, medicion)
+            return medicion
+
+        medidas = self.ejecutar_motor(motor, nombre, pool, pendientes, medir,
+                                      retrasos=self.retrasos(hostname, config, pendientes, plazo),
+                                      plazo_destino=plazo)
+        # Las que fallaron por el plazo o un error del motor se confirman al terminar
+        for ip, medicion in medidas.items():
+            confirmar_si_falla(ip, medicion)
+        confirmados = confirmaciones.resultados()
+        omitidas = [ip for ip in pendientes if ip not in medidas]
+        mediciones = {ip: cacheadas[ip] if ip in cacheadas else medidas[ip] for ip in sondas if ip not in omitidas}
+        return nombre, mediciones, self.cerrar_mediciones(hostname, estado, sondas, en_espera, mediciones, inicio,
+                                                          cacheadas, confirmados, omitidas)
+
+    def confirmaciones_ciclo(self, pool, sondas, config, inicio, registrar=None):
+        """Reintentos rápidos de las sondas que fallen en este ciclo (ver monitoreo.confirmacion).
+
+        Cada ronda repite un sondeo corto a la sonda tras el intervalo de
+        confirmación; una que pasa vuelve a la cadencia normal. Las notas se
+        agregan al detalle del destino en el resumen, sin reemplazarlo. Con más
+        de una sesión en el pool, las confirmaciones simultáneas dejan una libre.
+        Una corrida -fresco no confirma: sus mediciones no cuentan para las alarmas.
+        """
+        registrar = registrar or self.bitacora.agregar
+        rondas = 0 if self.fresco else int(config.get(KEY_CONFIRMACIONES, self.confirmaciones) or 0)
+        intervalo = float(config.get(KEY_INTERVALO_CONFIRMACION, self.intervalo_confirmacion))
+        return Confirmaciones(
+            rondas, intervalo,
+            lambda clave: self.medir_ping(pool, sondas[clave], COUNT_CORTO, True, registrar, detalle=False),
+            inicio + self.plazo_ciclo, TIMEOUT_DESTINO, registrar,
+            maximo=min(MAX_CONFIRMACIONES, max(1, pool.tamano - 1)))
+
+    def cerrar_mediciones(self, hostname, estado, sondas, en_espera, mediciones, inicio, cacheadas=(),
+                          confirmados=None, omitidas=()):
+        """Aplica las mediciones al estado, guarda y envía el resumen; devuelve la duración del ciclo.
+
+        Las mediciones tomadas de la caché salen en el resumen pero no vuelven a
+        contar para las alarmas ni el historial: ya se aplicaron en su ciclo.
+        Los destinos en `confirmados` ({ip: reintentos}) alarman en este ciclo.
+        Los de `omitidas`, que el plazo del ciclo dejó sin medir, conservan su
+        estado como los que están en espera y solo se cuentan en el resumen.
+        Las mediciones de una corrida -fresco, que lanza un operador fuera de la
+        cadencia del ciclo, van al resumen, al historial y a la caché, pero no
+        avanzan los fallos ni los éxitos consecutivos.
+        """
+        confirmados = confirmados or {}
+        nuevas = {ip: m for ip, m in mediciones.items() if ip not in cacheadas}
+        contables = {} if self.fresco else nuevas
+        # Actualizar el estado de cada destino y enviar sus alarmas o limpiezas,
+        # con los umbrales propios de cada sonda
+        procesar_mediciones(hostname, contables, estado,
+                            lambda h, ip, m: self.enviar_alarma(h, ip, m, confirmados.get(ip), sondas.get(ip)),
+                            self.enviar_limpieza,
+                            umbral_alarma=self.max_eventos, umbral_limpieza=self.min_exitos,
+                            reservados=(DESTINO_HOST, *en_espera, *cacheadas, *omitidas, *nuevas),
+                            umbrales={ip: (1 if ip in confirmados else s.max_eventos, s.min_exitos)
+                                      for ip, s in sondas.items()})
+        for ip in contables:
+            sonda = sondas[ip]
+            if sonda.intervalo and sonda.intervalo > self.intervalo:
+                estado.actualizar(hostname, ip, {**estado.obtener(hostname, ip, {}),
+                                                 KEY_ULTIMO_SONDEO: int(inicio)})
+
+        # Ciclos omitidos desde el anterior y si este terminó fuera de plazo
+        duracion = time.time() - inicio
+        omitidos, ultimo_omitido = recoger_omisiones(self.ruta_bloqueo)
+        if registrar_puntualidad(estado, hostname, duracion, self.plazo_ciclo, omitidos, ultimo_omitido):
+            self.bitacora.emitir(self.severidad_aviso,
+                                 f"CICLO TARDIO: {hostname} tardó {duracion:.1f}s, plazo {self.plazo_ciclo}s")
+        if omitidos:
+            self.bitacora.emitir(self.severidad_aviso,
+                                 f"CICLOS OMITIDOS: {hostname} omitió {omitidos} ciclo(s) por desborde")
+        self.guardar_estado(estado)
+        self.guardar_historial(hostname, nuevas)
+        self.guardar_cache(hostname, sondas, nuevas, inicio)
+
+        # Un solo registro de syslog con el resumen del ciclo
+        duracion = time.time() - inicio
+        with self.crono.fase(SYSLOG):
+            self.bitacora.cerrar_ciclo(hostname, mediciones, duracion, len(omitidas))
+        self.exportar(hostname, estado, [*en_espera, *omitidas], mediciones, duracion)
+        return duracion
+
+    def exportar(self, hostname, estado, en_espera, mediciones, duracion):
+        """Actualiza el registro de métricas y reemplaza el archivo OpenMetrics, si está configurado."""
+        self.registro.actualizar(hostname, mediciones, estado, en_espera, duracion, time.time())
+        if not self.openmetrics_file:
+            return
+        with self.crono.fase(EXPORTACION):
+            try:
+                escribir_openmetrics(self.openmetrics_file, [self.registro])
+            except Exception as e:
+                self.log_crit(f"Error al escribir {self.openmetrics_file}: {e}")
+
+    def adquirir_bloqueo(self):
+        """Toma el bloqueo del ciclo según la política; si no se obtiene, anota la omisión."""
+        bloqueo = BloqueoCiclo(self.ruta_bloqueo, self.politica, espera=self.intervalo)
+        try:
+            if bloqueo.adquirir():
+                return bloqueo
+            registrar_omision(self.ruta_bloqueo)
+        except Exception as e:
+            self.log_crit(f"Error con el bloqueo del ciclo {self.ruta_bloqueo}: {e}")
+            return None
+        self.syslog(self.severidad_aviso, "Ciclo omitido: el ciclo anterior sigue en curso")
+        return None
+
+    def _plazo_vencido(self):
+        # Un RPC colgado no debe retener el bloqueo ni apilar procesos: se aborta
+        # la corrida y el sistema libera el flock
+        self.log_crit(f"El ciclo excedió su plazo de {self.plazo_ciclo + GRACIA_PLAZO}s; se aborta")
+        os._exit(1)
+
+    def main(self):
+        """Una corrida: un ciclo sobre los destinos del host. Devuelve su duración o None.
+
+        Solo corre si obtiene el bloqueo del ciclo, y se aborta si excede el
+        plazo duro del ciclo más la gracia.
+        """
+        bloqueo = self.adquirir_bloqueo()
+        if bloqueo is None:
+            return None
+        self.crono = Cronometro()
+        try:
+            with Vigilante(self.plazo_ciclo + GRACIA_PLAZO, self._plazo_vencido), self.nuevo_pool() as pool:
+                hostname = self.obtener_hostname(pool)
+                if not hostname:
+                    return None  # Si no se pudo obtener el hostname, terminar el proceso
+
+                # Cargar solo la configuración de este host
+                config = self.cargar_config(hostname)
+                if not config:
+                    return None
+
+                return self.ejecutar_ciclo(pool, hostname, config, self.cargar_estado())
+        finally:
+            bloqueo.liberar()
+
+    def ciclo_demonio(self, pool, cache):
+        """Un ciclo del modo residente con el hostname y la configuración de `cache`.
+
+        El estado se vuelve a leer bajo el bloqueo en cada ciclo: las corridas
+        del script que comparten el archivo pudieron escribirlo desde el anterior.
+        """
+        self.crono = Cronometro()
+        if not cache.get("hostname"):
+            cache["hostname"] = self.obtener_hostname(pool)
+            if not cache["hostname"]:
+                return None  # Se reintenta obtener el hostname en el siguiente ciclo
+        if not cache.get("config"):
+            cache["config"] = self.cargar_config(cache["hostname"])
+        if not cache["config"]:
+            return None
+        # El bloqueo excluye a las invocaciones del script que coincidan con el demonio
+        bloqueo = self.adquirir_bloqueo()
+        if bloqueo is None:
+            return None
+        try:
+            estado = self.cargar_estado()
+            cache["config"] = self.config_vigente(cache["hostname"], cache["config"], estado)
+            return self.ejecutar_ciclo(pool, cache["hostname"], cache["config"], estado)
+        finally:
+            bloqueo.liberar()
+
+    def demonio(self, intervalo):
+        """Modo residente: mantiene el pool de sesiones abierto y repite el ciclo con cadencia fija."""
+        pool = self.nuevo_pool()
+        cache = {}  # Hostname y configuración cacheados entre ciclos
+        # Un stat() por ciclo: solo se vuelve a cargar la configuración si el inventario cambió
+        self.observador = ObservadorInventario(self.yaml_file)
+
+        def ciclo():
+            self.ciclo_demonio(pool, cache)
+
+        try:
+            with self.servidor_metricas([self.registro]):
+                ejecutar_periodicamente(ciclo, intervalo,
+                                        al_error=lambda e: self.log_crit(f"Error en el ciclo del demonio: {str(e)}"),
+                                        politica=self.politica,
+                                        al_omitir=lambda n: registrar_omision(self.ruta_bloqueo, n))
+        finally:
+            pool.cerrar()
+
+    def servidor_metricas(self, registros):
+        """Endpoint HTTP con los registros si se pidió un puerto; si no, un contexto vacío."""
+        if not self.puerto_metricas:
+            return nullcontext()
+        return ServidorMetricas(self.puerto_metricas, registros)
+
+    def ejecutar(self, argv=None):
+        """Punto de entrada de los scripts: una corrida o modo demonio según los argumentos."""
+        args = argumentos(argv)
+        self.motor_forzado = args.motor
+        self.puerto_metricas = args.puerto_metricas
+        self.fresco = args.fresco
+        if args.invalidar:
+            self.invalidar_cache()
+            return None
+        if args.politica:
+            self.politica = args.politica
+        if args.demonio:
+            self.intervalo = args.intervalo
+            self.demonio(args.intervalo)
+            return None
+        return self.main()
@@ -0,0 +1,178 @@
+"""Exclusión entre ciclos, plazo duro y registro de ciclos tardíos u omitidos.
+
+Junos puede lanzar una nueva invocación del script mientras la anterior sigue
+corriendo. Cada ciclo toma un bloqueo exclusivo (fcntl.flock) junto al archivo
+de estado; la invocación que no lo obtiene se omite o, con la política
+`encolar`, espera a que termine el ciclo en curso (solo una puede esperar).
+Las omisiones se anotan en un archivo aparte y las recoge el siguiente ciclo
+que tenga el bloqueo, que es el único que escribe el estado.
+
+Dentro del ciclo, los pings pueden escalonarse: sus arranques se reparten de
+forma uniforme en una ventana y la rejilla se desplaza con una fase fija
+derivada del hostname, para que los equipos que comparten destinos no los
+sondeen todos en el mismo segundo.
+"""
+import fcntl
+import hashlib
+import os
+import threading
+import time
+
+from monitoreo.estado import DESTINO_HOST
+
+OMITIR = "omitir"  # Si hay un ciclo en curso, la invocación nueva no se ejecuta
+ENCOLAR = "encolar"  # La invocación nueva espera a que termine el ciclo en curso
+POLITICAS = (OMITIR, ENCOLAR)
+
+SUFIJO_BLOQUEO = ".lock"
+SUFIJO_COLA = ".cola"
+SUFIJO_OMITIDOS = ".omitidos"
+SONDEO_BLOQUEO = 0.5  # Segundos entre intentos de tomar el bloqueo al esperar
+GRACIA_PLAZO = 30  # Segundos tras el plazo del ciclo antes de abortar el proceso
+
+# Claves del registro de puntualidad, bajo el destino reservado del host
+KEY_TARDIOS = "ciclos_tardios"
+KEY_OMITIDOS = "ciclos_omitidos"
+KEY_ULTIMO_TARDIO = "ultimo_tardio"
+KEY_ULTIMO_OMITIDO = "ultimo_omitido"
+KEY_DURACION = "ultima_duracion"
+
+
+def _tomar(ruta, espera=0):
+    """Toma un flock exclusivo sobre `ruta`; devuelve el descriptor o None."""
+    fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o644)
+    limite = time.monotonic() + espera
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except BlockingIOError:
+            if time.monotonic() >= limite:
+                os.close(fd)
+                return None
+            time.sleep(SONDEO_BLOQUEO)
+
+
+def _soltar(fd):
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+class BloqueoCiclo:
+    """Bloqueo exclusivo de un ciclo con política de omitir o encolar.
+
+    El sistema operativo libera el flock si el proceso muere, por lo que un
+    ciclo abortado nunca deja el bloqueo tomado.
+    """
+
+    def __init__(self, ruta, politica=OMITIR, espera=0):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política desconocida '{politica}'; opciones: {', '.join(POLITICAS)}")
+        self.ruta = ruta
+        self.politica = politica
+        self.espera = espera
+        self._fd = None
+
+    def adquirir(self):
+        """Intenta tomar el bloqueo según la política; devuelve True si se obtuvo."""
+        self._fd = _tomar(self.ruta)
+        if self._fd is None and self.politica == ENCOLAR:
+            # Solo una invocación espera; las demás se omiten en lugar de apilarse
+            cola = _tomar(self.ruta + SUFIJO_COLA)
+            if cola is not None:
+                try:
+                    self._fd = _tomar(self.ruta, self.espera)
+                finally:
+                    _soltar(cola)
+        return self._fd is not None
+
+    def liberar(self):
+        if self._fd is not None:
+            _soltar(self._fd)
+            self._fd = None
+
+
+def registrar_omision(ruta, cantidad=1, instante=None):
+    """Anota ciclos omitidos; la escritura en modo append no requiere el bloqueo."""
+    linea = f"{instante if instante is not None else time.time():.0f} {cantidad}\n".encode()
+    fd = os.open(ruta + SUFIJO_OMITIDOS, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, linea)
+    finally:
+        os.close(fd)
+
+
+def recoger_omisiones(ruta):
+    """Devuelve (cantidad, último instante) de las omisiones anotadas y las vacía.
+
+    Debe llamarse con el bloqueo del ciclo tomado.
+    """
+    try:
+        with open(ruta + SUFIJO_OMITIDOS, "r+") as archivo:
+            lineas = archivo.read().split("\n")
+            archivo.truncate(0)
+    except FileNotFoundError:
+        return 0, None
+
+    cantidad, ultimo = 0, None
+    for linea in lineas:
+        try:
+            instante, n = linea.split()
+            cantidad += int(n)
+            ultimo = max(ultimo or 0, int(instante))
+        except ValueError:
+            continue  # Línea vacía o escrita a medias
+    return cantidad, ultimo
+
+
+def registrar_puntualidad(estado, hostname, duracion, plazo, omitidos=0, ultimo_omitido=None,
+                          instante=None):
+    """Actualiza los contadores de ciclos tardíos y omitidos del host.
+
+    Devuelve True si este ciclo terminó después de su plazo.
+    """
+    instante = int(instante if instante is not None else time.time())
+    registro = dict(estado.obtener(hostname, DESTINO_HOST, {}))
+    tardio = duracion > plazo
+    if tardio:
+        registro[KEY_TARDIOS] = registro.get(KEY_TARDIOS, 0) + 1
+        registro[KEY_ULTIMO_TARDIO] = instante
+    if omitidos:
+        registro[KEY_OMITIDOS] = registro.get(KEY_OMITIDOS, 0) + omitidos
+        registro[KEY_ULTIMO_OMITIDO] = ultimo_omitido or instante
+    registro[KEY_DURACION] = round(duracion, 3)
+    estado.actualizar(hostname, DESTINO_HOST, registro)
+    return tardio
+
+
+class Vigilante:
+    """Ejecuta `accion` si el ciclo no terminó `plazo` segundos después de iniciar.
+
+    El temporizador es un hilo daemon; cancelar() lo detiene al cerrar el ciclo.
+    """
+
+    def __init__(self, plazo, accion):
+        self._temporizador = threading.Timer(plazo, accion)
+        self._temporizador.daemon = True
+
+    def __enter__(self):
+        self._temporizador.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._temporizador.cancel()
+        return False
+
+
+def fase_host(hostname):
+    """Fracción en [0, 1) estable para el hostname: igual en cada ciclo, distinta entre equipos."""
+    resumen = hashlib.sha1(hostname.encode()).digest()
+    return int.from_bytes(resumen[:8], "big") / 2 ** 64
+
+
+def escalonar(claves, ventana, fase=0.0):
+    """{clave: segundos desde el inicio del ciclo}, uno cada ventana/n y desplazados por `fase`."""
+    n = len(claves)
+    return {clave: ((fase + i / n) % 1.0) * ventana for i, clave in enumerate(claves)}
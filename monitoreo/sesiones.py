@@ -0,0 +1,141 @@
+"""Pool acotado y reutilizable de sesiones NETCONF con el equipo."""
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from monitoreo.motor_async import fuera_de_plazo
+
+TAMANO_POOL = 4  # Sesiones simultáneas como máximo
+ESPERA_SESION = 60  # Segundos máximos esperando una sesión libre
+
+
+class SesionNoDisponible(Exception):
+    """No se obtuvo una sesión libre del pool dentro del tiempo de espera."""
+
+
+def sesion_conectada(dev):
+    """Chequeo de salud por defecto: la sesión sigue abierta."""
+    return bool(getattr(dev, "connected", False))
+
+
+class PoolSesiones:
+    """Pool de sesiones `Device` abiertas de forma perezosa y reutilizadas entre pings.
+
+    El costo de abrir la sesión se paga una vez por lugar del pool. Antes de
+    entregar una sesión se verifica con `chequeo`; si falló, se reconecta. Una
+    sesión que falla durante su uso y ya no pasa el chequeo se descarta. Si se
+    indica `al_abrir`, recibe los segundos que tardó cada apertura.
+    """
+
+    def __init__(self, fabrica, tamano=TAMANO_POOL, chequeo=sesion_conectada, espera=ESPERA_SESION,
+                 al_abrir=None):
+        if tamano < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self.fabrica = fabrica
+        self.tamano = tamano
+        self.chequeo = chequeo
+        self.espera = espera
+        self.al_abrir = al_abrir
+        self._libres = queue.LifoQueue()  # LIFO: se reutilizan las sesiones más recientes
+        self._todas = []
+        self._lock = threading.Lock()
+
+    def _abrir(self):
+        inicio = time.perf_counter()
+        dev = self.fabrica()
+        dev.open()
+        if self.al_abrir is not None:
+            self.al_abrir(time.perf_counter() - inicio)
+        return dev
+
+    def _cerrar_dev(self, dev):
+        try:
+            dev.close()
+        except Exception:
+            pass  # La sesión ya estaba caída
+
+    def _descartar(self, dev):
+        self._cerrar_dev(dev)
+        with self._lock:
+            if dev in self._todas:
+                self._todas.remove(dev)
+
+    def _tomar(self, espera):
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Abrir una sesión nueva solo si aún hay lugar en el pool
+        with self._lock:
+            crear = len(self._todas) < self.tamano
+            if crear:
+                self._todas.append(None)  # Reserva el lugar mientras se abre
+        if crear:
+            try:
+                dev = self._abrir()
+            except Exception:
+                with self._lock:
+                    self._todas.remove(None)
+                raise
+            with self._lock:
+                self._todas[self._todas.index(None)] = dev
+            return dev
+
+        try:
+            return self._libres.get(timeout=espera)
+        except queue.Empty:
+            raise SesionNoDisponible(f"Sin sesiones libres tras {espera} segundos")
+
+    def _reconectar(self, dev):
+        """Reemplaza una sesión que no pasó el chequeo por una nueva."""
+        self._cerrar_dev(dev)
+        try:
+            nuevo = self._abrir()
+        except Exception:
+            with self._lock:
+                self._todas.remove(dev)
+            raise
+        with self._lock:
+            self._todas[self._todas.index(dev)] = nuevo
+        return nuevo
+
+    @contextmanager
+    def sesion(self, espera=None):
+        """Entrega una sesión sana del pool y la devuelve al terminar.
+
+        Esperar y abrir la sesión no cuenta para el plazo del destino en curso.
+        """
+        with fuera_de_plazo():
+            dev = self._tomar(self.espera if espera is None else espera)
+            if not self.chequeo(dev):
+                dev = self._reconectar(dev)
+        try:
+            yield dev
+        except Exception:
+            if not self.chequeo(dev):
+                self._descartar(dev)
+                raise
+            self._libres.put(dev)
+            raise
+        else:
+            self._libres.put(dev)
+
+    def cerrar(self):
+        """Cierra todas las sesiones abiertas del pool."""
+        with self._lock:
+            todas, self._todas = [d for d in self._todas if d is not None], []
+        while True:
+            try:
+                self._libres.get_nowait()
+            except queue.Empty:
+                break
+        for dev in todas:
+            self._cerrar_dev(dev)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
@@ -0,0 +1,16 @@
+import monitoreo_telcel
+import monitoreo_trayectorias_telcel
+from monitoreo.combinado import MonitorCombinado
+
+# Perfiles de este equipo: cada destino repetido entre ellos se sondea una sola vez por ciclo.
+# El primero aporta el motor, el pool de sesiones y los plazos del ciclo.
+monitor = MonitorCombinado([monitoreo_telcel.monitor, monitoreo_trayectorias_telcel.monitor])
+
+
+def main():
+    """Ejecuta un ciclo combinado de todos los perfiles del equipo."""
+    monitor.main()
+
+
+if __name__ == "__main__":
+    monitor.ejecutar()
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+import yaml
+
+# Los scripts y el paquete monitoreo viven en la raíz del repositorio, sin instalar
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.dispositivo_simulado import DispositivoSimulado, PerfilSimulado  # noqa: E402
+from monitoreo.nucleo import Monitor  # noqa: E402
+
+HOST_PRUEBA = "opint-prueba-1"
+
+
+@pytest.fixture
+def equipo():
+    """Perfil del equipo simulado que usan las sesiones de los monitores de prueba."""
+    perfil = PerfilSimulado(hostname=HOST_PRUEBA, latencia=0, apertura=0, rtt_jitter_ms=0, semilla=1)
+    DispositivoSimulado.perfil = perfil
+    return perfil
+
+
+@pytest.fixture
+def crear_monitor(tmp_path, equipo):
+    """Construye Monitores sobre el equipo simulado.
+
+    Los monitores del mismo `perfil` comparten inventario, estado e historial;
+    el inventario se escribe con los `destinos` del primero que se crea. Cada
+    monitor guarda sus registros de syslog en `monitor.mensajes`.
+    """
+    def crear(destinos=("10.0.0.1",), perfil="destinos", **opciones):
+        inventario = tmp_path / f"{perfil}.yml"
+        if not inventario.exists():
+            inventario.write_text(yaml.safe_dump({"hosts": {HOST_PRUEBA: {"destinos": list(destinos)}}}))
+        mensajes = []
+        opciones = {"obtener_hostname": lambda: HOST_PRUEBA, "confirmaciones": 0, "ttl_cache": 0,
+                    **opciones}
+        monitor = Monitor(DispositivoSimulado, lambda severidad, mensaje: mensajes.append(mensaje),
+                          str(inventario), str(tmp_path / f"estado_{perfil}.json"),
+                          str(tmp_path / f"historial_{perfil}"), 5, **opciones)
+        monitor.mensajes = mensajes
+        return monitor
+
+    return crear
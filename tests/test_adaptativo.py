@@ -0,0 +1,42 @@
+import pytest
+
+from monitoreo.adaptativo import sondeo_adaptativo
+from monitoreo.estadisticas import MEDICION_FALLIDA, Medicion
+
+
+def medidor(corta):
+    llamadas = []
+
+    def medir(count, rapido):
+        llamadas.append((count, rapido))
+        return corta if count == 5 else Medicion(True, 0, 8.0, None)
+
+    return medir, llamadas
+
+
+def test_sondeo_corto_sano_no_envia_la_rafaga():
+    medir, llamadas = medidor(Medicion(None, 0, 10.0, None))
+    assert sondeo_adaptativo(medir, False, 5, 50, 100, 0).rtt == 10.0
+    assert llamadas == [(5, True)]
+
+
+@pytest.mark.parametrize("corta", [Medicion(None, 1, 10.0, None),  # Pérdida
+                                   Medicion(None, 0, 90.0, None),  # RTT cerca del umbral
+                                   Medicion(None, 5, None, None),  # Sin respuestas
+                                   MEDICION_FALLIDA])
+def test_sospecha_confirma_con_la_rafaga_completa(corta):
+    medir, llamadas = medidor(corta)
+    sondeo_adaptativo(medir, False, 5, 50, 100, 0)
+    assert llamadas == [(5, True), (50, False)]
+
+
+def test_destino_degradado_recibe_la_rafaga_directamente():
+    medir, llamadas = medidor(Medicion(None, 0, 10.0, None))
+    sondeo_adaptativo(medir, True, 5, 50, 100, 0)
+    assert llamadas == [(50, False)]
+
+
+def test_rafaga_no_mayor_que_el_sondeo_corto():
+    medir, llamadas = medidor(Medicion(None, 0, 10.0, None))
+    sondeo_adaptativo(medir, False, 5, 5, 100, 0)
+    assert llamadas == [(5, False)]
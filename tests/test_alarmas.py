@@ -0,0 +1,55 @@
+from monitoreo.alarmas import (ALARMA, KEY_ALARMA, KEY_EXITOS, KEY_FALLOS, LIMPIEZA, evaluar_destino,
+                               procesar_mediciones)
+from monitoreo.estadisticas import MEDICION_FALLIDA, Medicion
+from monitoreo.estado import AlmacenEstado
+
+OK = Medicion(True, 0, 5.0, None)
+
+
+def aplicar(resultados, umbral_alarma=3, umbral_limpieza=2):
+    registro, eventos = None, []
+    for fallido in resultados:
+        registro, evento = evaluar_destino(registro, fallido, umbral_alarma, umbral_limpieza)
+        eventos.append(evento)
+    return registro, eventos
+
+
+def test_alarma_al_llegar_al_umbral_de_fallos_seguidos():
+    registro, eventos = aplicar([True, True, True])
+    assert eventos == [None, None, ALARMA]
+    assert registro[KEY_ALARMA] and registro[KEY_FALLOS] == 3
+
+
+def test_un_exito_reinicia_la_racha_de_fallos():
+    registro, eventos = aplicar([True, True, False, True, True])
+    assert ALARMA not in eventos
+    assert registro[KEY_FALLOS] == 2
+
+
+def test_alarma_activa_no_se_repite():
+    _, eventos = aplicar([True] * 6)
+    assert eventos.count(ALARMA) == 1
+
+
+def test_limpieza_con_histeresis():
+    registro, eventos = aplicar([True, True, True, False, True, False, False])
+    assert eventos[3:] == [None, None, None, LIMPIEZA]
+    assert not registro[KEY_ALARMA] and registro[KEY_EXITOS] == 2
+
+
+def test_procesar_mediciones_alarma_solo_el_destino_que_falla(tmp_path):
+    estado = AlmacenEstado(str(tmp_path / "estado.json"))
+    alarmas = []
+    for _ in range(3):
+        procesar_mediciones("h", {"10.0.0.1": MEDICION_FALLIDA, "10.0.0.2": OK}, estado,
+                            lambda h, ip, m: alarmas.append(ip), lambda h, ip, m: None)
+    assert alarmas == ["10.0.0.1"]
+
+
+def test_procesar_mediciones_conserva_los_reservados(tmp_path):
+    estado = AlmacenEstado(str(tmp_path / "estado.json"))
+    procesar_mediciones("h", {"10.0.0.1": MEDICION_FALLIDA, "10.0.0.2": MEDICION_FALLIDA}, estado,
+                        lambda *a: None, lambda *a: None)
+    procesar_mediciones("h", {"10.0.0.1": OK}, estado, lambda *a: None, lambda *a: None,
+                        reservados=("10.0.0.2",))
+    assert estado.obtener("h", "10.0.0.2")[KEY_FALLOS] == 1
@@ -0,0 +1,38 @@
+from monitoreo.bitacora import Bitacora
+from monitoreo.estadisticas import MEDICION_FALLIDA, Medicion
+
+
+def nueva(rafaga=1, tasa=0.0):
+    enviados = []
+    bitacora = Bitacora(lambda severidad, mensaje: enviados.append(mensaje), "info", "aviso",
+                        rafaga=rafaga, tasa=tasa, reloj=lambda: 0.0)
+    return bitacora, enviados
+
+
+def test_los_avisos_se_limitan_y_deduplican():
+    bitacora, enviados = nueva(rafaga=1)
+    assert bitacora.emitir("aviso", "CICLO TARDIO: h")
+    assert not bitacora.emitir("aviso", "CICLO TARDIO: h")
+    assert not bitacora.emitir("aviso", "CICLOS OMITIDOS: h")
+    assert enviados == ["CICLO TARDIO: h"]
+
+
+def test_alarmas_y_limpiezas_nunca_se_suprimen():
+    bitacora, enviados = nueva(rafaga=0)
+    for _ in range(3):
+        assert bitacora.emitir("crit", "ALARMA: h con destino 10.0.0.1", limitar=False)
+    assert bitacora.emitir("crit", "LIMPIEZA: h con destino 10.0.0.1", limitar=False)
+    assert len(enviados) == 4
+    # Las alarmas no gastan fichas ni cuentan como suprimidas
+    assert "suprimidos" not in bitacora.cerrar_ciclo("h", {})
+
+
+def test_resumen_con_detalle_agregado_y_omitidos():
+    bitacora, enviados = nueva()
+    bitacora.registrar("10.0.0.1", "Perdidos=5, RTT=N/D")
+    bitacora.agregar("10.0.0.1", "Falla confirmada con 3 reintentos")
+    mensaje = bitacora.cerrar_ciclo("h", {"10.0.0.1": MEDICION_FALLIDA, "10.0.0.2": Medicion(True, 0, 1.0, None)},
+                                    omitidos=2)
+    assert "destinos=2 ok=1 degradados=1 omitidos=2" in mensaje
+    assert "10.0.0.1: Perdidos=5, RTT=N/D; Falla confirmada con 3 reintentos" in mensaje
+    assert enviados == [mensaje]
@@ -0,0 +1,62 @@
+import os
+
+from conftest import HOST_PRUEBA
+
+from monitoreo.alarmas import KEY_FALLOS
+from monitoreo.cache import CacheResultados, ttl_ciclo
+from monitoreo.estadisticas import MEDICION_FALLIDA, Medicion
+from monitoreo.estado import AlmacenEstado
+from monitoreo.inventario import PARAMETROS, Sonda
+
+SONDA = Sonda("10.0.0.1", *(5 if k == "count" else None for k in PARAMETROS))
+
+
+def test_las_entradas_vencen_con_el_ttl(tmp_path):
+    ruta = str(tmp_path / "estado.json.cache")
+    cache = CacheResultados(ruta, ttl=10)
+    cache.agregar("h", SONDA, Medicion(True, 0, 8.0, None), instante=100)
+    cache.agregar("h", SONDA._replace(destino="10.0.0.2"), MEDICION_FALLIDA, instante=100)
+    cache.guardar(ahora=100)
+
+    leida = CacheResultados(ruta, ttl=10).cargar()
+    medicion, edad = leida.obtener("h", SONDA, ahora=105)
+    assert (medicion.perdida, medicion.rtt, edad) == (0, 8.0, 5)
+    assert leida.obtener("h", SONDA, ahora=110) is None
+    # Los errores del RPC no se guardan: siempre se reintentan
+    assert leida.obtener("h", SONDA._replace(destino="10.0.0.2"), ahora=105) is None
+    # Otra ráfaga es otra entrada
+    assert leida.obtener("h", SONDA._replace(count=50), ahora=105) is None
+
+
+def test_ttl_por_omision_vence_antes_del_siguiente_ciclo():
+    assert 0 < ttl_ciclo(300) < 300
+
+
+def fallos(monitor):
+    return AlmacenEstado(monitor.state_file).cargar().obtener(HOST_PRUEBA, "10.0.0.1")[KEY_FALLOS]
+
+
+def test_corridas_a_demanda_con_cache_fresco_e_invalidar(crear_monitor, equipo):
+    equipo.perdida = 1.0
+    monitor = crear_monitor(ttl_cache=None)
+    monitor.main()
+    pings = equipo.contadores["pings"]
+    assert fallos(monitor) == 1
+
+    # Dentro del TTL se reutiliza la medición y no vuelve a contar
+    monitor.main()
+    assert equipo.contadores["pings"] == pings
+    assert fallos(monitor) == 1
+    assert "(caché de" in monitor.mensajes[-1]
+
+    # -fresco mide, pero la corrida del operador no avanza los fallos
+    monitor.ejecutar(["-fresco"])
+    assert equipo.contadores["pings"] > pings
+    assert fallos(monitor) == 1
+    pings = equipo.contadores["pings"]
+
+    monitor.ejecutar(["-invalidar"])
+    assert not os.path.exists(monitor.ruta_cache)
+    monitor.main()
+    assert equipo.contadores["pings"] > pings
+    assert fallos(monitor) == 2
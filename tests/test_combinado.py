@@ -0,0 +1,57 @@
+import yaml
+from conftest import HOST_PRUEBA
+
+from monitoreo.alarmas import KEY_FALLOS
+from monitoreo.combinado import MonitorCombinado, fusionar
+from monitoreo.estado import AlmacenEstado
+from monitoreo.inventario import PARAMETROS, Sonda
+
+
+def sonda(destino, **parametros):
+    return Sonda(destino, *(parametros.get(k) for k in PARAMETROS))
+
+
+def test_fusionar_usa_la_rafaga_mas_larga_y_los_umbrales_mas_estrictos():
+    compartida = fusionar([sonda("10.0.0.1", count=20, rtt_umbral=100, max_perdidos=2),
+                           sonda("10.0.0.1", count=50, rtt_umbral=150, max_perdidos=0)])
+    assert (compartida.destino, compartida.count, compartida.rtt_umbral, compartida.max_perdidos) == \
+        ("10.0.0.1", 50, 100, 0)
+
+
+def test_destino_compartido_se_sondea_una_vez_por_ciclo(crear_monitor, equipo):
+    destinos = crear_monitor(["10.0.0.1", "10.0.0.2"], perfil="destinos")
+    trayectorias = crear_monitor(["10.0.0.2", "10.0.0.3"], perfil="trayectorias")
+    combinado = MonitorCombinado([destinos, trayectorias])
+
+    assert combinado.main() is not None
+    assert equipo.contadores["pings"] == 3
+    # Cada perfil cierra su ciclo con sus propios destinos
+    for monitor, esperados in ((destinos, {"10.0.0.1", "10.0.0.2"}), (trayectorias, {"10.0.0.2", "10.0.0.3"})):
+        estado = AlmacenEstado(monitor.state_file).cargar()
+        assert set(estado.destinos(HOST_PRUEBA)) >= esperados
+
+
+def test_demonio_combinado_relee_el_estado_y_reintenta_perfiles(crear_monitor, equipo, tmp_path):
+    equipo.perdida = 1.0
+    destinos = crear_monitor(perfil="destinos", max_eventos=2)
+    trayectorias = crear_monitor(perfil="trayectorias", max_eventos=2)
+    # El inventario de trayectorias todavía no trae al host: el perfil no se carga
+    (tmp_path / "trayectorias.yml").write_text(yaml.safe_dump({"hosts": {"otro-host": {"destinos": ["10.0.0.9"]}}}))
+    combinado = MonitorCombinado([destinos, trayectorias])
+    script = crear_monitor(perfil="destinos", max_eventos=2)
+    pool = destinos.nuevo_pool()
+    cache = {}
+    try:
+        combinado.ciclo_demonio(pool, cache)  # fallos=1
+        assert [perfil.monitor for perfil in cache["perfiles"]] == [destinos]
+        script.main()  # fallos=2: alarma
+        (tmp_path / "trayectorias.yml").write_text(yaml.safe_dump({"hosts": {HOST_PRUEBA: {"destinos": ["10.0.0.3"]}}}))
+        combinado.ciclo_demonio(pool, cache)  # fallos=3 y trayectorias se carga
+    finally:
+        pool.cerrar()
+
+    assert [perfil.monitor for perfil in cache["perfiles"]] == [destinos, trayectorias]
+    alarmas = [m for m in destinos.mensajes + script.mensajes if m.startswith("ALARMA")]
+    assert len(alarmas) == 1 and alarmas[0] in script.mensajes
+    assert AlmacenEstado(destinos.state_file).cargar().obtener(HOST_PRUEBA, "10.0.0.1")[KEY_FALLOS] == 3
+    assert AlmacenEstado(trayectorias.state_file).cargar().obtener(HOST_PRUEBA, "10.0.0.3")[KEY_FALLOS] == 1
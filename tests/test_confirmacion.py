@@ -0,0 +1,79 @@
+import threading
+import time
+
+from monitoreo.confirmacion import Confirmaciones
+from monitoreo.estadisticas import MEDICION_FALLIDA, Medicion
+
+OK = Medicion(True, 0, 1.0, None)
+
+
+def nuevas(medir, rondas=2, plazo=5.0, plazo_ronda=0.5, maximo=8):
+    notas = []
+    confirmaciones = Confirmaciones(rondas, 0.01, medir, time.time() + plazo, plazo_ronda,
+                                    lambda clave, texto: notas.append((clave, texto)), maximo=maximo)
+    return confirmaciones, notas
+
+
+def test_falla_confirmada_con_todos_los_reintentos():
+    confirmaciones, notas = nuevas(lambda clave: MEDICION_FALLIDA)
+    assert confirmaciones.lanzar("10.0.0.1")
+    assert confirmaciones.resultados() == {"10.0.0.1": 2}
+    assert notas == [("10.0.0.1", "Falla confirmada con 2 reintentos")]
+
+
+def test_un_reintento_que_pasa_no_confirma():
+    respuestas = iter([MEDICION_FALLIDA, OK])
+    confirmaciones, notas = nuevas(lambda clave: next(respuestas), rondas=3)
+    confirmaciones.lanzar("10.0.0.1")
+    assert confirmaciones.resultados() == {}
+    assert notas == []
+
+
+def test_tope_de_confirmaciones_simultaneas():
+    liberar = threading.Event()
+
+    def medir(clave):
+        liberar.wait(5)
+        return MEDICION_FALLIDA
+
+    confirmaciones, _ = nuevas(medir, rondas=1, maximo=2)
+    assert confirmaciones.lanzar("10.0.0.1") and confirmaciones.lanzar("10.0.0.2")
+    # La tercera queda fuera y sigue el camino normal de varios ciclos
+    assert not confirmaciones.lanzar("10.0.0.3")
+    liberar.set()
+    assert set(confirmaciones.resultados()) == {"10.0.0.1", "10.0.0.2"}
+
+
+def test_reintento_que_excede_el_plazo_del_ciclo_no_confirma():
+    liberar = threading.Event()
+
+    def medir(clave):
+        liberar.wait(5)
+        return MEDICION_FALLIDA
+
+    confirmaciones, notas = nuevas(medir, rondas=1, plazo=0.3, plazo_ronda=0.1)
+    confirmaciones.lanzar("10.0.0.1")
+    inicio = time.time()
+    assert confirmaciones.resultados() == {}
+    assert time.time() - inicio < 1
+    # Lo que llega después del cierre no se mezcla con el ciclo siguiente
+    liberar.set()
+    time.sleep(0.1)
+    assert notas == []
+
+
+def test_sin_plazo_para_una_ronda_no_se_reintenta():
+    medidas = []
+    confirmaciones, _ = nuevas(lambda clave: medidas.append(clave) or MEDICION_FALLIDA, plazo=0.2, plazo_ronda=1)
+    confirmaciones.lanzar("10.0.0.1")
+    assert confirmaciones.resultados() == {}
+    assert medidas == []
+
+
+def test_alarma_temprana_en_el_primer_ciclo(crear_monitor, equipo):
+    equipo.perdida = 1.0
+    monitor = crear_monitor(confirmaciones=2, intervalo_confirmacion=0, max_eventos=5)
+    monitor.main()
+    alarmas = [m for m in monitor.mensajes if m.startswith("ALARMA")]
+    assert len(alarmas) == 1
+    assert "2 reintentos de confirmación también fallaron" in alarmas[0]
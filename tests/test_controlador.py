@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+import yaml
+
+from bench.dispositivo_simulado import DispositivoSimulado
+from monitoreo.controlador import ControladorFlota, PoolAcotado
+
+
+class Sesion:
+    connected = False
+
+    def open(self):
+        self.connected = True
+
+    def close(self):
+        self.connected = False
+
+
+def test_equipo_atascado_no_retiene_el_cupo_global():
+    cupo = threading.BoundedSemaphore(2)
+    atascado = PoolAcotado(Sesion, 1, cupo)
+    libre = PoolAcotado(Sesion, 1, cupo)
+    tomada, soltar = threading.Event(), threading.Event()
+    obtenidas = []
+
+    def retener():
+        with atascado.sesion():
+            tomada.set()
+            soltar.wait(5)
+
+    def esperar():
+        with atascado.sesion(espera=5):
+            obtenidas.append("atascado")
+
+    hilos = [threading.Thread(target=retener), threading.Thread(target=esperar)]
+    hilos[0].start()
+    tomada.wait(5)
+    hilos[1].start()
+    time.sleep(0.1)
+    # El ping que espera la sesión del equipo atascado no ocupa el segundo lugar del cupo
+    with libre.sesion(espera=0.2):
+        obtenidas.append("libre")
+    soltar.set()
+    for hilo in hilos:
+        hilo.join(5)
+    assert obtenidas == ["libre", "atascado"]
+
+
+def test_ronda_de_la_flota_con_escalonado(tmp_path, equipo):
+    inventario = tmp_path / "flota.yml"
+    inventario.write_text(yaml.safe_dump({"hosts": {"r1": {"destinos": ["10.0.0.1"]},
+                                                   "r2": {"destinos": ["10.0.0.2", "10.0.0.3"]}}}))
+    mensajes = []
+    controlador = ControladorFlota(lambda host: DispositivoSimulado(host=host),
+                                   lambda severidad, mensaje: mensajes.append(mensaje), str(inventario),
+                                   str(tmp_path), 5, max_pings=2, escalonar=0.2, confirmaciones=0)
+    inicio = time.time()
+    controlador.main()
+    # Los inicios de los equipos se reparten en la ventana
+    assert time.time() - inicio >= 0.1
+    assert equipo.contadores["pings"] == 3
+    assert os.path.exists(tmp_path / "estado_r1.json") and os.path.exists(tmp_path / "estado_r2.json")
+    assert "RONDA equipos=2 completos=2 sin_ciclo=0" in mensajes[-1]
+
+
+def test_inventario_ilegible_se_reintenta_en_la_ronda_siguiente(tmp_path, equipo):
+    inventario = tmp_path / "flota.yml"
+    inventario.write_text("hosts: [")
+    mensajes = []
+    controlador = ControladorFlota(lambda host: DispositivoSimulado(host=host),
+                                   lambda severidad, mensaje: mensajes.append(mensaje), str(inventario),
+                                   str(tmp_path), 5, confirmaciones=0)
+    assert controlador.cargar_equipos() == {}
+    assert controlador.observador is None
+    inventario.write_text(yaml.safe_dump({"hosts": {"r1": {"destinos": ["10.0.0.1"]}}}))
+    assert list(controlador.cargar_equipos()) == ["r1"]
+    controlador.cerrar()
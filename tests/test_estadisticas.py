@@ -0,0 +1,31 @@
+from bench.dispositivo_simulado import PerfilSimulado, respuesta_ping
+from monitoreo.estadisticas import extraer_ping
+
+
+def test_ping_con_respuestas():
+    perfil = PerfilSimulado(rtt_ms=8.0, rtt_jitter_ms=0, semilla=1)
+    enviados, recibidos, rtt, stats = extraer_ping(respuesta_ping(perfil, "10.0.0.1", 5))
+    assert (enviados, recibidos, rtt) == (5, 5, 8.0)
+    assert stats.resumen() == "min=8.0 max=8.0 p50=8.0 p95=8.0 p99=8.0 jitter=0.0ms rafaga=0"
+
+
+def test_ping_sin_ninguna_respuesta():
+    perfil = PerfilSimulado(perdida=1.0, semilla=1)
+    enviados, recibidos, rtt, stats = extraer_ping(respuesta_ping(perfil, "10.0.0.1", 5))
+    assert (enviados, recibidos, rtt) == (5, 0, None)
+    assert stats.perdida == 5 and stats.rafaga_max == 5
+    assert stats.resumen() == "min=N/D max=N/D p50=N/D p95=N/D p99=N/D jitter=N/D rafaga=5"
+
+
+def test_ping_con_campos_legados_y_rafaga_intermedia():
+    perfil = PerfilSimulado(campos_legados=True, rtt_jitter_ms=0, semilla=1)
+    respuesta = respuesta_ping(perfil, "10.0.0.1", 5)
+    # Sin las sondas 2 y 3: una ráfaga de dos pérdidas en medio
+    for probe in list(respuesta.iterfind("probe-result"))[1:3]:
+        respuesta.remove(probe)
+    resumen = respuesta.find("probe-results-summary")
+    resumen.remove(resumen.find("responses-received"))
+    resumen.find("probes-received").text = "3"
+    enviados, recibidos, _, stats = extraer_ping(respuesta)
+    assert (enviados, recibidos) == (5, 3)
+    assert stats.recibidos == 3 and stats.rafaga_max == 2
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+import monitoreo.estado
+from monitoreo.estado import AlmacenEstado, escribir_atomico
+
+
+def test_solo_se_escribe_si_cambio(tmp_path):
+    ruta = str(tmp_path / "estado.json")
+    estado = AlmacenEstado(ruta).cargar()
+    assert estado.obtener("h", "10.0.0.1") is None
+    estado.actualizar("h", "10.0.0.1", {"fallos": 1})
+    assert estado.guardar()
+    assert not estado.guardar()
+
+    leido = AlmacenEstado(ruta).cargar()
+    assert leido.obtener("h", "10.0.0.1") == {"fallos": 1}
+    leido.actualizar("h", "10.0.0.1", {"fallos": 1})
+    assert not leido.guardar()
+    leido.eliminar("h", "10.0.0.1")
+    assert leido.guardar() and leido.destinos("h") == []
+
+
+def test_una_escritura_fallida_conserva_el_archivo(tmp_path, monkeypatch):
+    ruta = tmp_path / "estado.json"
+    escribir_atomico(str(ruta), b'{"h|10.0.0.1":{"fallos":1}}')
+
+    def fsync_fallido(fd):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(monitoreo.estado.os, "fsync", fsync_fallido)
+    with pytest.raises(OSError):
+        escribir_atomico(str(ruta), b'{"h|10.0.0.1":{"fallos":2}}')
+    assert ruta.read_bytes() == b'{"h|10.0.0.1":{"fallos":1}}'
+    # El temporal no queda en el directorio
+    assert os.listdir(tmp_path) == ["estado.json"]
+
+
+def test_estado_con_formato_invalido(tmp_path):
+    ruta = tmp_path / "estado.json"
+    ruta.write_text("[]")
+    with pytest.raises(ValueError):
+        AlmacenEstado(str(ruta)).cargar()
@@ -0,0 +1,67 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from monitoreo.estadisticas import EstadisticasPing, Medicion
+from monitoreo.estado import DESTINO_HOST, AlmacenEstado
+from monitoreo.exportador import RUTA_HTTP, RegistroMetricas, ServidorMetricas, componer, escribir_openmetrics
+
+
+def stats(enviados, rtts):
+    resultado = EstadisticasPing()
+    resultado.enviados = enviados
+    resultado.rtts.extend(rtts)
+    return resultado
+
+
+def registro_de_prueba(tmp_path):
+    estado = AlmacenEstado(str(tmp_path / "estado.json"))
+    estado.actualizar("h", "10.0.0.2", {"fallos": 3, "alarma": True})
+    estado.actualizar("h", DESTINO_HOST, {"ciclos_tardios": 2})
+    registro = RegistroMetricas("destinos")
+    registro.actualizar("h", {"10.0.0.1": Medicion(True, 0, 8.0, stats(4, [8.0, 8.0, 9.0, 7.0])),
+                              "10.0.0.2": Medicion(False, 5, None, stats(5, []))},
+                        estado, [], 1.23456, 1700000000)
+    return registro
+
+
+def test_texto_openmetrics(tmp_path):
+    texto = componer([registro_de_prueba(tmp_path)])
+    lineas = texto.splitlines()
+    assert lineas[-1] == "# EOF"
+    base = 'perfil="destinos",host="h"'
+    assert f'opint_ping_perdida_ratio{{{base},destino="10.0.0.2"}} 1.0' in lineas
+    assert f'opint_ping_rtt_seconds{{{base},destino="10.0.0.1",quantile="0.5"}} 0.008' in lineas
+    assert f'opint_ping_rtt_seconds_count{{{base},destino="10.0.0.1"}} 4' in lineas
+    # Sin respuestas los cuantiles quedan en NaN
+    assert f'opint_ping_rtt_seconds{{{base},destino="10.0.0.2",quantile="0.99"}} NaN' in lineas
+    assert f'opint_ping_alarma{{{base},destino="10.0.0.2"}} 1' in lineas
+    assert f'opint_ciclo_duracion_seconds{{{base}}} 1.235' in lineas
+    assert f'opint_ciclos_tardios_total{{{base}}} 2' in lineas
+    # Cada familia se declara una sola vez, con su unidad antes de las muestras
+    assert lineas.count("# TYPE opint_ping_rtt_seconds summary") == 1
+    indice = lineas.index("# TYPE opint_ciclos_tardios counter")
+    assert lineas[indice + 1].startswith("# HELP opint_ciclos_tardios ")
+
+
+def test_etiquetas_escapadas():
+    registro = RegistroMetricas('perfil "raro"\\')
+    registro.actualizar("h", {}, AlmacenEstado("no-existe.json"), [], 0.0, 0)
+    assert 'perfil="perfil \\"raro\\"\\\\"' in componer([registro])
+
+
+def test_archivo_y_endpoint_http(tmp_path):
+    registro = registro_de_prueba(tmp_path)
+    ruta = str(tmp_path / "metricas.prom")
+    escribir_openmetrics(ruta, [registro])
+    with open(ruta) as archivo:
+        texto = archivo.read()
+
+    with ServidorMetricas(0, [registro]) as servidor:
+        url = f"http://127.0.0.1:{servidor.puerto}"
+        with urllib.request.urlopen(url + RUTA_HTTP) as respuesta:
+            assert respuesta.headers["Content-Type"].startswith("application/openmetrics-text")
+            assert respuesta.read().decode() == texto
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/otra")
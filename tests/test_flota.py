@@ -0,0 +1,55 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from monitoreo.estadisticas import EstadisticasPing, Medicion, _percentil  # noqa: E402
+from monitoreo.flota import cargar_flota, patrones, percentiles_por_grupo, resumen  # noqa: E402
+from monitoreo.historial import registrar_mediciones  # noqa: E402
+
+INTERVALO = 300
+
+
+def medicion(recibidos, rtt=8.0, enviados=5):
+    stats = EstadisticasPing()
+    stats.enviados = enviados
+    stats.rtts.extend([rtt] * recibidos)
+    return Medicion(recibidos == enviados, enviados - recibidos, rtt if recibidos else None, stats)
+
+
+def test_percentiles_por_grupo_como_el_calculo_por_destino():
+    generador = np.random.default_rng(1)
+    grupos = generador.integers(0, 4, 500)
+    valores = generador.uniform(1, 100, 500)
+    valores[::7] = np.nan
+    salida = percentiles_por_grupo(grupos, valores, 5, (50, 95, 99))
+    for g in range(4):
+        ordenados = sorted(v for v in valores[grupos == g] if not np.isnan(v))
+        assert list(salida[g]) == [_percentil(ordenados, p) for p in (50, 95, 99)]
+    assert np.isnan(salida[4]).all()  # Grupo sin muestras
+
+
+def test_resumen_y_patrones_de_la_flota(tmp_path):
+    # Tres ciclos: en el segundo, el destino común cae para todos los hosts
+    # y r4 pierde todos sus destinos a la vez
+    for n in range(3):
+        instante = (1000 + n) * INTERVALO
+        for host in ("r1", "r2", "r3", "r4"):
+            propios = {f"10.{i}.0.{host[1]}": medicion(0 if n == 1 and host == "r4" else 5, rtt=20.0)
+                       for i in (1, 2)}
+            registrar_mediciones(str(tmp_path / host), host, {"10.0.0.9": medicion(0 if n == 1 else 5), **propios},
+                                 instante=instante)
+
+    flota = cargar_flota(str(tmp_path))
+    assert len(flota) == 36 and sorted(flota.hosts) == ["r1", "r2", "r3", "r4"]
+
+    por_destino = resumen(flota, "destino")
+    nombre, muestras, enviados, recibidos, perdida, p50, _, _ = por_destino[0]
+    assert (nombre, muestras, enviados, recibidos) == ("10.0.0.9", 12, 60, 40)
+    assert perdida == pytest.approx(100 / 3) and p50 == 8.0
+
+    destinos, hosts = patrones(flota, INTERVALO)
+    assert destinos == [("10.0.0.9", 1, 4, 1001.0 * INTERVALO)]
+    assert hosts == [("r4", 1, 3, 1001.0 * INTERVALO)]
+
+    # Las muestras anteriores a `desde` se descartan
+    assert len(cargar_flota(str(tmp_path), desde=1002 * INTERVALO)) == 12
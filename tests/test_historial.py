@@ -0,0 +1,47 @@
+import math
+
+from monitoreo.estadisticas import EstadisticasPing, Medicion
+from monitoreo.historial import HORA, Historial, registrar_mediciones, ruta_historial
+
+
+def stats(enviados, rtts):
+    resultado = EstadisticasPing()
+    resultado.enviados = enviados
+    resultado.rtts.extend(rtts)
+    return resultado
+
+
+def test_sin_respuestas_el_rtt_queda_en_nan(tmp_path):
+    directorio = str(tmp_path)
+    mediciones = {"10.0.0.1": Medicion(False, 5, None, stats(5, [])),
+                  "10.0.0.2": Medicion(True, 0, 8.0, stats(5, [7.0, 8.0, 9.0, 8.0, 8.0]))}
+    assert registrar_mediciones(directorio, "h", mediciones, instante=HORA * 10) == {}
+
+    with Historial(ruta_historial(directorio, "h", "10.0.0.1")) as historial:
+        (muestra,) = historial.muestras()
+        assert muestra[1:3] == (5, 0) and math.isnan(muestra[3])
+        (hora,) = historial.acumulados(HORA)
+        assert hora[1:4] == (1, 5, 0) and math.isnan(hora[4])
+    with Historial(ruta_historial(directorio, "h", "10.0.0.2")) as historial:
+        assert historial.muestras()[0][3] == 8.0
+
+
+def test_los_acumulados_ignoran_los_ciclos_sin_rtt(tmp_path):
+    directorio = str(tmp_path)
+    registrar_mediciones(directorio, "h", {"10.0.0.1": Medicion(True, 0, 10.0, stats(2, [10.0, 10.0]))}, HORA)
+    registrar_mediciones(directorio, "h", {"10.0.0.1": Medicion(False, 2, None, stats(2, []))}, HORA + 300)
+    with Historial(ruta_historial(directorio, "h", "10.0.0.1")) as historial:
+        (hora,) = historial.acumulados(HORA)
+    assert hora[1:4] == (2, 4, 2)
+    assert hora[4] == 10.0
+
+
+def test_un_destino_que_no_se_puede_escribir_no_impide_los_demas(tmp_path):
+    directorio = str(tmp_path)
+    # Un directorio en el lugar del archivo de historial hace fallar solo a ese destino
+    (tmp_path / ruta_historial("", "h", "10.0.0.1")).mkdir()
+    errores = registrar_mediciones(directorio, "h", {"10.0.0.1": Medicion(True, 0, 1.0, stats(1, [1.0])),
+                                                     "10.0.0.2": Medicion(True, 0, 1.0, stats(1, [1.0]))})
+    assert set(errores) == {"10.0.0.1"}
+    with Historial(ruta_historial(directorio, "h", "10.0.0.2")) as historial:
+        assert len(historial.muestras()) == 1
@@ -0,0 +1,94 @@
+import pytest
+
+from monitoreo.inventario import (KEY_ERROR, PARAMETROS, InventarioInvalido, ObservadorInventario, Sonda,
+                                  cargar_host, cargar_inventario, comparar_planes, resolver_host,
+                                  resolver_inventario)
+
+
+def sonda(destino, **valores):
+    return Sonda(destino, *(valores.get(k) for k in PARAMETROS))
+
+
+def parametros(config, destino):
+    fila = next(f for f in config["plan"] if f[0] == destino)
+    return dict(zip(PARAMETROS, fila[1:]))
+
+
+def test_precedencia_defaults_host_grupos_destino():
+    config = resolver_inventario({
+        "defaults": {"count": 50, "min_exitos": 5},
+        "grupos": {
+            "base": {"count": 20, "rtt_umbral": 150},
+            "hijo": {"hereda": ["base"], "rtt_umbral": 120,
+                     "destinos": ["1.1.1.1", {"ip": "2.2.2.2", "count": 7}]},
+        },
+        "hosts": {"h": {"max_eventos": 4, "rtt_umbral": 300, "grupos": ["hijo"],
+                        "destinos": ["3.3.3.3", {"ip": "1.1.1.1", "max_perdidos": 2}]}},
+    })["h"]
+    uno = parametros(config, "1.1.1.1")
+    # El grupo hijo pisa al padre, el grupo al host y el destino al grupo
+    assert (uno["count"], uno["rtt_umbral"], uno["max_perdidos"]) == (20, 120, 2)
+    assert (uno["max_eventos"], uno["min_exitos"]) == (4, 5)
+    assert parametros(config, "2.2.2.2")["count"] == 7
+    suelto = parametros(config, "3.3.3.3")
+    assert (suelto["count"], suelto["rtt_umbral"]) == (50, 300)
+
+
+def test_destino_suelto_toma_los_parametros_de_su_grupo():
+    destino = {"ip": "1.1.1.1", "grupo": "cdn", "rtt_umbral": 80}
+    config = resolver_inventario({"grupos": {"cdn": {"count": 20}}, "hosts": {"h": {"destinos": [destino]}}})["h"]
+    assert parametros(config, "1.1.1.1")["count"] == 20
+    assert parametros(config, "1.1.1.1")["rtt_umbral"] == 80
+
+
+def test_la_misma_ip_por_varios_caminos_son_sondas_distintas():
+    config = resolver_inventario({"hosts": {"h": {"destinos": [
+        "1.1.1.1",
+        {"ip": "1.1.1.1", "instancia": "VRF-A", "origen": "10.9.9.9"},
+        {"ip": "1.1.1.1", "dscp": 46, "size": 1400},
+        {"ip": "1.1.1.1", "dscp": 46, "size": 1400, "rtt_umbral": 50},  # Mismo camino: se fusiona
+    ]}}})["h"]
+    assert config["destinos"] == ["1.1.1.1", "1.1.1.1 instancia=VRF-A origen=10.9.9.9", "1.1.1.1 dscp=46 size=1400"]
+    assert parametros(config, "1.1.1.1 dscp=46 size=1400")["rtt_umbral"] == 50
+
+
+def test_parametros_invalidos_y_herencia_circular():
+    with pytest.raises(InventarioInvalido):
+        resolver_host("h", {"destinos": [{"ip": "1.1.1.1", "count": 0}]})
+    resuelto = resolver_inventario({"grupos": {"a": {"hereda": ["b"]}, "b": {"hereda": ["a"]}},
+                                    "hosts": {"h": {"grupos": ["a"]}}})
+    assert "circular" in resuelto["h"][KEY_ERROR]
+
+
+def test_un_host_invalido_no_afecta_al_resto():
+    data = {"grupos": {"cdn": {"destinos": ["1.1.1.1"]}},
+            "hosts": {"bueno": {"grupos": ["cdn"]}, "malo": {"grupos": ["no-existe"]}}}
+    resuelto = resolver_inventario(data)
+    assert resuelto["bueno"]["destinos"] == ["1.1.1.1"]
+    assert KEY_ERROR in resuelto["malo"]
+
+
+def test_cargar_host_solo_falla_para_el_host_invalido(tmp_path):
+    ruta = tmp_path / "inventario.yml"
+    ruta.write_text("hosts:\n  bueno: {destinos: [1.1.1.1]}\n  malo: {destinos: [{ip: 2.2.2.2, count: -1}]}\n")
+    with pytest.raises(InventarioInvalido):
+        cargar_host(str(ruta), "malo")
+    assert cargar_host(str(ruta), "bueno")["destinos"] == ["1.1.1.1"]
+    assert set(cargar_inventario(str(ruta))) == {"bueno", "malo"}
+
+
+def test_comparar_planes():
+    anterior = [sonda("10.0.0.1"), sonda("10.0.0.2"), sonda("10.0.0.4", count=5)]
+    nuevo = [sonda("10.0.0.1"), sonda("10.0.0.3"), sonda("10.0.0.4", count=10)]
+    assert comparar_planes(anterior, nuevo) == (["10.0.0.3"], ["10.0.0.2"], ["10.0.0.4"])
+
+
+def test_observador_detecta_el_reemplazo_del_archivo(tmp_path):
+    ruta = tmp_path / "inventario.yml"
+    ruta.write_text("hosts: {}\n")
+    observador = ObservadorInventario(str(ruta))
+    assert not observador.cambio()
+    ruta.write_text("hosts: {h: {destinos: [10.0.0.1]}}\n")
+    assert observador.cambio() and not observador.cambio()
+    ruta.unlink()
+    assert observador.cambio()
@@ -0,0 +1,47 @@
+import json
+import pstats
+import tracemalloc
+
+import yaml
+
+from monitoreo.metricas import CPROFILE, TRACEMALLOC, Perfilador
+
+
+def test_perfilador_respeta_tracemalloc_activo(tmp_path):
+    tracemalloc.start()
+    try:
+        with Perfilador(str(tmp_path / "perfil"), (TRACEMALLOC,)) as perfilador:
+            datos = [bytes(1000) for _ in range(100)]
+        assert tracemalloc.is_tracing()
+        assert perfilador.pico_memoria >= 100 * 1000
+        del datos
+    finally:
+        tracemalloc.stop()
+
+
+def test_perfilador_detiene_el_tracemalloc_que_inicio(tmp_path):
+    assert not tracemalloc.is_tracing()
+    with Perfilador(str(tmp_path / "perfil"), (TRACEMALLOC, CPROFILE)):
+        sum(range(1000))
+    assert not tracemalloc.is_tracing()
+    assert (tmp_path / "perfil.prof").exists()
+    assert "Memoria pico" in (tmp_path / "perfil.txt").read_text()
+
+
+def test_ciclo_perfilado_con_cprofile_usa_el_motor_secuencial(crear_monitor, tmp_path):
+    monitor = crear_monitor(["10.0.0.1", "10.0.0.2"], motor="hilos", metrics_file=str(tmp_path / "metricas.jsonl"))
+    inventario = yaml.safe_load(open(monitor.yaml_file))
+    for host in inventario["hosts"].values():
+        host["perfilar"] = CPROFILE
+    with open(monitor.yaml_file, "w") as archivo:
+        yaml.safe_dump(inventario, archivo)
+
+    monitor.main()
+    monitor.main()
+    primero, segundo = [json.loads(linea) for linea in open(tmp_path / "metricas.jsonl")]
+    assert primero["motor"] == "secuencial" and "perfil" in primero
+    # Cada valor de `perfilar` se aplica a un solo ciclo
+    assert segundo["motor"] == "hilos" and "perfil" not in segundo
+    # Los pings corrieron en el hilo perfilado
+    funciones = {nombre for _, _, nombre in pstats.Stats(primero["perfil"] + ".prof").stats}
+    assert "medir_ping" in funciones
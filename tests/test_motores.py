@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from monitoreo.motor_async import DestinoOmitido, PlazoExcedido, fuera_de_plazo
+from monitoreo.motores import MOTORES
+
+
+def lento(segundos):
+    def ping(destino):
+        time.sleep(segundos)
+        return destino
+    return ping
+
+
+@pytest.mark.parametrize("nombre", sorted(MOTORES))
+def test_destinos_sin_turno_al_vencer_el_ciclo_quedan_omitidos(nombre):
+    destinos = [f"10.0.0.{i}" for i in range(4)]
+    resultados = MOTORES[nombre](destinos, lento(0.3), max_en_vuelo=1, timeout_destino=5, timeout_ciclo=0.5)
+    assert set(resultados) == set(destinos)
+    omitidos = [d for d, r in resultados.items() if isinstance(r, DestinoOmitido)]
+    medidos = [d for d, r in resultados.items() if r == d]
+    assert omitidos and medidos and len(omitidos) + len(medidos) == len(destinos)
+
+
+@pytest.mark.parametrize("nombre", sorted(MOTORES))
+def test_los_errores_del_destino_no_son_omisiones(nombre):
+    def falla(destino):
+        raise RuntimeError("sin respuesta")
+
+    resultados = MOTORES[nombre](["10.0.0.1"], falla, max_en_vuelo=1, timeout_destino=5, timeout_ciclo=5)
+    assert isinstance(resultados["10.0.0.1"], RuntimeError)
+
+
+def test_el_plazo_por_destino_del_motor_async_es_una_falla():
+    resultados = MOTORES["async"](["10.0.0.1"], lento(0.5), max_en_vuelo=1, timeout_destino=0.1, timeout_ciclo=5)
+    resultado = resultados["10.0.0.1"]
+    assert isinstance(resultado, PlazoExcedido) and not isinstance(resultado, DestinoOmitido)
+
+
+
+def test_la_espera_de_sesion_no_cuenta_para_el_plazo_async():
+    def ping(destino):
+        with fuera_de_plazo():
+            time.sleep(0.4)  # Esperando una sesión del pool
+        time.sleep(0.05)
+        return destino
+
+    resultados = MOTORES["async"](["10.0.0.1"], ping, max_en_vuelo=1, timeout_destino=0.2, timeout_ciclo=5)
+    assert resultados == {"10.0.0.1": "10.0.0.1"}
+
+
+def test_el_plazo_async_corre_desde_que_el_destino_arranca():
+    # El primero vence su plazo pero retiene el único hilo hasta que su RPC regresa
+    duraciones = {"10.0.0.1": 0.8, "10.0.0.2": 0.1}
+
+    def ping(destino):
+        time.sleep(duraciones[destino])
+        return destino
+
+    resultados = MOTORES["async"](list(duraciones), ping, max_en_vuelo=1, timeout_destino=0.3, timeout_ciclo=5)
+    assert isinstance(resultados["10.0.0.1"], PlazoExcedido)
+    assert resultados["10.0.0.2"] == "10.0.0.2"
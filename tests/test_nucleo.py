@@ -0,0 +1,126 @@
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+import yaml
+from conftest import HOST_PRUEBA
+
+from bench.dispositivo_simulado import respuesta_ping
+from monitoreo.alarmas import KEY_FALLOS
+from monitoreo.estadisticas import Medicion
+from monitoreo.estado import AlmacenEstado
+from monitoreo.inventario import PARAMETROS, ObservadorInventario, Sonda
+from monitoreo.motores import MOTORES
+from monitoreo.nucleo import Monitor, opciones_ping
+
+
+class PoolFalso:
+    tamano = 1
+
+
+@pytest.mark.parametrize("nombre", sorted(MOTORES))
+def test_ejecutar_motor_deja_fuera_las_omitidas(tmp_path, nombre):
+    monitor = Monitor(None, lambda severidad, mensaje: None, str(tmp_path / "inventario.yml"),
+                      str(tmp_path / "estado.json"), str(tmp_path / "historial"), 5, plazo_ciclo=0.5)
+    anotados = []
+    hecho = threading.Event()
+
+    def ping(ip):
+        if hecho.is_set():
+            time.sleep(1)
+        hecho.set()
+        return Medicion(True, 0, 1.0, None)
+
+    claves = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    mediciones = monitor.ejecutar_motor(MOTORES[nombre], nombre, PoolFalso(), claves, ping,
+                                        registrar=lambda clave, texto: anotados.append(clave))
+    assert mediciones and set(mediciones) < set(claves)
+    assert all(m.ok for m in mediciones.values())
+    # Las omitidas no quedan como fallidas ni dejan notas de error
+    assert anotados == []
+
+
+def test_demonio_relee_el_estado_que_escribe_una_corrida(crear_monitor, equipo):
+    equipo.perdida = 1.0
+    demonio = crear_monitor(max_eventos=2)
+    script = crear_monitor(max_eventos=2)
+    pool = demonio.nuevo_pool()
+    cache = {}
+    try:
+        demonio.ciclo_demonio(pool, cache)  # fallos=1
+        script.main()  # fallos=2: alarma
+        demonio.ciclo_demonio(pool, cache)  # fallos=3: la alarma ya estaba activa
+    finally:
+        pool.cerrar()
+
+    alarmas = [m for m in demonio.mensajes + script.mensajes if m.startswith("ALARMA")]
+    assert len(alarmas) == 1 and alarmas[0] in script.mensajes
+    estado = AlmacenEstado(demonio.state_file).cargar()
+    assert estado.obtener(HOST_PRUEBA, "10.0.0.1")[KEY_FALLOS] == 3
+
+
+def test_destinos_sin_sesion_quedan_omitidos(crear_monitor, equipo):
+    monitor = crear_monitor(["10.0.0.1", "10.0.0.2"], tamano_pool=1)
+    pool = monitor.nuevo_pool()
+    pool.espera = 0.1
+    estado = monitor.cargar_estado()
+    try:
+        # La única sesión del pool está ocupada durante todo el ciclo
+        with pool.sesion():
+            monitor.ejecutar_ciclo(pool, HOST_PRUEBA, monitor.cargar_config(HOST_PRUEBA), estado)
+    finally:
+        pool.cerrar()
+    assert equipo.contadores["pings"] == 0
+    assert estado.destinos(HOST_PRUEBA) == ["*"]
+    assert "omitidos=2" in monitor.mensajes[-1] and "Error" not in monitor.mensajes[-1]
+
+
+def test_recarga_en_caliente_aplica_solo_las_diferencias(crear_monitor, equipo):
+    equipo.perdida = 1.0
+    monitor = crear_monitor(["10.0.0.1", "10.0.0.2", "10.0.0.4"], max_eventos=5)
+    monitor.observador = ObservadorInventario(monitor.yaml_file)
+    pool = monitor.nuevo_pool()
+    cache = {}
+    try:
+        monitor.ciclo_demonio(pool, cache)
+        with open(monitor.yaml_file, "w") as archivo:
+            yaml.safe_dump({"hosts": {HOST_PRUEBA: {"destinos": [{"ip": "10.0.0.1", "max_perdidos": 2},
+                                                                  "10.0.0.3", "10.0.0.4"]}}}, archivo)
+        monitor.ciclo_demonio(pool, cache)
+    finally:
+        pool.cerrar()
+
+    estado = AlmacenEstado(monitor.state_file).cargar()
+    fallos = {ip: estado.obtener(HOST_PRUEBA, ip, {}).get(KEY_FALLOS) for ip in ("10.0.0.1", "10.0.0.2",
+                                                                                  "10.0.0.3", "10.0.0.4")}
+    # El modificado reinicia su racha, el retirado se descarta y el que no cambió la conserva
+    assert fallos == {"10.0.0.1": 1, "10.0.0.2": None, "10.0.0.3": 1, "10.0.0.4": 2}
+    assert any(m.startswith(f"INVENTARIO: {HOST_PRUEBA} recargado: agregados=1 retirados=1 modificados=1")
+               for m in monitor.mensajes)
+
+
+def test_el_ping_lleva_el_camino_y_el_paquete_de_la_sonda(crear_monitor, equipo):
+    sonda = Sonda("1.1.1.1 instancia=VRF-A origen=10.9.9.9 dscp=46 size=1400",
+                  *({"count": 5, "rtt_umbral": 100, "max_perdidos": 0, "size": 1400, "origen": "10.9.9.9",
+                     "instancia": "VRF-A", "dscp": 46}.get(k) for k in PARAMETROS))
+    assert opciones_ping(sonda) == {"size": "1400", "source": "10.9.9.9", "routing_instance": "VRF-A",
+                                    "tos": "184"}
+    llamadas = []
+
+    class Rpc:
+        def ping(self, **argumentos):
+            llamadas.append(argumentos)
+            return respuesta_ping(equipo, argumentos["host"], int(argumentos["count"]), int(argumentos["size"]))
+
+    class Pool:
+        @contextmanager
+        def sesion(self):
+            yield SimpleNamespace(rpc=Rpc())
+
+    monitor = crear_monitor()
+    assert monitor.medir_ping(Pool(), sonda, 5).ok
+    # La IP va sola en `host`; los calificadores de la clave no llegan al RPC
+    assert llamadas == [{"host": "1.1.1.1", "count": "5", "size": "1400", "source": "10.9.9.9",
+                         "routing_instance": "VRF-A", "tos": "184"}]
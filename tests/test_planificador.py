@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from monitoreo.motores import MOTORES
+from monitoreo.planificador import (ENCOLAR, OMITIR, BloqueoCiclo, escalonar, fase_host, recoger_omisiones,
+                                    registrar_omision)
+
+
+def test_omitir_no_espera_al_ciclo_en_curso(tmp_path):
+    ruta = str(tmp_path / "estado.json.lock")
+    primero = BloqueoCiclo(ruta, OMITIR)
+    assert primero.adquirir()
+    try:
+        inicio = time.monotonic()
+        assert not BloqueoCiclo(ruta, OMITIR, espera=5).adquirir()
+        assert time.monotonic() - inicio < 1
+    finally:
+        primero.liberar()
+    segundo = BloqueoCiclo(ruta, OMITIR)
+    assert segundo.adquirir()
+    segundo.liberar()
+
+
+def test_encolar_espera_y_solo_encola_una_invocacion(tmp_path):
+    ruta = str(tmp_path / "estado.json.lock")
+    primero = BloqueoCiclo(ruta, OMITIR)
+    assert primero.adquirir()
+    encolado = BloqueoCiclo(ruta, ENCOLAR, espera=5)
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.append(encolado.adquirir()))
+    hilo.start()
+    time.sleep(0.2)
+    # La cola ya está tomada: la tercera invocación se omite en lugar de apilarse
+    assert not BloqueoCiclo(ruta, ENCOLAR, espera=5).adquirir()
+    primero.liberar()
+    hilo.join(5)
+    assert resultado == [True]
+    encolado.liberar()
+
+
+def test_adquirir_bloqueo_anota_la_omision(crear_monitor):
+    monitor = crear_monitor()
+    bloqueo = monitor.adquirir_bloqueo()
+    assert bloqueo is not None
+    try:
+        assert monitor.adquirir_bloqueo() is None
+        registrar_omision(monitor.ruta_bloqueo, 2)
+    finally:
+        bloqueo.liberar()
+    assert recoger_omisiones(monitor.ruta_bloqueo)[0] == 3
+    assert recoger_omisiones(monitor.ruta_bloqueo) == (0, None)
+
+
+def test_escalonar_reparte_los_arranques_en_la_ventana():
+    claves = [f"10.0.0.{i}" for i in range(4)]
+    assert escalonar(claves, 120) == {"10.0.0.0": 0, "10.0.0.1": 30, "10.0.0.2": 60, "10.0.0.3": 90}
+    desplazados = escalonar(claves, 120, fase=0.9)
+    assert sorted(desplazados.values()) == pytest.approx([18, 48, 78, 108])
+
+
+def test_la_fase_es_estable_por_host_y_distinta_entre_hosts():
+    fases = {fase_host(f"opint-{i}") for i in range(50)}
+    assert len(fases) == 50 and all(0 <= f < 1 for f in fases)
+    assert fase_host("opint-1") == fase_host("opint-1")
+
+
+def test_la_ventana_deja_el_plazo_completo_al_ultimo_ping(crear_monitor):
+    monitor = crear_monitor(plazo_ciclo=240, escalonar=300)
+    retrasos = monitor.retrasos("h", {}, ["10.0.0.1", "10.0.0.2"], plazo_destino=60)
+    assert max(retrasos.values()) < 180
+    assert monitor.retrasos("h", {"escalonar": 0}, ["10.0.0.1"]) is None
+
+
+@pytest.mark.parametrize("nombre", sorted(MOTORES))
+def test_los_motores_respetan_los_turnos(nombre):
+    origen = time.monotonic()
+    arranques = {}
+
+    def ping(destino):
+        arranques[destino] = time.monotonic() - origen
+        return destino
+
+    MOTORES[nombre](["10.0.0.1", "10.0.0.2"], ping, max_en_vuelo=2, timeout_destino=5, timeout_ciclo=5,
+                    retrasos={"10.0.0.1": 0.3, "10.0.0.2": 0.0})
+    assert arranques["10.0.0.2"] < 0.2 <= arranques["10.0.0.1"]
@@ -0,0 +1,84 @@
+import pytest
+
+from monitoreo.sesiones import PoolSesiones, SesionNoDisponible
+
+
+class Sesion:
+    abiertas = 0
+
+    def __init__(self):
+        self.connected = False
+
+    def open(self):
+        Sesion.abiertas += 1
+        self.connected = True
+
+    def close(self):
+        self.connected = False
+
+
+@pytest.fixture(autouse=True)
+def sin_aperturas():
+    Sesion.abiertas = 0
+
+
+def test_las_sesiones_se_reutilizan():
+    aperturas = []
+    with PoolSesiones(Sesion, 2, al_abrir=aperturas.append) as pool:
+        for _ in range(5):
+            with pool.sesion() as dev:
+                assert dev.connected
+    assert Sesion.abiertas == 1 and len(aperturas) == 1
+    assert not dev.connected  # cerrar() cierra las sesiones del pool
+
+
+def test_una_sesion_caida_se_reconecta_al_entregarla():
+    with PoolSesiones(Sesion, 1) as pool:
+        with pool.sesion() as dev:
+            dev.close()  # Se cae después de devolverla sin error
+        with pool.sesion() as nueva:
+            assert nueva is not dev and nueva.connected
+    assert Sesion.abiertas == 2
+
+
+def test_una_sesion_que_falla_y_se_cae_se_descarta():
+    with PoolSesiones(Sesion, 1) as pool:
+        with pytest.raises(RuntimeError):
+            with pool.sesion() as dev:
+                dev.close()
+                raise RuntimeError("la sesión NETCONF se cerró")
+        # El lugar quedó libre: la siguiente sesión se abre de nuevo
+        with pool.sesion() as nueva:
+            assert nueva is not dev
+    assert Sesion.abiertas == 2
+
+
+def test_pool_lleno_espera_y_se_rinde():
+    with PoolSesiones(Sesion, 1, espera=0.1) as pool:
+        with pool.sesion() as dev:
+            with pytest.raises(SesionNoDisponible):
+                with pool.sesion():
+                    pass
+        with pool.sesion() as otra:
+            assert otra is dev
+
+
+def test_apertura_fallida_libera_el_lugar():
+    intentos = []
+
+    class Inalcanzable(Sesion):
+        def open(self):
+            intentos.append(1)
+            raise ConnectionError("sin ruta al equipo")
+
+    with PoolSesiones(Inalcanzable, 1, espera=0.1) as pool:
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                with pool.sesion():
+                    pass
+    assert len(intentos) == 2
+
+
+def test_tamano_invalido():
+    with pytest.raises(ValueError):
+        PoolSesiones(Sesion, 0)